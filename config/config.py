@@ -1,6 +1,7 @@
 """Configuration settings for NyayaGPT."""
 
 import os
+import tempfile
 from dataclasses import dataclass
 from typing import Optional
 from dotenv import load_dotenv
@@ -9,20 +10,46 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+def _runtime_path(name: str) -> str:
+    """Path in the user's runtime directory, or in a per-user directory under the temp directory."""
+    directory = os.getenv('XDG_RUNTIME_DIR') or os.path.join(tempfile.gettempdir(), f"nyayagpt-{os.getuid()}")
+    return os.path.join(directory, name)
+
+
 @dataclass
 class ChunkingConfig:
     """Configuration for document chunking."""
     max_tokens: int = int(os.getenv('MAX_TOKENS', 1000))
     overlap_size: int = 50
     merge_peers: bool = True
+    # Chunking results are cached by document content and chunker settings
+    cache_enabled: bool = os.getenv('CHUNK_CACHE', 'True').lower() == 'true'
+    cache_dir: str = os.getenv('CHUNK_CACHE_DIR', '.cache/chunks')
+    # Collapse duplicate and near-duplicate chunks at ingest (utils/dedup.py).
+    # Off by default: only the first member's text is kept, and stored
+    # chunk IDs are renumbered
+    dedup_enabled: bool = os.getenv('DEDUP_CHUNKS', 'False').lower() == 'true'
+    dedup_threshold: float = float(os.getenv('DEDUP_THRESHOLD', 0.98))
 
 
 @dataclass
 class EmbeddingConfig:
     """Configuration for embeddings."""
     model_name: str = os.getenv('EMBEDDING_MODEL', 'BAAI/bge-large-en-v1.5')
+    # Output dimension of the model; a projection reduces stored dimensions
+    dimension: int = int(os.getenv('EMBEDDING_DIM', 1024))
+    # Saved projection (scripts/evaluate_projection.py --save); empty keeps full size
+    projection_path: str = os.getenv('EMBEDDING_PROJECTION', '')
     batch_size: int = 32
     normalize_embeddings: bool = True
+    # Unix socket of the shared embedding daemon; empty disables it
+    daemon_socket: str = os.getenv('EMBEDDING_SOCKET', _runtime_path('nyayagpt-embedder.sock'))
+    daemon_max_batch_size: int = int(os.getenv('EMBEDDING_DAEMON_MAX_BATCH', 64))
+    daemon_max_wait_ms: float = float(os.getenv('EMBEDDING_DAEMON_MAX_WAIT_MS', 5))
+    # Concurrent query encodes are combined into one forward pass
+    query_batching: bool = os.getenv('QUERY_BATCHING', 'True').lower() == 'true'
+    query_batch_max_size: int = int(os.getenv('QUERY_BATCH_MAX_SIZE', 32))
+    query_batch_max_wait_ms: float = float(os.getenv('QUERY_BATCH_MAX_WAIT_MS', 2))
 
 
 @dataclass
@@ -32,18 +59,120 @@ class StorageConfig:
     persist_directory: str = os.getenv('CHROMA_DB_DIR', './chroma_db')
     distance_metric: str = "cosine"
     batch_size: int = int(os.getenv('BATCH_SIZE', '250'))
+    # Pre-flight validation of upload batches (utils/validators.py)
+    validate_uploads: bool = os.getenv('VALIDATE_UPLOADS', 'True').lower() == 'true'
+    # Maximum |norm - 1| of embeddings; 0 skips the check (raw bge output is not unit length)
+    norm_tolerance: float = float(os.getenv('EMBEDDING_NORM_TOLERANCE', 0))
+    # Text plus metadata bytes per record; 0 keeps each backend's own limit
+    max_record_bytes: int = int(os.getenv('MAX_RECORD_BYTES', 0))
     # Cloud configuration
     api_key: str = os.getenv('CHROMA_API_KEY', '')
     tenant: str = os.getenv('CHROMA_TENANT', '')
     database: str = os.getenv('CHROMA_DATABASE', '')
 
 
+@dataclass
+class RetrievalConfig:
+    """Configuration for retrieval and context building."""
+    n_results: int = int(os.getenv('RETRIEVAL_TOP_K', 5))
+    context_max_tokens: int = int(os.getenv('CONTEXT_MAX_TOKENS', 3000))
+    min_dedup_span_chars: int = 40
+    # Compound questions are split into at most this many sub-queries
+    max_sub_queries: int = int(os.getenv('MAX_SUB_QUERIES', 4))
+    # Query-focused extractive compression between retrieval and generation
+    compression_enabled: bool = os.getenv('CONTEXT_COMPRESSION', 'False').lower() == 'true'
+    compression_ratio: float = float(os.getenv('COMPRESSION_RATIO', 0.5))
+    compression_neighbours: int = 1
+    # Cross-encoder reranking of an over-fetched candidate set
+    rerank_enabled: bool = os.getenv('RERANK', 'False').lower() == 'true'
+    rerank_model: str = os.getenv('RERANK_MODEL', 'cross-encoder/ms-marco-MiniLM-L-6-v2')
+    rerank_candidates: int = int(os.getenv('RERANK_CANDIDATES', 40))
+    rerank_batch_size: int = 16
+    rerank_budget_ms: int = int(os.getenv('RERANK_BUDGET_MS', 300))
+    # Sub-queries naming one article, part, chapter or schedule search within it first
+    structural_filters: bool = os.getenv('STRUCTURAL_FILTERS', 'True').lower() == 'true'
+    # Search only this document (e.g. indian_constitution); empty searches every document
+    document_name: str = os.getenv('RETRIEVAL_DOCUMENT', '')
+
+
+@dataclass
+class MemoryConfig:
+    """Configuration for multi-turn conversation memory."""
+    max_history_tokens: int = int(os.getenv('MAX_HISTORY_TOKENS', 1500))
+    summary_max_tokens: int = int(os.getenv('SUMMARY_MAX_TOKENS', 400))
+    # Summarize folded turns with the LLM (one extra call per fold) instead of extractively
+    llm_summaries: bool = os.getenv('LLM_SUMMARIES', 'True').lower() == 'true'
+    # Sessions kept in memory; idle or least recently used ones are forgotten
+    max_sessions: int = int(os.getenv('MAX_SESSIONS', 1000))
+    session_ttl_s: float = float(os.getenv('SESSION_TTL_S', 3600))
+
+
 @dataclass
 class LoggingConfig:
     """Configuration for logging."""
     level: str = os.getenv('LOG_LEVEL', 'INFO')
     file: str = os.getenv('LOG_FILE', 'logs/nyayagpt.log')
     format: str = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    # Per-module levels, e.g. "storage=DEBUG,pinecone_storage=WARNING"
+    module_levels: str = os.getenv('LOG_LEVELS', '')
+    max_bytes: int = int(os.getenv('LOG_MAX_BYTES', 10 * 1024 * 1024))
+    backup_count: int = int(os.getenv('LOG_BACKUP_COUNT', 5))
+    queue_size: int = 10000
+
+
+@dataclass
+class TracingConfig:
+    """Configuration for request tracing."""
+    enabled: bool = os.getenv('TRACING_ENABLED', 'False').lower() == 'true'
+    # "jsonl" for flat span records, "otlp" for OTLP/JSON lines
+    format: str = os.getenv('TRACING_FORMAT', 'jsonl')
+    path: str = os.getenv('TRACING_FILE', 'logs/traces.jsonl')
+
+
+@dataclass
+class MetricsConfig:
+    """Configuration for the metrics endpoint."""
+    # Port serving /metrics; 0 disables the endpoint
+    port: int = int(os.getenv('METRICS_PORT', '0'))
+    host: str = os.getenv('METRICS_HOST', '127.0.0.1')
+
+
+@dataclass
+class ServerConfig:
+    """Configuration for the HTTP service."""
+    host: str = os.getenv('SERVER_HOST', '127.0.0.1')
+    port: int = int(os.getenv('SERVER_PORT', 8000))
+    # Requests answered at once; further requests wait in a bounded queue
+    max_in_flight: int = int(os.getenv('SERVER_MAX_IN_FLIGHT', 8))
+    max_queue: int = int(os.getenv('SERVER_MAX_QUEUE', 32))
+    queue_timeout_ms: int = int(os.getenv('SERVER_QUEUE_TIMEOUT_MS', 5000))
+    max_body_bytes: int = 64 * 1024
+
+
+@dataclass
+class IngestionConfig:
+    """Configuration for corpus-wide ingestion."""
+    # Worker processes converting, chunking and embedding documents
+    workers: int = int(os.getenv('INGEST_WORKERS', 2))
+    manifest_path: str = os.getenv('INGEST_MANIFEST', '.cache/ingest_manifest.json')
+    conversion_cache_dir: str = os.getenv('CONVERSION_CACHE_DIR', '.cache/docling')
+    # Corpus artifact written by ingestion; empty disables it
+    artifact_dir: str = os.getenv('CORPUS_ARTIFACT', '')
+    # Docling JSON files at least this large are chunked section by section
+    stream_threshold_mb: float = float(os.getenv('STREAM_THRESHOLD_MB', 20))
+    # Top-level items per section when headings are far apart
+    stream_section_items: int = int(os.getenv('STREAM_SECTION_ITEMS', 200))
+
+
+@dataclass
+class MirrorConfig:
+    """Configuration for the local mirror of the remote vector index."""
+    # Mirror directory; empty disables the mirror
+    directory: str = os.getenv('MIRROR_DIR', '')
+    sync_interval: float = float(os.getenv('MIRROR_SYNC_INTERVAL_S', 300))
+    # Older mirrors are only used when the remote index fails
+    max_staleness: float = float(os.getenv('MIRROR_MAX_STALENESS_S', 3600))
+    fetch_batch_size: int = int(os.getenv('MIRROR_FETCH_BATCH', 100))
 
 
 @dataclass
@@ -57,7 +186,14 @@ class AppConfig:
     chunking: ChunkingConfig = None
     embedding: EmbeddingConfig = None
     storage: StorageConfig = None
+    retrieval: RetrievalConfig = None
+    memory: MemoryConfig = None
     logging: LoggingConfig = None
+    tracing: TracingConfig = None
+    metrics: MetricsConfig = None
+    server: ServerConfig = None
+    ingestion: IngestionConfig = None
+    mirror: MirrorConfig = None
     
     # Document processing
     supported_formats: list = None
@@ -71,8 +207,22 @@ class AppConfig:
             self.embedding = EmbeddingConfig()
         if self.storage is None:
             self.storage = StorageConfig()
+        if self.retrieval is None:
+            self.retrieval = RetrievalConfig()
+        if self.memory is None:
+            self.memory = MemoryConfig()
         if self.logging is None:
             self.logging = LoggingConfig()
+        if self.tracing is None:
+            self.tracing = TracingConfig()
+        if self.metrics is None:
+            self.metrics = MetricsConfig()
+        if self.server is None:
+            self.server = ServerConfig()
+        if self.ingestion is None:
+            self.ingestion = IngestionConfig()
+        if self.mirror is None:
+            self.mirror = MirrorConfig()
         
         if self.supported_formats is None:
             self.supported_formats = [".pdf", ".docx", ".txt", ".md"]
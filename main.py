@@ -1,4 +1,6 @@
 from utils.chat_interface import NyayaChatInterface
+from utils.metrics import start_metrics_server
+from config.config import config
 
 
 def main():
@@ -6,8 +8,13 @@ def main():
     print("=" * 50)
     print("📚 Your AI assistant for Indian Constitution queries")
     print("💡 Type 'quit' or 'exit' to end the conversation")
+    print("💡 Type 'new' to start a new conversation")
     print("=" * 50)
     
+    if config.metrics.port:
+        start_metrics_server(config.metrics.port, config.metrics.host)
+        print(f"📈 Metrics available at http://{config.metrics.host}:{config.metrics.port}/metrics")
+    
     # Start the chat interface
     chat = NyayaChatInterface()
     chat.start_chat()
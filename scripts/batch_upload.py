@@ -1,8 +1,7 @@
 #!/usr/bin/env python3
 """Batch upload script to handle large documents within free tier limits."""
 
-from docling_core.types.doc import DoclingDocument
-from utils import embed_document, chunk_document
+from utils import embed_chunks, chunk_json_file
 from utils.cloud_storage import CloudChromaStorage
 from config.config import config
 import os
@@ -13,15 +12,14 @@ def batch_upload_constitution(batch_size=250):
     
     # Load document
     source = os.path.join("data", "indian_constitution.docling.json")
-    docling_document = DoclingDocument.load_from_json(source)
     
     print("Processing Indian Constitution...")
     
     # Chunk and embed
-    chunks = chunk_document(docling_document)
+    chunks = chunk_json_file(source)
     print(f"Total chunks: {len(chunks)}")
     
-    embedded_chunks = embed_document(docling_document)
+    embedded_chunks = embed_chunks(chunks)
     print(f"Total embedded chunks: {len(embedded_chunks)}")
     
     # Connect to cloud storage
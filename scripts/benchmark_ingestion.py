@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""Ingestion throughput benchmark on synthetic docling documents.
+
+Generates DoclingDocuments of configurable size and heading depth and
+runs chunking, embedding and the three save_chunks implementations
+against local stand-in sinks. Everything runs offline; the tokenizer
+(and the embedding model, with --embedder model) must already be in the
+Hugging Face cache.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+
+import argparse
+import json
+import time
+
+from utils.synthetic_docs import generate_document
+from utils.chunker import chunk_document
+from utils.embedder import ChunkWithEmbedding
+from utils.storage import ChromaStorage
+from utils.cloud_storage import CloudChromaStorage
+from utils.pinecone_storage import PineconeStorage
+from utils.stand_ins import HashingEmbedder, StandInChromaClient, StandInPineconeIndex
+from utils.benchmarking import peak_rss_mb, environment_info, save_results, compare_results
+from config.config import config
+
+
+def stand_in_backends(dimension: int) -> dict:
+    """Create each storage backend wired to a local stand-in sink."""
+    return {
+        "chroma": ChromaStorage(collection_name="benchmark", client=StandInChromaClient()),
+        "chroma_cloud": CloudChromaStorage(collection_name="benchmark", client=StandInChromaClient()),
+        "pinecone": PineconeStorage(index_name="benchmark", dimension=dimension,
+                                    index=StandInPineconeIndex(dimension))
+    }
+
+
+def sink_of(storage):
+    """Return the stand-in object that received the uploaded records."""
+    return storage.index if isinstance(storage, PineconeStorage) else storage.collection
+
+
+def benchmark_document(args, n_paragraphs: int, embedder) -> dict:
+    """Run every ingestion stage for one synthetic document size."""
+    results = {"paragraphs": n_paragraphs}
+
+    start = time.perf_counter()
+    document = generate_document(n_paragraphs=n_paragraphs, heading_depth=args.heading_depth, seed=args.seed)
+    results["generate_seconds"] = round(time.perf_counter() - start, 4)
+
+    # Chunking, bypassing the chunk cache so repeat runs time the chunker
+    start = time.perf_counter()
+    chunks = chunk_document(document, use_cache=False)
+    seconds = time.perf_counter() - start
+    results["chunking"] = {
+        "chunks": len(chunks),
+        "seconds": round(seconds, 4),
+        "chunks_per_sec": round(len(chunks) / seconds, 2) if seconds else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1)
+    }
+
+    # Embedding
+    texts = [chunk.text for chunk in chunks]
+    start = time.perf_counter()
+    embeddings = embedder.encode(texts)
+    seconds = time.perf_counter() - start
+    results["embedding"] = {
+        "embeddings": len(texts),
+        "seconds": round(seconds, 4),
+        "embeddings_per_sec": round(len(texts) / seconds, 2) if seconds else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1)
+    }
+    embedded_chunks = [
+        ChunkWithEmbedding(text=text, embedding=embeddings[i], metadata={'chunk_id': i, 'chunk_type': 'DocChunk'})
+        for i, text in enumerate(texts)
+    ]
+
+    # Conversion of embeddings to Python lists, which every backend does
+    start = time.perf_counter()
+    for chunk in embedded_chunks:
+        chunk.embedding.tolist()
+    results["tolist_seconds"] = round(time.perf_counter() - start, 4)
+
+    # Uploads
+    results["upload"] = {}
+    for name, storage in stand_in_backends(embeddings.shape[1]).items():
+        start = time.perf_counter()
+        storage.save_chunks(embedded_chunks, document_name="synthetic")
+        seconds = time.perf_counter() - start
+        sink = sink_of(storage)
+        results["upload"][name] = {
+            "vectors": sink.records,
+            "seconds": round(seconds, 4),
+            "vectors_per_sec": round(sink.records / seconds, 2) if seconds else None,
+            "serialization_seconds": round(sink.serialization_seconds, 4),
+            "bytes": sink.bytes_sent,
+            "peak_rss_mb": round(peak_rss_mb(), 1)
+        }
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ingestion throughput offline")
+    parser.add_argument("--sizes", type=str, default="200,1000,5000",
+                        help="Comma separated document sizes in paragraphs")
+    parser.add_argument("--heading-depth", type=int, default=3, help="Nested heading levels")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for document generation")
+    parser.add_argument("--embedder", choices=["hashing", "model"], default="hashing",
+                        help="'hashing' stand-in or the real embedding 'model'")
+    parser.add_argument("--dimension", type=int, default=1024, help="Stand-in embedding dimension")
+    parser.add_argument("--output", type=str, default="bench_results/ingestion_benchmark.json",
+                        help="JSON output path")
+    parser.add_argument("--baseline", type=str, default=None, help="Previous results JSON to compare against")
+    args = parser.parse_args()
+
+    print("🧪 NyayaGPT ingestion benchmark (offline stand-ins)")
+    print("=" * 50)
+
+    if args.embedder == "model":
+        from utils.chunker import embedding_model as embedder
+    else:
+        embedder = HashingEmbedder(dimension=args.dimension)
+
+    runs = {}
+    for size in [int(size) for size in args.sizes.split(",")]:
+        print(f"\n📄 Document with {size} paragraphs, heading depth {args.heading_depth}")
+        run = benchmark_document(args, size, embedder)
+        runs[str(size)] = run
+        print(f"  chunking:  {run['chunking']['chunks']} chunks, {run['chunking']['chunks_per_sec']} chunks/sec")
+        print(f"  embedding: {run['embedding']['embeddings_per_sec']} embeddings/sec")
+        print(f"  tolist:    {run['tolist_seconds']:.4f}s")
+        for name, upload in run["upload"].items():
+            print(f"  {name:<13} {upload['vectors_per_sec']} vectors/sec "
+                  f"(serialization {upload['serialization_seconds']:.4f}s, {upload['bytes'] / 1e6:.1f} MB)")
+        print(f"  peak RSS:  {peak_rss_mb():.1f} MB")
+
+    results = {
+        "benchmark": "ingestion",
+        "app_version": config.version,
+        "environment": environment_info(),
+        "parameters": vars(args),
+        "runs": runs
+    }
+    save_results(args.output, results)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"\n🔍 Changes against {args.baseline}:")
+        for line in compare_results(baseline, results):
+            print(f"  {line}")
+
+
+if __name__ == "__main__":
+    main()
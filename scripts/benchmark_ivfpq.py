@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Recall and latency of the IVF-PQ index against exact search.
+
+Builds an IVF-PQ index over a corpus artifact's embeddings (or synthetic
+clustered vectors), training on a sample and adding the vectors in
+batches as ingestion would, saves and reloads it, then sweeps n_probe
+and the rescore depth. Every setting is compared with an exact flat
+scan of the same memory-mapped vectors on recall@k and per-query
+latency, and the results are saved as JSON.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import tempfile
+import time
+import numpy as np
+
+from utils.ivfpq import IVFPQIndex
+from utils.benchmarking import exact_top_k, recall_at_k, summarize, environment_info, peak_rss_mb, save_results
+
+
+def synthetic_vectors(n: int, dimension: int, clusters: int, seed: int) -> np.ndarray:
+    """Normalized vectors drawn around random cluster centres."""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dimension)).astype(np.float32)
+    vectors = centres[rng.integers(0, clusters, n)] + 0.6 * rng.normal(size=(n, dimension)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the IVF-PQ index")
+    parser.add_argument("--artifact", type=str, help="Corpus artifact to index")
+    parser.add_argument("--vectors", type=int, default=200000, help="Synthetic corpus size")
+    parser.add_argument("--dimension", type=int, default=256, help="Synthetic vector dimension")
+    parser.add_argument("--clusters", type=int, default=1000, help="Synthetic clusters")
+    parser.add_argument("--n-lists", type=int, help="Coarse partitions (default 4 * sqrt(n))")
+    parser.add_argument("--subvectors", type=int, default=16, help="Bytes per PQ code")
+    parser.add_argument("--train-size", type=int, default=50000, help="Vectors the quantizers are trained on")
+    parser.add_argument("--add-batch", type=int, default=50000, help="Vectors added per batch")
+    parser.add_argument("--n-probe", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--rescore", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--k", type=int, default=10, help="Neighbours compared for recall@k")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per setting")
+    parser.add_argument("--index-dir", type=str, help="Where to save the index (default: a temp directory)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=str, default="bench_results/ivfpq.json", help="Results JSON")
+    args = parser.parse_args()
+
+    print("🗂️  NyayaGPT IVF-PQ benchmark")
+    print("=" * 50)
+
+    if args.artifact:
+        from utils.corpus_artifact import CorpusArtifact
+        vectors = CorpusArtifact(args.artifact).embeddings
+    else:
+        vectors = synthetic_vectors(args.vectors, args.dimension, args.clusters, args.seed)
+    n, dimension = vectors.shape
+    n_lists = args.n_lists or max(1, int(4 * np.sqrt(n)))
+    print(f"📦 {n} vectors of dimension {dimension}, {n_lists} partitions, {args.subvectors}-byte codes")
+
+    index = IVFPQIndex(dimension, n_lists=n_lists, n_subvectors=args.subvectors)
+    start = time.perf_counter()
+    index.train(vectors, sample_size=args.train_size, seed=args.seed)
+    train_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for batch_start in range(0, n, args.add_batch):
+        index.add(vectors[batch_start:batch_start + args.add_batch])
+    add_seconds = time.perf_counter() - start
+    print(f"🏋️  Trained in {train_seconds:.1f}s, added in {add_seconds:.1f}s "
+          f"({n / add_seconds:.0f} vectors/sec)")
+
+    index_dir = args.index_dir or tempfile.mkdtemp(prefix="ivfpq-")
+    index.save(index_dir)
+    index = IVFPQIndex.load(index_dir)
+    full_bytes = n * dimension * 4
+    print(f"💾 Saved to {index_dir}: {index.memory_bytes() / 1e6:.1f} MB in memory "
+          f"vs {full_bytes / 1e6:.1f} MB for the full matrix (memory-mapped for rescoring)")
+
+    # Queries are perturbed corpus vectors, normalized like the index
+    rng = np.random.default_rng(args.seed + 1)
+    rows = rng.choice(n, min(args.queries, n), replace=False)
+    queries = np.asarray(vectors[np.sort(rows)], dtype=np.float32)
+    queries += 0.1 * rng.normal(size=queries.shape).astype(np.float32) / np.sqrt(dimension)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    stored = index._stored
+    exact_times = []
+    truth = np.zeros((len(queries), args.k), dtype=np.int64)
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        truth[i] = exact_top_k(query[None, :], stored, args.k, block_size=1)[0]
+        exact_times.append(time.perf_counter() - start)
+    exact = summarize(exact_times)
+
+    results = []
+    for rescore in args.rescore:
+        for n_probe in args.n_probe:
+            found = np.zeros_like(truth)
+            times = []
+            for i, query in enumerate(queries):
+                start = time.perf_counter()
+                rows, _ = index.search(query, k=args.k, n_probe=n_probe, rescore=rescore)
+                times.append(time.perf_counter() - start)
+                found[i, :len(rows)] = rows
+                found[i, len(rows):] = -1
+            latency = summarize(times)
+            results.append({"n_probe": n_probe, "rescore": rescore,
+                            f"recall@{args.k}": round(recall_at_k(truth, found), 4), **latency})
+
+    print(f"\n{'n_probe':>8}{'rescore':>9}{f'recall@{args.k}':>12}{'p50 ms':>9}{'p95 ms':>9}{'speedup':>9}")
+    print(f"{'exact':>8}{'':>9}{1.0:>12.4f}{exact['p50_ms']:>9.3f}{exact['p95_ms']:>9.3f}{1.0:>9.1f}")
+    for row in results:
+        print(f"{row['n_probe']:>8}{row['rescore']:>9}{row[f'recall@{args.k}']:>12.4f}"
+              f"{row['p50_ms']:>9.3f}{row['p95_ms']:>9.3f}{exact['p50_ms'] / row['p50_ms']:>9.1f}")
+    print(f"\n📈 Peak RSS: {peak_rss_mb():.1f} MB")
+
+    save_results(args.output, {
+        "environment": environment_info(),
+        "vectors": n,
+        "dimension": dimension,
+        "n_lists": n_lists,
+        "subvectors": args.subvectors,
+        "train_seconds": round(train_seconds, 3),
+        "add_per_sec": round(n / add_seconds, 1),
+        "index_memory_mb": round(index.memory_bytes() / 1e6, 2),
+        "full_matrix_mb": round(full_bytes / 1e6, 2),
+        "exact": exact,
+        "results": results
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""End-to-end latency and throughput benchmark for the RAG agent.
+
+Runs NyayaRAGAgent against offline stand-ins (a deterministic fake LLM
+and an in-memory vector store), reports per-stage percentiles and a
+concurrency sweep, and saves the results as JSON. Context building
+counts tokens with the chunking tokenizer, which must already be in the
+Hugging Face cache; without it (or with --tokenizer words) a word
+counting stand-in is used, which makes context_build faster than in
+production.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.rag_agent import NyayaRAGAgent
+from utils.chunker import get_tokenizer, set_tokenizer
+from utils.stand_ins import FakeLLM, HashingEmbedder, InMemoryVectorStore, WordTokenizer, synthetic_corpus
+from utils.benchmarking import summarize, environment_info, save_results, compare_results
+from config.config import config
+
+
+QUESTIONS = [
+    "What are fundamental rights in the Indian Constitution?",
+    "What is Article 21 about?",
+    "What are the fundamental duties of citizens?",
+    "What is the structure of the Indian Constitution?",
+    "What is the preamble of the Constitution?",
+    "Compare Article 14 and Article 21 and their relation to Article 19",
+    "How is the President of India elected?",
+    "What powers does Parliament have under Part XI?",
+]
+
+# Stages reported per request, mapped to the agent's timing keys
+STAGES = {
+    "encode": "encode",
+    "vector_query": "retrieve",
+    "rerank": "rerank",
+    "compress": "compress",
+    "context_build": "build_context",
+    "generation": "generate",
+}
+
+
+def build_agent(args) -> NyayaRAGAgent:
+    """Create an agent wired to the offline stand-ins."""
+    if args.tokenizer == "model":
+        try:
+            get_tokenizer()
+        except OSError:
+            print("⚠️  Tokenizer not in the Hugging Face cache, counting words instead")
+            args.tokenizer = "words"
+    if args.tokenizer == "words":
+        set_tokenizer(WordTokenizer())
+
+    if args.embedder == "model":
+        from utils.chunker import embedding_model as embedder
+    else:
+        embedder = HashingEmbedder(dimension=args.dimension)
+
+    store = InMemoryVectorStore(dimension=args.dimension, query_latency=args.query_latency, embedder=embedder)
+    store.save_chunks(synthetic_corpus(args.chunks, embedder), document_name="indian_constitution")
+
+    llm = FakeLLM(
+        first_token_latency=args.first_token_latency,
+        tokens_per_second=args.tokens_per_second,
+        answer_tokens=args.answer_tokens
+    )
+    return NyayaRAGAgent(storage=store, llm=llm, embedder=embedder,
+                         compress=args.compress, rerank=args.rerank)
+
+
+def timed_request(agent: NyayaRAGAgent, question: str) -> dict:
+    """Answer one question and return its stage timings plus the total."""
+    start = time.perf_counter()
+    result = agent.chat(question)
+    total = time.perf_counter() - start
+
+    timings = result["timings"]
+    record = {stage: timings[key] for stage, key in STAGES.items() if key in timings}
+    record["first_token"] = total - timings.get("generate", 0.0) + timings.get("first_token", 0.0)
+    record["total"] = total
+    return record
+
+
+def run_latency(agent: NyayaRAGAgent, iterations: int, warmup: int) -> dict:
+    """Run requests one at a time and summarize each stage."""
+    for i in range(warmup):
+        agent.chat(QUESTIONS[i % len(QUESTIONS)])
+
+    records = [timed_request(agent, QUESTIONS[i % len(QUESTIONS)]) for i in range(iterations)]
+    stages = sorted({stage for record in records for stage in record})
+    return {stage: summarize([record[stage] for record in records if stage in record]) for stage in stages}
+
+
+def run_concurrency_sweep(agent: NyayaRAGAgent, levels: list, requests_per_level: int) -> dict:
+    """Measure throughput and latency at increasing concurrency."""
+    sweep = {}
+    for level in levels:
+        questions = [QUESTIONS[i % len(QUESTIONS)] for i in range(requests_per_level)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=level) as pool:
+            records = list(pool.map(lambda q: timed_request(agent, q), questions))
+        wall = time.perf_counter() - start
+
+        sweep[str(level)] = {
+            "questions_per_sec": round(requests_per_level / wall, 3),
+            "total": summarize([record["total"] for record in records]),
+            "first_token": summarize([record["first_token"] for record in records])
+        }
+        print(f"  concurrency={level:>3}: {sweep[str(level)]['questions_per_sec']:.2f} questions/sec, "
+              f"p95 {sweep[str(level)]['total']['p95_ms']:.1f} ms")
+    return sweep
+
+
+def print_latency(latency: dict) -> None:
+    """Print the per-stage latency table."""
+    print(f"\n{'stage':<15}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage, summary in latency.items():
+        print(f"{stage:<15}{summary['p50_ms']:>10.2f}{summary['p95_ms']:>10.2f}{summary['p99_ms']:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark NyayaRAGAgent with offline stand-ins")
+    parser.add_argument("--chunks", type=int, default=400, help="Synthetic corpus size")
+    parser.add_argument("--dimension", type=int, default=1024, help="Embedding dimension")
+    parser.add_argument("--embedder", choices=["hashing", "model"], default="hashing",
+                        help="'hashing' stand-in or the real embedding 'model'")
+    parser.add_argument("--tokenizer", choices=["model", "words"], default="model",
+                        help="Cached chunking 'model' tokenizer or the 'words' stand-in")
+    parser.add_argument("--query-latency", type=float, default=0.02, help="Simulated vector DB latency (s)")
+    parser.add_argument("--first-token-latency", type=float, default=0.3, help="Fake LLM first token latency (s)")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0, help="Fake LLM token rate")
+    parser.add_argument("--answer-tokens", type=int, default=100, help="Fake LLM answer length")
+    parser.add_argument("--compress", action="store_true", help="Enable context compression")
+    parser.add_argument("--rerank", action="store_true", help="Enable cross-encoder reranking")
+    parser.add_argument("--iterations", type=int, default=50, help="Serial requests to time")
+    parser.add_argument("--warmup", type=int, default=3, help="Untimed warmup requests")
+    parser.add_argument("--concurrency", type=str, default="1,2,4,8,16", help="Comma separated levels")
+    parser.add_argument("--requests-per-level", type=int, default=32, help="Requests per concurrency level")
+    parser.add_argument("--output", type=str, default="bench_results/rag_benchmark.json", help="JSON output path")
+    parser.add_argument("--baseline", type=str, default=None, help="Previous results JSON to compare against")
+    args = parser.parse_args()
+
+    print("🧪 NyayaGPT RAG benchmark (offline stand-ins)")
+    print("=" * 50)
+    agent = build_agent(args)
+
+    print(f"\n⏱️  Timing {args.iterations} serial requests...")
+    latency = run_latency(agent, args.iterations, args.warmup)
+    print_latency(latency)
+
+    print("\n📈 Concurrency sweep:")
+    levels = [int(level) for level in args.concurrency.split(",")]
+    sweep = run_concurrency_sweep(agent, levels, args.requests_per_level)
+
+    results = {
+        "benchmark": "rag",
+        "app_version": config.version,
+        "environment": environment_info(),
+        "parameters": vars(args),
+        "latency": latency,
+        "concurrency": sweep
+    }
+    save_results(args.output, results)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"\n🔍 Changes against {args.baseline}:")
+        for line in compare_results(baseline, results):
+            print(f"  {line}")
+
+
+if __name__ == "__main__":
+    main()
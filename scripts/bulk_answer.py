@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""Answer many questions from a JSONL file.
+
+Each input line is a JSON object with a "question" and optionally an
+"id" (the line number is used otherwise); any other fields are copied to
+the output. Questions run concurrently through one shared agent, so the
+query embeddings of concurrent questions share forward passes in the
+micro-batching query encoder. LLM calls go through a token bucket to
+stay under the provider's rate limit.
+
+Results are appended to the output JSONL as they finish. Re-running with
+the same output skips questions that were already answered, so an
+interrupted run can simply be restarted; failed questions are retried.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, Iterator
+
+from utils.rag_agent import NyayaRAGAgent
+from utils.rate_limit import TokenBucket, RateLimitedLLM
+from utils.stand_ins import stand_in_agent
+
+
+def read_questions(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield question records, assigning IDs from line numbers if missing."""
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if not record.get("question"):
+                print(f"⚠️  Line {line_number} has no question, skipping")
+                continue
+            record.setdefault("id", str(line_number))
+            yield record
+
+
+def answered_ids(path: str) -> set:
+    """IDs already answered successfully in an existing output file."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A line cut short by an interrupted run
+                continue
+            if "error" not in record:
+                done.add(str(record["id"]))
+    return done
+
+
+def answer(agent: NyayaRAGAgent, record: Dict[str, Any]) -> Dict[str, Any]:
+    """Answer one question and build its output record."""
+    start = time.perf_counter()
+    try:
+        result = agent.chat(record["question"])
+    except Exception as e:
+        return {**record, "error": f"{type(e).__name__}: {e}"}
+
+    return {
+        **record,
+        "answer": result["answer"],
+        "sources": [
+            {"source": source["source"], "id": source["id"], "relevance": source["relevance"],
+             "metadata": source["metadata"]}
+            for source in result["sources"]
+        ],
+        "sub_queries": result["sub_queries"],
+        "timings": {stage: round(seconds, 4) for stage, seconds in result["timings"].items()},
+        "total_seconds": round(time.perf_counter() - start, 4),
+        "trace_id": result["trace_id"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer questions from a JSONL file")
+    parser.add_argument("input", type=str, help="Input JSONL with one {\"question\": ...} per line")
+    parser.add_argument("output", type=str, help="Output JSONL; existing answers are skipped")
+    parser.add_argument("--concurrency", type=int, default=8, help="Questions answered at once")
+    parser.add_argument("--llm-rate", type=float, default=2.0, help="Maximum LLM calls per second")
+    parser.add_argument("--llm-burst", type=int, default=4, help="LLM calls allowed in a burst")
+    parser.add_argument("--index", type=str, default="nyayagpt-constitution", help="Pinecone index name")
+    parser.add_argument("--stand-ins", action="store_true", help="Use the offline fake LLM and in-memory store")
+    args = parser.parse_args()
+
+    print("📚 NyayaGPT bulk answering")
+    print("=" * 50)
+
+    done = answered_ids(args.output)
+    pending = [record for record in read_questions(args.input) if str(record["id"]) not in done]
+    print(f"📝 {len(pending)} questions to answer ({len(done)} already answered)")
+    if not pending:
+        return
+
+    agent = stand_in_agent() if args.stand_ins else NyayaRAGAgent(index_name=args.index)
+    agent.llm = RateLimitedLLM(agent.llm, TokenBucket(args.llm_rate, args.llm_burst))
+
+    completed = failed = 0
+    start = time.perf_counter()
+
+    # Terminate a line cut short by an interrupted run before appending
+    if os.path.exists(args.output) and os.path.getsize(args.output):
+        with open(args.output, 'rb+') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+
+    with open(args.output, 'a') as output, ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        records = iter(pending)
+        in_flight = set()
+        try:
+            while True:
+                # Keep a bounded window of submitted questions
+                while len(in_flight) < args.concurrency * 2:
+                    record = next(records, None)
+                    if record is None:
+                        break
+                    in_flight.add(pool.submit(answer, agent, record))
+                if not in_flight:
+                    break
+
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    result = future.result()
+                    output.write(json.dumps(result, default=str) + "\n")
+                    output.flush()
+                    if "error" in result:
+                        failed += 1
+                        print(f"❌ {result['id']}: {result['error']}")
+                    else:
+                        completed += 1
+
+                total = completed + failed
+                if total % 50 == 0 or not in_flight:
+                    rate = total / (time.perf_counter() - start)
+                    print(f"  {total}/{len(pending)} done, {rate:.2f} questions/sec")
+        except KeyboardInterrupt:
+            print("\n⏹️  Interrupted; waiting for in-flight questions. Re-run to resume.")
+            for future in in_flight:
+                future.cancel()
+            raise
+
+    print(f"\n✅ Answered {completed} questions, {failed} failed, in {time.perf_counter() - start:.1f}s")
+    print(f"💾 Results appended to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,7 @@
 #!/usr/bin/env python3
 """Clear existing data and upload fresh constitution data."""
 
-from docling_core.types.doc import DoclingDocument
-from utils import embed_document, chunk_document
+from utils import embed_chunks, chunk_json_file
 from utils.cloud_storage import CloudChromaStorage
 from config.config import config
 import os
@@ -33,13 +32,12 @@ def clear_and_upload():
     
     # Load and process document
     source = os.path.join("data", "indian_constitution.docling.json")
-    docling_document = DoclingDocument.load_from_json(source)
     
     print("\nProcessing Indian Constitution...")
-    chunks = chunk_document(docling_document)
+    chunks = chunk_json_file(source)
     print(f"Total chunks: {len(chunks)}")
     
-    embedded_chunks = embed_document(docling_document)
+    embedded_chunks = embed_chunks(chunks)
     print(f"Total embedded chunks: {len(embedded_chunks)}")
     
     # Upload in smaller batches
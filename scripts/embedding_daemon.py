@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Run the shared embedding daemon.
+
+Loads the embedding model once and serves encode requests on a Unix
+socket. While it is running, every NyayaGPT process on the machine uses
+it through utils.chunker.get_embedding_model() instead of loading its
+own copy of the model.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import signal
+import time
+
+from utils.embedding_server import EmbeddingServer
+from utils.chunker import load_local_embedding_model
+from utils.stand_ins import HashingEmbedder
+from config.config import config
+
+
+def handle_sigterm(signum, frame):
+    raise KeyboardInterrupt
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve embeddings over a Unix socket")
+    parser.add_argument("--socket", type=str, default=config.embedding.daemon_socket, help="Unix socket path")
+    parser.add_argument("--max-batch-size", type=int, default=config.embedding.daemon_max_batch_size,
+                        help="Maximum number of texts per forward pass")
+    parser.add_argument("--max-wait-ms", type=float, default=config.embedding.daemon_max_wait_ms,
+                        help="How long a request waits for others to batch with")
+    parser.add_argument("--embedder", choices=["model", "hashing"], default="model",
+                        help="The real embedding 'model' or the offline 'hashing' stand-in")
+    parser.add_argument("--dimension", type=int, default=1024, help="Stand-in embedding dimension")
+    args = parser.parse_args()
+
+    if not args.socket:
+        print("❌ No socket path configured (set EMBEDDING_SOCKET or pass --socket)")
+        sys.exit(1)
+
+    print("🧠 NyayaGPT embedding daemon")
+    print("=" * 50)
+
+    start = time.perf_counter()
+    if args.embedder == "model":
+        model = load_local_embedding_model()
+    else:
+        model = HashingEmbedder(dimension=args.dimension)
+    print(f"✅ Loaded {args.embedder} embedder in {time.perf_counter() - start:.1f}s")
+
+    server = EmbeddingServer(
+        args.socket,
+        model,
+        max_batch_size=args.max_batch_size,
+        max_wait_seconds=args.max_wait_ms / 1000
+    )
+    # Stop cleanly on SIGTERM as well as Ctrl+C
+    signal.signal(signal.SIGTERM, handle_sigterm)
+
+    print(f"🔌 Listening on {args.socket} (batches of up to {args.max_batch_size}, "
+          f"{args.max_wait_ms:g} ms window)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Shutting down")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Measure the recall of reduced-dimension embeddings.
+
+Fits PCA and/or truncation projections to several dimensions on a corpus
+artifact's embeddings and compares exact top-k search in the projected
+space with full-dimension search, reporting recall@k, index size and
+query scoring time for each. Queries are real questions (--questions,
+encoded with the embedding model) or, by default, a sample of chunk
+embeddings with each query's own chunk excluded.
+
+Save a projection with --save and point EMBEDDING_PROJECTION at it to
+use it; the corpus then has to be re-ingested into an index of the new
+dimension.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import time
+import numpy as np
+
+from utils.projection import PCAProjection, TruncationProjection
+from utils.benchmarking import exact_top_k, recall_at_k, environment_info, save_results
+
+
+def load_corpus(args) -> np.ndarray:
+    """Full-dimension, normalized corpus embeddings."""
+    if args.stand_ins:
+        from utils.stand_ins import HashingEmbedder, synthetic_corpus
+        chunks = synthetic_corpus(args.chunks, HashingEmbedder(dimension=args.dimension))
+        matrix = np.stack([chunk.embedding for chunk in chunks]).astype(np.float32)
+    else:
+        from utils.corpus_artifact import CorpusArtifact
+        matrix = np.asarray(CorpusArtifact(args.artifact).embeddings, dtype=np.float32)
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+
+def load_queries(args, corpus: np.ndarray):
+    """Query embeddings and, for sampled chunks, the rows to exclude."""
+    if args.questions:
+        from utils.chunker import load_local_embedding_model
+        with open(args.questions) as f:
+            questions = [json.loads(line)["question"] for line in f if line.strip()]
+        embeddings = np.asarray(load_local_embedding_model().encode(questions), dtype=np.float32)
+        return embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12), None
+
+    rows = np.random.default_rng(args.seed).choice(len(corpus), min(args.queries, len(corpus)), replace=False)
+    return corpus[rows], rows
+
+
+def evaluate(name: str, corpus: np.ndarray, queries: np.ndarray, exclude, truth: np.ndarray, k: int) -> dict:
+    """Recall, size and scoring time of search over one representation."""
+    start = time.perf_counter()
+    found = exact_top_k(queries, corpus, k, exclude=exclude)
+    seconds = time.perf_counter() - start
+    return {
+        "name": name,
+        "dimension": int(corpus.shape[1]),
+        f"recall@{k}": round(recall_at_k(truth, found), 4),
+        "index_mb": round(corpus.astype(np.float32).nbytes / 1e6, 2),
+        "query_ms": round(seconds / len(queries) * 1000, 4)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate dimensionality-reduced embeddings")
+    parser.add_argument("--artifact", type=str, help="Corpus artifact with full-dimension embeddings")
+    parser.add_argument("--stand-ins", action="store_true", help="Use a synthetic corpus instead of an artifact")
+    parser.add_argument("--chunks", type=int, default=5000, help="Synthetic corpus size")
+    parser.add_argument("--dimension", type=int, default=1024, help="Synthetic embedding dimension")
+    parser.add_argument("--methods", nargs="+", choices=["pca", "truncate"], default=["pca", "truncate"])
+    parser.add_argument("--dimensions", type=int, nargs="+", default=[128, 256, 512])
+    parser.add_argument("--k", type=int, default=10, help="Neighbours compared for recall@k")
+    parser.add_argument("--queries", type=int, default=500, help="Chunks sampled as queries")
+    parser.add_argument("--questions", type=str, help="JSONL of {\"question\": ...} to use as queries")
+    parser.add_argument("--fit-sample", type=int, default=50000, help="Embeddings PCA is fitted on")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", type=str, help="Directory to save the fitted projections in")
+    parser.add_argument("--output", type=str, default="bench_results/projection.json", help="Results JSON")
+    args = parser.parse_args()
+    if not args.artifact and not args.stand_ins:
+        parser.error("either --artifact or --stand-ins is required")
+
+    print("📐 NyayaGPT projection evaluation")
+    print("=" * 50)
+
+    corpus = load_corpus(args)
+    queries, exclude = load_queries(args, corpus)
+    print(f"📦 {len(corpus)} chunks of dimension {corpus.shape[1]}, {len(queries)} queries, k={args.k}")
+
+    truth = exact_top_k(queries, corpus, args.k, exclude=exclude)
+    rows = [evaluate("full", corpus, queries, exclude, truth, args.k)]
+
+    for method in args.methods:
+        for dimension in sorted(args.dimensions):
+            if dimension >= corpus.shape[1]:
+                continue
+            if method == "pca":
+                projection = PCAProjection.fit(corpus, dimension, sample_size=args.fit_sample, seed=args.seed)
+            else:
+                projection = TruncationProjection(corpus.shape[1], dimension)
+            row = evaluate(f"{method}-{dimension}", projection.apply(corpus), projection.apply(queries),
+                           exclude, truth, args.k)
+            if method == "pca":
+                row["explained_variance"] = round(projection.explained_variance_ratio, 4)
+            rows.append(row)
+            if args.save:
+                os.makedirs(args.save, exist_ok=True)
+                projection.save(os.path.join(args.save, f"{method}-{dimension}.npz"))
+
+    print(f"\n{'projection':<16}{'dim':>6}{f'recall@{args.k}':>12}{'index MB':>11}{'query ms':>11}")
+    for row in rows:
+        print(f"{row['name']:<16}{row['dimension']:>6}{row[f'recall@{args.k}']:>12.4f}"
+              f"{row['index_mb']:>11.2f}{row['query_ms']:>11.4f}")
+    if args.save:
+        print(f"\n💾 Projections saved to {args.save}; set EMBEDDING_PROJECTION to use one")
+
+    save_results(args.output, {"environment": environment_info(), "k": args.k, "queries": len(queries),
+                               "chunks": len(corpus), "results": rows})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Ingest every document under the data directory.
+
+Scans config.data_dir (or --data-dir) for supported files and
+``.docling.json`` documents, compares them with the ingestion manifest
+and only converts, chunks, embeds and uploads documents that were added
+or changed since the last run. Chunks of changed and deleted documents
+are removed from the backend. With --artifact the embedded corpus is
+also written as a corpus artifact that scripts/upload_corpus.py can load
+into any backend without re-embedding.
+
+Start scripts/embedding_daemon.py first to let the worker processes
+share one embedding model instead of loading one each.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+
+from utils.ingestion import (scan_corpus, plan_ingestion, create_storage, compatible_artifact, Manifest,
+                             CorpusIngestor)
+from config.config import config
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally ingest the document corpus")
+    parser.add_argument("--data-dir", type=str, default=config.data_dir, help="Directory of source documents")
+    parser.add_argument("--backend", choices=["pinecone", "chroma", "chroma_cloud"], default="pinecone",
+                        help="Storage backend to upload to")
+    parser.add_argument("--index", type=str, default="nyayagpt-constitution", help="Pinecone index name")
+    parser.add_argument("--collection", type=str, default=config.storage.collection_name,
+                        help="ChromaDB collection name")
+    parser.add_argument("--workers", type=int, default=config.ingestion.workers,
+                        help="Worker processes converting and embedding documents")
+    parser.add_argument("--manifest", type=str, default=config.ingestion.manifest_path,
+                        help="Manifest of ingested documents")
+    parser.add_argument("--artifact", type=str, default=config.ingestion.artifact_dir,
+                        help="Also write the embedded corpus to this corpus artifact directory")
+    parser.add_argument("--force", action="store_true", help="Re-ingest documents even if unchanged")
+    parser.add_argument("--dry-run", action="store_true", help="Show what would change and exit")
+    args = parser.parse_args()
+
+    print("📚 NyayaGPT corpus ingestion")
+    print("=" * 50)
+
+    files = scan_corpus(args.data_dir, config.supported_formats)
+    manifest = Manifest(args.manifest)
+    artifact_documents = None
+    if args.artifact:
+        artifact = compatible_artifact(args.artifact)
+        artifact_documents = set(artifact.documents) if artifact is not None else set()
+    index = args.index if args.backend == "pinecone" else args.collection
+    plan = plan_ingestion(files, manifest, args.backend, index=index, force=args.force,
+                          artifact_documents=artifact_documents)
+
+    print(f"📁 {len(files)} documents in {args.data_dir}")
+    print(f"   ➕ {len(plan.added)} added, ✏️  {len(plan.changed)} changed, "
+          f"🗑️  {len(plan.deleted)} deleted, {len(plan.unchanged)} unchanged")
+    for label, paths in (("+", plan.added), ("~", plan.changed), ("-", plan.deleted)):
+        for path in paths:
+            print(f"   {label} {path}")
+
+    if args.dry_run or not (plan.to_process or plan.deleted):
+        print("✅ Nothing to do" if not (plan.to_process or plan.deleted) else "💡 Dry run, nothing changed")
+        return
+
+    storage = create_storage(args.backend, args.index, args.collection)
+    ingestor = CorpusIngestor(storage, args.backend, manifest, config.ingestion.conversion_cache_dir,
+                              workers=args.workers, artifact_dir=args.artifact or None, index=index)
+
+    start = time.perf_counter()
+    summary = ingestor.run(files, plan)
+    elapsed = time.perf_counter() - start
+
+    print(f"\n✅ Ingested {summary['processed']} documents ({summary['chunks']} chunks), "
+          f"removed {summary['deleted']} in {elapsed:.1f}s")
+    print(f"💾 Manifest saved to {args.manifest}")
+    if args.artifact:
+        print(f"📦 Corpus artifact written to {args.artifact}")
+    if summary["failed"]:
+        print(f"❌ {len(summary['failed'])} documents failed; they will be retried on the next run:")
+        for path in summary["failed"]:
+            print(f"   {path}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,8 +5,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from docling_core.types.doc import DoclingDocument
-from utils import embed_document, chunk_document
+from utils import embed_chunks, chunk_json_file
 from config.config import config
 import pinecone
 from pinecone import Pinecone, ServerlessSpec
@@ -147,12 +146,11 @@ def main():
     # Process document
     print("\n--- Processing Document ---")
     source = os.path.join("data", "indian_constitution.docling.json")
-    docling_document = DoclingDocument.load_from_json(source)
     
-    chunks = chunk_document(docling_document)
+    chunks = chunk_json_file(source)
     print(f"Chunks: {len(chunks)}")
     
-    embedded_chunks = embed_document(docling_document)
+    embedded_chunks = embed_chunks(chunks)
     print(f"Embedded chunks: {len(embedded_chunks)}")
     
     # Upload to Pinecone
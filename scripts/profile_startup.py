@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""Profile import time and time to first prompt.
+
+Each target is imported in a fresh interpreter with ``-X importtime``
+(scripts are loaded without running their main()), and the slowest
+parts of the import tree are reported together with which heavy
+libraries were pulled in. For main.py the time until the chat prompt
+is shown is measured as well. The command exits non-zero when a target
+exceeds its budget, so it can guard startup time in CI.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import glob
+import selectors
+import subprocess
+import time
+from typing import List, Dict, Any, Optional
+
+from utils.benchmarking import save_results
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_PACKAGES = [
+    "torch", "transformers", "sentence_transformers", "docling", "chromadb",
+    "pinecone", "langgraph", "langchain_google_genai"
+]
+PROMPT_MARKER = "Your question:"
+
+IMPORT_SNIPPET = """
+import runpy, sys, time
+start = time.perf_counter()
+sys.argv = [{path!r}]
+runpy.run_path({path!r}, run_name="__profile__")
+print("IMPORT_SECONDS", time.perf_counter() - start)
+"""
+
+
+class ImportNode:
+    """One module in the -X importtime tree."""
+
+    def __init__(self, name: str, self_us: int, cumulative_us: int):
+        self.name = name
+        self.self_us = self_us
+        self.cumulative_us = cumulative_us
+        self.children: List["ImportNode"] = []
+
+
+def parse_importtime(stderr: str) -> List[ImportNode]:
+    """Build the import tree from -X importtime output.
+
+    Modules are printed after their own imports, with one more level of
+    indentation per level of nesting.
+    """
+    pending: Dict[int, List[ImportNode]] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_part, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        self_us = self_part.strip()
+        level = (len(name) - len(name.lstrip())) // 2
+        node = ImportNode(name.strip(), int(self_us), int(cumulative_us))
+        node.children = pending.pop(level + 1, [])
+        pending.setdefault(level, []).append(node)
+    return pending.get(min(pending), []) if pending else []
+
+
+def walk(nodes: List[ImportNode]):
+    for node in nodes:
+        yield node
+        yield from walk(node.children)
+
+
+def format_tree(nodes: List[ImportNode], depth: int, min_ms: float, indent: int = 0) -> List[str]:
+    """Render the slowest branches of the import tree."""
+    lines = []
+    for node in sorted(nodes, key=lambda n: -n.cumulative_us):
+        if node.cumulative_us / 1000 < min_ms:
+            continue
+        lines.append(f"{'  ' * indent}{node.name:<{50 - 2 * indent}} {node.cumulative_us / 1000:9.1f} ms")
+        if indent + 1 < depth:
+            lines.extend(format_tree(node.children, depth, min_ms, indent + 1))
+    return lines
+
+
+def profile_import(path: str) -> Dict[str, Any]:
+    """Import a target in a fresh interpreter and parse its import tree."""
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", IMPORT_SNIPPET.format(path=path)],
+        cwd=PROJECT_ROOT, capture_output=True, text=True
+    )
+    wall_seconds = time.perf_counter() - start
+
+    tree = parse_importtime(process.stderr)
+    modules = {node.name for node in walk(tree)}
+    import_seconds = None
+    for line in process.stdout.splitlines():
+        if line.startswith("IMPORT_SECONDS"):
+            import_seconds = float(line.split()[1])
+
+    errors = [line for line in process.stderr.splitlines() if not line.startswith("import time:")]
+    return {
+        "ok": process.returncode == 0,
+        "import_ms": round(import_seconds * 1000, 1) if import_seconds is not None else None,
+        "interpreter_ms": round(wall_seconds * 1000, 1),
+        "heavy_packages": [package for package in HEAVY_PACKAGES if package in modules],
+        "error": errors[-1] if process.returncode != 0 and errors else None,
+        "tree": tree
+    }
+
+
+def time_to_first_prompt(path: str, timeout: float) -> Optional[float]:
+    """Start an interactive script and time how long until its prompt appears."""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-u", path], cwd=PROJECT_ROOT,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
+    selector = selectors.DefaultSelector()
+    selector.register(process.stdout, selectors.EVENT_READ)
+    output = b""
+    try:
+        while time.perf_counter() - start < timeout:
+            if not selector.select(timeout=0.05):
+                if process.poll() is not None:
+                    return None
+                continue
+            data = os.read(process.stdout.fileno(), 4096)
+            if not data:
+                return None
+            output += data
+            if PROMPT_MARKER.encode('utf-8') in output:
+                return time.perf_counter() - start
+        return None
+    finally:
+        process.kill()
+        process.wait()
+
+
+def default_targets() -> List[str]:
+    scripts = sorted(glob.glob(os.path.join(PROJECT_ROOT, "scripts", "*.py")))
+    return ["main.py"] + [os.path.relpath(path, PROJECT_ROOT) for path in scripts
+                          if os.path.basename(path) != os.path.basename(__file__)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile import time and time to first prompt")
+    parser.add_argument("targets", nargs="*", help="Scripts to profile (default: main.py and scripts/*.py)")
+    parser.add_argument("--budget-ms", type=float, default=1000.0, help="Import time budget per target")
+    parser.add_argument("--prompt-budget-ms", type=float, default=None,
+                        help="Budget for main.py's time to first prompt (not enforced by default)")
+    parser.add_argument("--prompt-timeout", type=float, default=60.0, help="Seconds to wait for the prompt")
+    parser.add_argument("--depth", type=int, default=3, help="Import tree depth to show")
+    parser.add_argument("--min-ms", type=float, default=20.0, help="Hide modules faster than this")
+    parser.add_argument("--output", type=str, default=None, help="Optional JSON output path")
+    args = parser.parse_args()
+
+    print("⏱️  NyayaGPT startup profile")
+    print("=" * 50)
+
+    failures = []
+    results = {}
+    for target in args.targets or default_targets():
+        profile = profile_import(target)
+        tree = profile.pop("tree")
+        results[target] = profile
+
+        if not profile["ok"]:
+            print(f"\n❌ {target}: import failed ({profile['error']})")
+            failures.append(target)
+            continue
+
+        over = profile["import_ms"] > args.budget_ms
+        status = "❌" if over else "✅"
+        print(f"\n{status} {target}: {profile['import_ms']:.1f} ms import "
+              f"({profile['interpreter_ms']:.1f} ms with interpreter start)")
+        print(f"   heavy packages: {', '.join(profile['heavy_packages']) or 'none'}")
+        for line in format_tree(tree, args.depth, args.min_ms):
+            print(f"   {line}")
+        if over:
+            failures.append(target)
+
+    if "main.py" in (args.targets or default_targets()):
+        seconds = time_to_first_prompt("main.py", args.prompt_timeout)
+        if seconds is None:
+            print("\n⚠️  main.py did not show its prompt (check API keys and network)")
+        else:
+            results["main.py"]["first_prompt_ms"] = round(seconds * 1000, 1)
+            print(f"\n💬 main.py time to first prompt: {seconds * 1000:.1f} ms")
+            if args.prompt_budget_ms is not None and seconds * 1000 > args.prompt_budget_ms:
+                failures.append("main.py (first prompt)")
+
+    if args.output:
+        save_results(args.output, {"benchmark": "startup", "budget_ms": args.budget_ms, "targets": results})
+
+    if failures:
+        print(f"\n❌ Over budget or failed: {', '.join(failures)}")
+        sys.exit(1)
+    print(f"\n✅ All targets within {args.budget_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Serve NyayaRAGAgent over HTTP.
+
+By default the agent uses Gemini and Pinecone. With --stand-ins it runs
+fully offline against the fake LLM and an in-memory vector store, which
+is how the service can be exercised and load tested locally.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+
+from utils.rag_agent import NyayaRAGAgent
+from utils.server import NyayaHTTPServer
+from utils.stand_ins import stand_in_agent
+from config.config import config
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve NyayaGPT over HTTP")
+    parser.add_argument("--host", type=str, default=config.server.host, help="Address to listen on")
+    parser.add_argument("--port", type=int, default=config.server.port, help="Port to listen on")
+    parser.add_argument("--index", type=str, default="nyayagpt-constitution", help="Pinecone index name")
+    parser.add_argument("--max-in-flight", type=int, default=config.server.max_in_flight,
+                        help="Questions answered at once")
+    parser.add_argument("--max-queue", type=int, default=config.server.max_queue,
+                        help="Requests allowed to wait for a slot before 503s are returned")
+    parser.add_argument("--queue-timeout-ms", type=int, default=config.server.queue_timeout_ms,
+                        help="How long a queued request may wait")
+    parser.add_argument("--stand-ins", action="store_true", help="Use the offline fake LLM and in-memory store")
+    parser.add_argument("--chunks", type=int, default=2000, help="Stand-in corpus size")
+    parser.add_argument("--dimension", type=int, default=1024, help="Stand-in embedding dimension")
+    parser.add_argument("--query-latency", type=float, default=0.02, help="Stand-in vector DB latency (s)")
+    parser.add_argument("--first-token-latency", type=float, default=0.3, help="Fake LLM first token latency (s)")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0, help="Fake LLM token rate")
+    args = parser.parse_args()
+
+    print("🌐 NyayaGPT HTTP service")
+    print("=" * 50)
+
+    if args.stand_ins:
+        agent = stand_in_agent(args.chunks, args.dimension, args.query_latency,
+                               args.first_token_latency, args.tokens_per_second)
+    else:
+        agent = NyayaRAGAgent(index_name=args.index)
+    server = NyayaHTTPServer(
+        (args.host, args.port),
+        agent,
+        max_in_flight=args.max_in_flight,
+        max_queue=args.max_queue,
+        queue_timeout=args.queue_timeout_ms / 1000
+    )
+
+    mode = "offline stand-ins" if args.stand_ins else f"Pinecone index '{args.index}'"
+    print(f"✅ Serving {mode} on http://{args.host}:{args.port}")
+    print(f"💡 {args.max_in_flight} in flight, up to {args.max_queue} queued; POST /ask, /chat or /stream")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Shutting down")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
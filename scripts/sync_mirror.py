@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Sync the local mirror of the remote vector index.
+
+Runs one delta sync of a mirror directory from Pinecone or ChromaDB
+Cloud, or keeps syncing every ``--interval`` seconds, and prints the
+mirror's watermark and staleness. Point MIRROR_DIR at the same
+directory to have the agent answer queries from it. Syncs from this
+script and from the agent take turns through the mirror's lock file,
+and ``--status`` only reads the directory.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import time
+
+from utils.mirror import LocalMirror
+from config.config import config
+
+
+def remote_storage(args):
+    if args.backend == "pinecone":
+        from utils.pinecone_storage import PineconeStorage
+        return PineconeStorage(index_name=args.index)
+    from utils.cloud_storage import CloudChromaStorage
+    return CloudChromaStorage(collection_name=args.collection)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync the local mirror of the remote vector index")
+    parser.add_argument("--backend", choices=["pinecone", "chroma_cloud"], default="pinecone")
+    parser.add_argument("--index", type=str, default="nyayagpt", help="Pinecone index name")
+    parser.add_argument("--collection", type=str, default="documents", help="ChromaDB Cloud collection name")
+    parser.add_argument("--mirror", type=str, default=config.mirror.directory or ".cache/mirror",
+                        help="Mirror directory (default: MIRROR_DIR)")
+    parser.add_argument("--interval", type=float, help="Keep syncing every this many seconds")
+    parser.add_argument("--status", action="store_true", help="Only print the mirror status")
+    args = parser.parse_args()
+
+    mirror = LocalMirror(args.mirror)
+    if args.status:
+        print(json.dumps(mirror.status(), indent=2))
+        return
+
+    remote = remote_storage(args)
+    print(f"🔄 Syncing {args.mirror} from {args.backend}")
+    while True:
+        try:
+            summary = mirror.sync(remote)
+            print(f"✅ {summary['added']} added, {summary['updated']} updated, {summary['deleted']} deleted "
+                  f"in {summary['seconds']}s ({len(mirror)} rows)")
+        except Exception as e:
+            print(f"❌ Sync failed: {e}")
+            if not args.interval:
+                sys.exit(1)
+        if not args.interval:
+            break
+        time.sleep(args.interval)
+
+    status = mirror.status()
+    print(f"📌 Watermark: {status['watermark']}, synced at {status['synced_at']}")
+
+
+if __name__ == "__main__":
+    main()
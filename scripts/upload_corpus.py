@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Load a corpus artifact into a storage backend, or search it locally.
+
+The artifact written by scripts/ingest_corpus.py --artifact holds every
+chunk's text, metadata and embedding, so deploying to a new Pinecone
+index or Chroma collection, or migrating between them, is an upload
+without re-embedding. With --search the artifact is queried directly
+with exact search over its memory-mapped embeddings.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+
+from utils.corpus_artifact import CorpusArtifact, upload_artifact
+from utils.ingestion import create_storage
+from config.config import config
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upload or search a corpus artifact")
+    parser.add_argument("artifact", type=str, help="Corpus artifact directory")
+    parser.add_argument("--backend", choices=["pinecone", "chroma", "chroma_cloud"], default="pinecone",
+                        help="Storage backend to upload to")
+    parser.add_argument("--index", type=str, default="nyayagpt-constitution", help="Pinecone index name")
+    parser.add_argument("--collection", type=str, default=config.storage.collection_name,
+                        help="ChromaDB collection name")
+    parser.add_argument("--documents", type=str, nargs="*", help="Only upload these documents")
+    parser.add_argument("--search", type=str, help="Search the artifact locally instead of uploading")
+    parser.add_argument("--top-k", type=int, default=5, help="Results to show with --search")
+    args = parser.parse_args()
+
+    artifact = CorpusArtifact(args.artifact)
+    info = artifact.get_index_info()
+    print(f"📦 {args.artifact}: {info['total_vector_count']} chunks from {info['documents']} documents "
+          f"({info['dimension']}-d {info['dtype']}, built {info['created_at']})")
+
+    if args.search:
+        start = time.perf_counter()
+        results = artifact.search(args.search, n_results=args.top_k)
+        print(f"🔍 {len(results)} results in {(time.perf_counter() - start) * 1000:.1f} ms")
+        for i, result in enumerate(results, 1):
+            print(f"\n{i}. {result['id']} (distance {result['distance']:.4f})")
+            print(f"   {result['text'][:150]}...")
+        return
+
+    unknown = [name for name in args.documents or [] if name not in artifact.documents]
+    if unknown:
+        print(f"❌ Not in the artifact: {', '.join(unknown)}")
+        sys.exit(1)
+
+    storage = create_storage(args.backend, args.index, args.collection)
+    start = time.perf_counter()
+    uploaded = upload_artifact(artifact, storage, documents=args.documents)
+    print(f"✅ Uploaded {uploaded} chunks to {args.backend} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
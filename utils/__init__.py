@@ -1,14 +1,46 @@
-"""Utils package for NyayaGPT document processing."""
+"""Utils package for NyayaGPT document processing.
 
-from .chunker import chunk_document, embedding_model, chunker, EMBEDDING_MODEL
-from .embedder import embed_document
-from .storage import ChromaStorage
+Exports are resolved on first access, so ``import utils`` (and importing
+any single submodule) does not load chromadb, docling or the embedding
+model unless they are actually used. ``utils.chunker`` is the
+submodule; use ``get_chunker()`` for the chunker itself.
+"""
+
+import importlib
+
+_EXPORTS = {
+    "chunk_document": ".chunker",
+    "embedding_model": ".chunker",
+    "get_chunker": ".chunker",
+    "get_embedding_model": ".chunker",
+    "EMBEDDING_MODEL": ".chunker",
+    "embed_document": ".embedder",
+    "embed_chunks": ".embedder",
+    "chunk_file": ".streaming_loader",
+    "chunk_json_file": ".streaming_loader",
+    "ChromaStorage": ".storage",
+}
 
 __all__ = [
     "chunk_document",
-    "embedding_model", 
-    "chunker",
+    "embedding_model",
+    "get_chunker",
+    "get_embedding_model",
     "EMBEDDING_MODEL",
     "embed_document",
+    "embed_chunks",
+    "chunk_file",
+    "chunk_json_file",
     "ChromaStorage",
 ]
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        module = importlib.import_module(_EXPORTS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
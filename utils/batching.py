@@ -0,0 +1,111 @@
+"""Micro-batching of work submitted from many threads.
+
+Callers submit a list of items and get a future back. A worker thread
+collects the requests that arrive within a short window, up to a
+maximum number of items, processes them in one call and resolves each
+caller's future with its slice of the results. Batch sizes and the
+time requests spend queued are recorded per batcher name.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Any, Sequence
+from .metrics import BATCH_SIZE, BATCH_QUEUE_DELAY
+
+
+class _Request:
+    __slots__ = ("items", "future", "enqueued")
+
+    def __init__(self, items: List[Any]):
+        self.items = items
+        self.future = Future()
+        self.enqueued = time.perf_counter()
+
+
+class MicroBatcher:
+    """Batch items from concurrent callers into single process() calls."""
+
+    def __init__(self, process: Callable[[List[Any]], Sequence[Any]], max_batch_size: int = 64,
+                 max_wait_seconds: float = 0.005, name: str = "micro-batcher"):
+        """Initialize the batcher and start its worker thread.
+
+        Args:
+            process: Function mapping a list of items to one result per item
+            max_batch_size: Maximum number of items per process() call
+            max_wait_seconds: How long the first request of a batch waits for more
+            name: Name of the worker thread and of the batcher in metrics
+        """
+        self.process = process
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self._batch_size = BATCH_SIZE.labels(name)
+        self._queue_delay = BATCH_QUEUE_DELAY.labels(name)
+        self._queue = queue.Queue()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+
+    def submit(self, items: List[Any]) -> Future:
+        """Queue items; the future resolves to their results in order."""
+        if self._closed:
+            raise RuntimeError("MicroBatcher is closed")
+        request = _Request(list(items))
+        self._queue.put(request)
+        return request.future
+
+    def __call__(self, items: List[Any]) -> List[Any]:
+        """Submit items and wait for their results."""
+        return self.submit(items).result()
+
+    def close(self) -> None:
+        """Stop the worker after the queued requests are processed."""
+        self._closed = True
+        self._queue.put(None)
+        self._worker.join()
+
+    def _collect(self, first: _Request) -> List[_Request]:
+        """Gather requests until the batch is full or the window closes."""
+        batch = [first]
+        size = len(first.items)
+        deadline = time.perf_counter() + self.max_wait_seconds
+        while size < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                # Put the close marker back for the main loop
+                self._queue.put(None)
+                break
+            batch.append(request)
+            size += len(request.items)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = self._collect(first)
+
+            started = time.perf_counter()
+            items = [item for request in batch for item in request.items]
+            self._batch_size.observe(len(items))
+            for request in batch:
+                self._queue_delay.observe(started - request.enqueued)
+            try:
+                results = self.process(items)
+            except Exception as e:
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+
+            offset = 0
+            for request in batch:
+                request.future.set_result(results[offset:offset + len(request.items)])
+                offset += len(request.items)
@@ -0,0 +1,109 @@
+"""Shared helpers for the benchmark scripts."""
+
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+from datetime import datetime
+from typing import List, Dict, Any
+import numpy as np
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Summarize samples (in seconds) as milliseconds percentiles."""
+    if not samples:
+        return {"count": 0}
+    values = np.asarray(samples, dtype=np.float64) * 1000
+    return {
+        "count": int(values.size),
+        "mean_ms": round(float(values.mean()), 3),
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+        "max_ms": round(float(values.max()), 3)
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in megabytes."""
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return usage / (1024 * 1024) if sys.platform == "darwin" else usage / 1024
+
+
+def environment_info() -> Dict[str, Any]:
+    """Describe the code version and machine a benchmark ran on."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=root, capture_output=True, text=True, timeout=10
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ""
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count()
+    }
+
+
+def save_results(path: str, results: Dict[str, Any]) -> None:
+    """Write benchmark results as JSON."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"💾 Results saved to {path}")
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], prefix: str = "") -> List[str]:
+    """Compare two result trees and describe changes of every *_ms and */sec value."""
+    lines = []
+    for key, value in current.items():
+        name = f"{prefix}{key}"
+        old = baseline.get(key) if isinstance(baseline, dict) else None
+        if isinstance(value, dict):
+            lines.extend(compare_results(old or {}, value, prefix=f"{name}."))
+        elif isinstance(value, (int, float)) and isinstance(old, (int, float)) and old:
+            if key.endswith("_ms") or key.endswith("per_sec"):
+                change = (value - old) / old * 100
+                lines.append(f"{name}: {old:.3f} -> {value:.3f} ({change:+.1f}%)")
+    return lines
+
+
+def exact_top_k(queries: np.ndarray, matrix: np.ndarray, k: int, exclude: np.ndarray = None,
+                block_size: int = 256) -> np.ndarray:
+    """Indices of the k highest inner products per query, best first.
+
+    Args:
+        queries: Query vectors, shape (q, d)
+        matrix: Corpus vectors, shape (n, d)
+        k: Neighbours per query
+        exclude: Optional corpus row per query to leave out (the query itself)
+        block_size: Queries scored at once, bounding memory to block_size * n
+    """
+    k = min(k, len(matrix))
+    results = np.zeros((len(queries), k), dtype=np.int64)
+    for start in range(0, len(queries), block_size):
+        scores = np.asarray(queries[start:start + block_size], dtype=np.float32) @ matrix.T
+        if exclude is not None:
+            scores[np.arange(len(scores)), exclude[start:start + block_size]] = -np.inf
+        top = (np.argpartition(-scores, k, axis=1)[:, :k] if k < scores.shape[1]
+               else np.tile(np.arange(scores.shape[1]), (len(scores), 1)))
+        order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+        results[start:start + len(scores)] = np.take_along_axis(top, order, axis=1)
+    return results
+
+
+def recall_at_k(truth: np.ndarray, found: np.ndarray) -> float:
+    """Mean share of the true top-k neighbours that were found."""
+    k = truth.shape[1]
+    hits = [len(set(t.tolist()) & set(f[:k].tolist())) for t, f in zip(truth, found)]
+    return float(np.mean(hits)) / k
@@ -2,6 +2,7 @@
 
 import os
 import sys
+import uuid
 from typing import Optional
 from .rag_agent import NyayaRAGAgent
 
@@ -16,6 +17,7 @@ class NyayaChatInterface:
         """Initialize the chat interface."""
         try:
             self.agent = NyayaRAGAgent()
+            self.session_id = uuid.uuid4().hex
             print("✅ NyayaGPT initialized successfully!")
         except Exception as e:
             print(f"❌ Error initializing NyayaGPT: {e}")
@@ -34,13 +36,20 @@ class NyayaChatInterface:
                     print("\n👋 Thank you for using NyayaGPT! Goodbye!")
                     break
                 
+                # Start a fresh conversation
+                if question.lower() in ['new', 'reset']:
+                    self.agent.reset_session(self.session_id)
+                    self.session_id = uuid.uuid4().hex
+                    print("\n🆕 Started a new conversation")
+                    continue
+                
                 # Skip empty questions
                 if not question:
                     continue
                 
-                # Get response
+                # Get response, keeping the conversation history
                 print("\n🤖 NyayaGPT is thinking...")
-                response = self.agent.ask(question)
+                response = self.agent.ask(question, session_id=self.session_id)
                 
                 # Display response
                 print(f"\n📖 Answer:\n{response}")
@@ -0,0 +1,101 @@
+"""On-disk cache of chunking results.
+
+Chunking tokenizes the whole document, which dominates ingest time for
+documents that have not changed. Chunk records are stored per document
+under a key derived from the docling document's content hash and the
+chunker settings, so an unchanged document is "chunked" by reading one
+small file, and any change to the document or the settings misses.
+
+Each entry is a gzip-compressed JSON object holding one column per
+ChunkRecord field.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import dataclass, field
+from typing import List, Optional
+from .metrics import CACHE_LOOKUPS
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+# Bump when the chunk record layout or chunking logic changes
+CACHE_FORMAT_VERSION = 1
+
+
+@dataclass
+class ChunkRecord:
+    """A chunk with its contextualized text and provenance."""
+    text: str
+    headings: List[str] = field(default_factory=list)
+    doc_item_refs: List[str] = field(default_factory=list)
+    token_count: int = 0
+    chunk_type: str = "DocChunk"
+
+
+def document_hash(docling_document) -> str:
+    """Content hash of a docling document."""
+    data = json.dumps(docling_document.export_to_dict(), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def cache_key(doc_hash: str, **settings) -> str:
+    """Cache key for a document hash and chunker settings."""
+    settings = json.dumps({**settings, "format": CACHE_FORMAT_VERSION}, sort_keys=True)
+    return hashlib.sha256(f"{doc_hash}:{settings}".encode('utf-8')).hexdigest()
+
+
+class ChunkCache:
+    """Directory of cached chunk records, one file per key."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json.gz")
+
+    def get(self, key: str) -> Optional[List[ChunkRecord]]:
+        """Load cached chunk records, or None on a miss."""
+        path = self._path(key)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                columns = json.load(f)
+        except FileNotFoundError:
+            CACHE_LOOKUPS.labels("chunks", "miss").inc()
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable chunk cache entry {path}: {e}")
+            CACHE_LOOKUPS.labels("chunks", "miss").inc()
+            return None
+
+        CACHE_LOOKUPS.labels("chunks", "hit").inc()
+        return [
+            ChunkRecord(text, headings, refs, tokens, chunk_type)
+            for text, headings, refs, tokens, chunk_type in zip(
+                columns["text"], columns["headings"], columns["doc_item_refs"],
+                columns["token_count"], columns["chunk_type"]
+            )
+        ]
+
+    def put(self, key: str, records: List[ChunkRecord]) -> None:
+        """Store chunk records, replacing the entry atomically."""
+        columns = {
+            "text": [record.text for record in records],
+            "headings": [record.headings for record in records],
+            "doc_item_refs": [record.doc_item_refs for record in records],
+            "token_count": [record.token_count for record in records],
+            "chunk_type": [record.chunk_type for record in records],
+        }
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6) as f:
+                f.write(json.dumps(columns, separators=(',', ':')).encode('utf-8'))
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
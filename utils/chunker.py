@@ -1,39 +1,139 @@
-from docling_core.types.doc import DoclingDocument
-from docling.chunking import HybridChunker
-from sentence_transformers import SentenceTransformer
-from transformers import AutoTokenizer
+"""Document chunking and the shared embedding model.
+
+The tokenizer, chunker and embedding model are loaded on first use, so
+importing this module does not pull in docling, transformers or
+sentence_transformers. ``tokenizer``, ``chunker`` and
+``embedding_model`` are still available as module attributes and are
+resolved lazily. When the embedding daemon is running, the embedding
+model is a client for it rather than a local copy.
+"""
+
+import threading
+from typing import List
+from .chunk_cache import ChunkRecord, ChunkCache, cache_key, document_hash
+from config.config import config
 
 
 # Initialize tokenizer for chunking
 EMBEDDING_MODEL = 'BAAI/bge-large-en-v1.5'
 MAX_TOKENS = 1000
-tokenizer = AutoTokenizer.from_pretrained(EMBEDDING_MODEL)
 
-tokenizer.model_max_length = MAX_TOKENS
+_tokenizer = None
+_chunker = None
+_embedding_model = None
+_load_lock = threading.RLock()
+
+
+def get_tokenizer():
+    """Load the chunking tokenizer on first use."""
+    global _tokenizer
+    with _load_lock:
+        if _tokenizer is None:
+            from transformers import AutoTokenizer
+            tokenizer = AutoTokenizer.from_pretrained(EMBEDDING_MODEL)
+            tokenizer.model_max_length = MAX_TOKENS
+            _tokenizer = tokenizer
+        return _tokenizer
+
+
+def set_tokenizer(tokenizer) -> None:
+    """Use a given tokenizer for chunking and token counting, e.g. an offline stand-in."""
+    global _tokenizer, _chunker
+    with _load_lock:
+        _tokenizer = tokenizer
+        _chunker = None
+
+
+def get_chunker():
+    """Create the hybrid chunker on first use."""
+    global _chunker
+    with _load_lock:
+        if _chunker is None:
+            from docling.chunking import HybridChunker
+            _chunker = HybridChunker(
+                tokenizer=get_tokenizer(),
+                max_tokens=MAX_TOKENS,
+                merge_peers=True,
+            )
+        return _chunker
+
+
+def load_local_embedding_model():
+    """Load the embedding model into this process."""
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(EMBEDDING_MODEL)
 
-chunker = HybridChunker(
-    tokenizer=tokenizer,
-    max_tokens=MAX_TOKENS,
-    merge_peers=True,
-)
 
-# Initialize embedding model for generating embeddings
-embedding_model = SentenceTransformer(EMBEDDING_MODEL)
+def get_embedding_model():
+    """Get the embedding model for generating embeddings on first use.
 
+    If the embedding daemon (scripts/embedding_daemon.py) is listening on
+    the configured socket, a client for it is returned instead of loading
+    the model in this process. When an embedding projection is
+    configured, the model's output is projected.
+    """
+    global _embedding_model
+    with _load_lock:
+        if _embedding_model is None:
+            from .embedding_server import connect
+            from .projection import project_model
+            model = (connect(config.embedding.daemon_socket, fallback=load_local_embedding_model)
+                     or load_local_embedding_model())
+            _embedding_model = project_model(model)
+        return _embedding_model
 
-def chunk_document(docling_document: DoclingDocument):
-    """Chunk a document and return chunks with contextualized text."""
+
+_LAZY_ATTRIBUTES = {
+    "tokenizer": get_tokenizer,
+    "chunker": get_chunker,
+    "embedding_model": get_embedding_model,
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _chunk_uncached(docling_document) -> List[ChunkRecord]:
+    """Run the hybrid chunker and contextualize every chunk."""
+    from .context_builder import count_tokens
+    chunker = get_chunker()
     
-    chunk_iter = chunker.chunk(dl_doc=docling_document)
     chunks = []
-    
-    for chunk in chunk_iter:
+    for chunk in chunker.chunk(dl_doc=docling_document):
         # Use contextualize() method as recommended in docling docs
         contextualized_text = chunker.contextualize(chunk=chunk)
-        # Create a new chunk object with contextualized text
-        chunk.text = contextualized_text
-        chunks.append(chunk)
+        chunks.append(ChunkRecord(
+            text=contextualized_text,
+            headings=list(chunk.meta.headings or []),
+            doc_item_refs=[item.self_ref for item in chunk.meta.doc_items],
+            token_count=count_tokens(contextualized_text),
+            chunk_type=type(chunk).__name__
+        ))
     
     return chunks
 
 
+def chunk_document(docling_document, use_cache: bool = None) -> List[ChunkRecord]:
+    """Chunk a document and return chunks with contextualized text.
+    
+    Returns ChunkRecords (text, headings, doc_item_refs, token_count,
+    chunk_type) rather than docling chunk objects, so they can be cached.
+    Results are cached on disk by document content and chunker settings,
+    so re-chunking an unchanged document only reads the cache.
+    """
+    if use_cache is None:
+        use_cache = config.chunking.cache_enabled
+    if not use_cache:
+        return _chunk_uncached(docling_document)
+    
+    cache = ChunkCache(config.chunking.cache_dir)
+    key = cache_key(document_hash(docling_document), model=EMBEDDING_MODEL,
+                    max_tokens=MAX_TOKENS, merge_peers=True)
+    chunks = cache.get(key)
+    if chunks is None:
+        chunks = _chunk_uncached(docling_document)
+        cache.put(key, chunks)
+    return chunks
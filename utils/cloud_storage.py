@@ -2,36 +2,47 @@
 
 import chromadb
 from chromadb.config import Settings
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator
+import time
 import numpy as np
 from datetime import datetime
 import os
 from dotenv import load_dotenv
 from .embedder import ChunkWithEmbedding
-from .chunker import embedding_model
+from .query_encoder import get_query_encoder
+from .tracing import start_span, traced, current_span
+from .metrics import timed_backend_call, record_upload
+from .filters import F, FilterSpec, combine, to_where
+from .validators import check_upload
+from .logger import get_logger
 
 # Load environment variables
 load_dotenv()
 
+logger = get_logger(__name__)
+
 
 class CloudChromaStorage:
     """ChromaDB cloud storage for document chunks and embeddings."""
     
-    def __init__(self, collection_name: str = "documents", api_key: str = None, tenant: str = None, database: str = None):
+    def __init__(self, collection_name: str = "documents", api_key: str = None, tenant: str = None, database: str = None,
+                 client: Any = None):
         """Initialize ChromaDB cloud client and collection."""
-        # Get credentials from environment or parameters
-        api_key = api_key or os.getenv('CHROMA_API_KEY')
-        tenant = tenant or os.getenv('CHROMA_TENANT')
-        database = database or os.getenv('CHROMA_DATABASE')
-        
-        if not all([api_key, tenant, database]):
-            raise ValueError("Missing ChromaDB Cloud credentials. Please set CHROMA_API_KEY, CHROMA_TENANT, and CHROMA_DATABASE in your .env file")
-        
-        self.client = chromadb.CloudClient(
-            api_key=api_key,
-            tenant=tenant,
-            database=database
-        )
+        if client is None:
+            # Get credentials from environment or parameters
+            api_key = api_key or os.getenv('CHROMA_API_KEY')
+            tenant = tenant or os.getenv('CHROMA_TENANT')
+            database = database or os.getenv('CHROMA_DATABASE')
+            
+            if not all([api_key, tenant, database]):
+                raise ValueError("Missing ChromaDB Cloud credentials. Please set CHROMA_API_KEY, CHROMA_TENANT, and CHROMA_DATABASE in your .env file")
+            
+            client = chromadb.CloudClient(
+                api_key=api_key,
+                tenant=tenant,
+                database=database
+            )
+        self.client = client
         
         # Get or create collection
         self.collection = self.client.get_or_create_collection(
@@ -39,16 +50,17 @@ class CloudChromaStorage:
             metadata={"hnsw:space": "cosine"}
         )
     
+    @traced("storage.save_chunks")
+    @timed_backend_call("chroma_cloud", "save_chunks")
     def save_chunks(self, chunks: List[ChunkWithEmbedding], document_name: str = "document") -> None:
         """Save embedded chunks to ChromaDB cloud."""
         if not chunks:
-            print("No chunks to save!")
+            logger.warning("No chunks to save!")
             return
         
         # Prepare data for ChromaDB
         ids = [f"{document_name}_{i}" for i in range(len(chunks))]
         texts = [chunk.text for chunk in chunks]
-        embeddings = [chunk.embedding.tolist() for chunk in chunks]
         metadatas = []
         
         for i, chunk in enumerate(chunks):
@@ -58,7 +70,7 @@ class CloudChromaStorage:
                 "text_length": len(chunk.text),
                 "created_at": datetime.now().isoformat(),
                 "embedding_model": "bge-large-en-v1.5",
-                "embedding_dim": 1024
+                "embedding_dim": len(chunk.embedding)
             }
             if chunk.metadata:
                 for key, value in chunk.metadata.items():
@@ -66,22 +78,63 @@ class CloudChromaStorage:
                         metadata[key] = value
             metadatas.append(metadata)
         
+        # Reject malformed batches before anything is sent
+        check_upload("chroma_cloud", ids, texts, [chunk.embedding for chunk in chunks], metadatas)
+        embeddings = [chunk.embedding.tolist() for chunk in chunks]
+        
+        span = current_span()
+        if span.recording:
+            span.set_attributes(
+                backend="chroma_cloud",
+                chunks=len(chunks),
+                bytes=sum(len(text.encode('utf-8')) for text in texts)
+            )
+        
         # Add to collection
+        start = time.perf_counter()
         self.collection.add(
             ids=ids,
             documents=texts,
             embeddings=embeddings,
             metadatas=metadatas
         )
+        record_upload("chroma_cloud", len(ids), time.perf_counter() - start)
         
-        print(f"Saved {len(chunks)} chunks to ChromaDB cloud collection '{self.collection.name}'")
+        logger.info(f"Saved {len(chunks)} chunks to ChromaDB cloud collection '{self.collection.name}'",
+                    extra={"chunks": len(chunks), "collection": self.collection.name})
     
-    def search(self, query: str, n_results: int = 5, document_name: str = None) -> List[Dict[str, Any]]:
+    @traced("storage.delete_chunks")
+    @timed_backend_call("chroma_cloud", "delete_chunks")
+    def delete_chunks(self, ids: List[str]) -> None:
+        """Delete chunks from ChromaDB cloud by ID."""
+        if not ids:
+            return
+        current_span().set_attributes(backend="chroma_cloud", chunks=len(ids))
+        self.collection.delete(ids=ids)
+        logger.info(f"Deleted {len(ids)} chunks from collection '{self.collection.name}'",
+                    extra={"chunks": len(ids), "collection": self.collection.name})
+    
+    def search(self, query: str, n_results: int = 5, document_name: str = None,
+               filters: FilterSpec = None) -> List[Dict[str, Any]]:
         """Search for similar chunks using text query."""
-        where_filter = {"document_name": document_name} if document_name else None
-        
         # Generate embedding for the query using the same model
-        query_embedding = embedding_model.encode([query])[0]
+        with start_span("embedding.encode", texts=1):
+            query_embedding = get_query_encoder().encode([query])[0]
+        
+        return self.search_by_embedding(query_embedding, n_results=n_results, document_name=document_name,
+                                        filters=filters)
+    
+    @traced("storage.query")
+    @timed_backend_call("chroma_cloud", "query")
+    def search_by_embedding(self, query_embedding: np.ndarray, n_results: int = 5, document_name: str = None,
+                            filters: FilterSpec = None) -> List[Dict[str, Any]]:
+        """Search for similar chunks using embedding vector.
+        
+        ``filters`` (a utils.filters expression or filter dictionary) is
+        applied by the backend before similarity scoring.
+        """
+        current_span().set_attributes(backend="chroma_cloud", n_results=n_results)
+        where_filter = to_where(combine(F("document_name") == document_name if document_name else None, filters))
         
         results = self.collection.query(
             query_embeddings=[query_embedding.tolist()],
@@ -101,6 +154,26 @@ class CloudChromaStorage:
         
         return formatted_results
     
+    def list_ids(self, page_size: int = 1000) -> Iterator[List[str]]:
+        """Yield the IDs in the collection a page at a time."""
+        offset = 0
+        while True:
+            ids = self.collection.get(include=[], limit=page_size, offset=offset)['ids']
+            if not ids:
+                return
+            yield ids
+            offset += len(ids)
+    
+    @timed_backend_call("chroma_cloud", "fetch")
+    def fetch(self, ids: List[str]) -> List[Dict[str, Any]]:
+        """Fetch records by ID."""
+        results = self.collection.get(ids=ids, include=["embeddings", "documents", "metadatas"])
+        return [
+            {"id": chunk_id, "text": text, "embedding": embedding, "metadata": metadata or {}}
+            for chunk_id, text, embedding, metadata in zip(
+                results['ids'], results['documents'], results['embeddings'], results['metadatas'])
+        ]
+    
     def get_collection_info(self) -> Dict[str, Any]:
         """Get information about the collection."""
         count = self.collection.count()
@@ -0,0 +1,136 @@
+"""Query-focused extractive compression of retrieved chunks."""
+
+import re
+import time
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional
+import numpy as np
+
+
+# Sentence boundary followed by something that starts a new sentence or clause
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.;?!])\s+(?=[A-Z(\"\'—-])')
+MAX_HEADING_CHARS = 80
+
+
+@dataclass
+class CompressionResult:
+    """Compressed search results and compression statistics."""
+    results: List[Dict[str, Any]] = field(default_factory=list)
+    original_chars: int = 0
+    compressed_chars: int = 0
+    seconds: float = 0.0
+
+    @property
+    def ratio(self) -> float:
+        """Compressed size as a fraction of the original size."""
+        if not self.original_chars:
+            return 1.0
+        return self.compressed_chars / self.original_chars
+
+    def stats(self) -> Dict[str, Any]:
+        """Return statistics suitable for reporting."""
+        return {
+            "ratio": round(self.ratio, 4),
+            "original_chars": self.original_chars,
+            "compressed_chars": self.compressed_chars,
+            "seconds": round(self.seconds, 6)
+        }
+
+
+def _is_heading(line: str) -> bool:
+    """Heading lines are short and carry no sentence punctuation."""
+    stripped = line.strip()
+    return len(stripped) <= MAX_HEADING_CHARS and not stripped.endswith(('.', ';', ':', '?', '!'))
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences and clauses."""
+    sentences = []
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        sentences.extend(part.strip() for part in SENTENCE_BOUNDARY.split(line) if part.strip())
+    return sentences
+
+
+def _split_chunk(text: str):
+    """Split a chunk into its leading heading lines and body sentences."""
+    lines = [line for line in text.split('\n') if line.strip()]
+    headings = []
+    while lines and len(lines) > 1 and _is_heading(lines[0]):
+        headings.append(lines.pop(0).strip())
+    return headings, split_sentences('\n'.join(lines))
+
+
+def compress_results(results: List[Dict[str, Any]], query_embedding: np.ndarray,
+                     target_ratio: float = 0.5, neighbours: int = 1,
+                     encoder: Optional[Any] = None) -> CompressionResult:
+    """Keep the sentences of each chunk that are most similar to the query.
+
+    All body sentences across all chunks are embedded in one batched encode
+    and scored against the query embedding from retrieval. The top scoring
+    sentences, together with ``neighbours`` sentences either side, are kept
+    until ``target_ratio`` of the original body text is reached. Heading
+    lines are always kept.
+    """
+    start = time.perf_counter()
+
+    if encoder is None:
+        from .chunker import get_embedding_model
+        encoder = get_embedding_model()
+
+    split = [_split_chunk(result['text']) for result in results]
+    flat = [(r, s) for r, (_, sentences) in enumerate(split) for s in range(len(sentences))]
+    all_sentences = [split[r][1][s] for r, s in flat]
+    original_chars = sum(len(result['text']) for result in results)
+
+    if not all_sentences:
+        return CompressionResult(list(results), original_chars, original_chars,
+                                 time.perf_counter() - start)
+
+    # Cosine similarity of every sentence against the query
+    sentence_embeddings = np.asarray(encoder.encode(all_sentences), dtype=np.float32)
+    query = np.asarray(query_embedding, dtype=np.float32)
+    norms = np.linalg.norm(sentence_embeddings, axis=1) * (np.linalg.norm(query) or 1.0)
+    scores = sentence_embeddings @ query / np.maximum(norms, 1e-12)
+
+    # Select best sentences with their neighbours until the budget is spent
+    budget = target_ratio * sum(len(s) for s in all_sentences)
+    kept = set()
+    kept_chars = 0
+    for flat_index in np.argsort(-scores):
+        if kept_chars >= budget:
+            break
+        r, s = flat[flat_index]
+        for neighbour in range(s - neighbours, s + neighbours + 1):
+            if 0 <= neighbour < len(split[r][1]) and (r, neighbour) not in kept:
+                kept.add((r, neighbour))
+                kept_chars += len(split[r][1][neighbour])
+
+    # Rebuild each chunk in original order, marking elided spans
+    compressed = []
+    for r, result in enumerate(results):
+        headings, sentences = split[r]
+        if sentences and not any((r, s) in kept for s in range(len(sentences))):
+            continue
+
+        body = []
+        previous = -1
+        for s, sentence in enumerate(sentences):
+            if (r, s) not in kept:
+                continue
+            if body and s != previous + 1:
+                body.append("...")
+            body.append(sentence)
+            previous = s
+
+        text = '\n'.join(headings + ([' '.join(body)] if body else []))
+        compressed.append({**result, 'text': text})
+
+    return CompressionResult(
+        results=compressed,
+        original_chars=original_chars,
+        compressed_chars=sum(len(result['text']) for result in compressed),
+        seconds=time.perf_counter() - start
+    )
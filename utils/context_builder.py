@@ -0,0 +1,92 @@
+"""Token-budgeted context packing for retrieved chunks."""
+
+import re
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Callable, Optional
+
+
+@dataclass
+class PackedContext:
+    """Prompt context built from retrieved chunks."""
+    text: str
+    sources: List[Dict[str, Any]] = field(default_factory=list)
+    token_count: int = 0
+    dropped: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with the same tokenizer used for chunking."""
+    from .chunker import get_tokenizer
+    return len(get_tokenizer().encode(text, add_special_tokens=False))
+
+
+def _normalize(line: str) -> str:
+    """Normalize a line for duplicate detection."""
+    return re.sub(r'\s+', ' ', line).strip().lower()
+
+
+def build_context(results: List[Dict[str, Any]], max_tokens: int,
+                  token_counter: Optional[Callable[[str], int]] = None,
+                  min_span_chars: int = 40) -> PackedContext:
+    """Pack search results into a prompt context within a token budget.
+
+    Results are packed in the order given, most relevant first. Lines
+    already emitted by a more relevant chunk (the repeated heading paths
+    that contextualize() prepends, and spans shared by overlapping chunks)
+    are removed before the chunk is counted against the budget.
+    """
+    token_counter = token_counter or count_tokens
+
+    seen_lines = set()
+    emitted_spans = []
+    parts = []
+    sources = []
+    dropped = []
+    used_tokens = 0
+
+    for result in results:
+        new_lines = []
+        for line in result['text'].split('\n'):
+            normalized = _normalize(line)
+            if not normalized or normalized in seen_lines:
+                continue
+            # Long spans that are contained in already emitted text are overlap
+            if len(normalized) >= min_span_chars and any(normalized in span for span in emitted_spans):
+                continue
+            new_lines.append((line.strip(), normalized))
+
+        if not new_lines:
+            dropped.append({"id": result['id'], "reason": "duplicate"})
+            continue
+
+        relevance = 1 - result['distance']
+        source_num = len(sources) + 1
+        block = f"Source {source_num} (Relevance: {relevance:.2f}):\n" + \
+            "\n".join(line for line, _ in new_lines) + "\n"
+        block_tokens = token_counter(block)
+
+        if used_tokens + block_tokens > max_tokens:
+            dropped.append({"id": result['id'], "reason": "budget"})
+            continue
+
+        for _, normalized in new_lines:
+            seen_lines.add(normalized)
+            if len(normalized) >= min_span_chars:
+                emitted_spans.append(normalized)
+
+        parts.append(block)
+        used_tokens += block_tokens
+        sources.append({
+            "source": source_num,
+            "id": result['id'],
+            "relevance": relevance,
+            "tokens": block_tokens,
+            "metadata": result.get('metadata', {})
+        })
+
+    return PackedContext(
+        text="\n".join(parts),
+        sources=sources,
+        token_count=used_tokens,
+        dropped=dropped
+    )
@@ -0,0 +1,392 @@
+"""Versioned on-disk corpus of chunks and embeddings.
+
+A corpus artifact is a directory that holds every chunk's text,
+metadata and embedding in a columnar layout that can be memory-mapped:
+
+    corpus.json          format version, row count, embedding dimension
+                         and dtype, column types and the row range of
+                         each document
+    embeddings.bin       raw little-endian float32/float16 matrix
+    <column>.npy         numeric and boolean columns
+    <column>.utf8        string columns, concatenated UTF-8, with
+    <column>.offsets.npy int64 start offsets (one extra for the end)
+
+Each version is written to a hidden sibling directory, and the artifact
+path is a symlink that is swapped atomically to the new version, so a
+crash or a concurrent reader never finds the artifact missing. Readers
+map the version the symlink points at when they open it and keep
+reading that version.
+
+Chunks of a document occupy consecutive rows, so a document, or any
+range of rows, is read as a slice of the memory map without copying.
+Uploads to any backend, migrations and local exact search all read the
+same artifact, so it only has to be embedded once.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+import numpy as np
+from .embedder import ChunkWithEmbedding
+from .filters import FilterSpec, combine, mask
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+FORMAT_NAME = "nyayagpt-corpus"
+FORMAT_VERSION = 1
+MANIFEST_FILE = "corpus.json"
+EMBEDDINGS_FILE = "embeddings.bin"
+
+# Columns every artifact has; everything else comes from chunk metadata
+BASE_COLUMNS = ("id", "text", "document_name")
+
+
+def _column_type(values: List[Any]) -> str:
+    """Storage type for a column: bool, int64, float64, str or json."""
+    present = [value for value in values if value is not None]
+    if len(present) == len(values):
+        if all(isinstance(value, bool) for value in present):
+            return "bool"
+        if all(isinstance(value, int) and not isinstance(value, bool) for value in present):
+            return "int64"
+        if all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in present):
+            return "float64"
+        if all(isinstance(value, str) for value in present):
+            return "str"
+    return "json"
+
+
+def _write_strings(directory: str, name: str, values: List[str]) -> None:
+    encoded = [value.encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    np.save(os.path.join(directory, f"{name}.offsets.npy"), offsets)
+    with open(os.path.join(directory, f"{name}.utf8"), 'wb') as f:
+        f.write(b"".join(encoded))
+
+
+class CorpusWriter:
+    """Write a corpus artifact, atomically replacing ``directory`` when closed.
+
+    Embeddings are streamed to disk as documents are added; text and
+    metadata columns are written on close. Use as a context manager so
+    that a failed build leaves any existing artifact in place.
+    """
+
+    def __init__(self, directory: str, dimension: int, dtype: str = "float32",
+                 embedding_model: str = "BAAI/bge-large-en-v1.5", projection: str = ""):
+        """Initialize the writer.
+
+        Args:
+            directory: Artifact directory to create or replace
+            dimension: Embedding dimension
+            dtype: Stored embedding type, "float32" or "float16"
+            embedding_model: Model that produced the embeddings
+            projection: Fingerprint of the projection applied to them, if any
+        """
+        if dtype not in ("float32", "float16"):
+            raise ValueError(f"Unsupported embedding dtype: {dtype}")
+        self.directory = os.path.abspath(directory)
+        self.dimension = dimension
+        self.dtype = np.dtype(dtype).newbyteorder('<')
+        self.embedding_model = embedding_model
+        self.projection = projection
+        self.rows: Dict[str, List[Any]] = {name: [] for name in BASE_COLUMNS}
+        self.documents: List[Dict[str, Any]] = []
+        self.count = 0
+
+        parent = os.path.dirname(self.directory)
+        os.makedirs(parent, exist_ok=True)
+        self._tmp_dir = tempfile.mkdtemp(dir=parent, prefix=f".{os.path.basename(self.directory)}.")
+        self._embeddings = open(os.path.join(self._tmp_dir, EMBEDDINGS_FILE), 'wb')
+
+    def _append(self, texts: List[str], metadatas: List[Dict[str, Any]], embeddings: np.ndarray,
+                document_name: str, source_hash: Optional[str]) -> None:
+        if embeddings.shape != (len(texts), self.dimension):
+            raise ValueError(f"Expected embeddings of shape ({len(texts)}, {self.dimension}), "
+                             f"got {embeddings.shape}")
+        start = self.count
+        self._embeddings.write(np.ascontiguousarray(embeddings, dtype=self.dtype).tobytes())
+        for i, (text, metadata) in enumerate(zip(texts, metadatas)):
+            row = {"id": f"{document_name}_{i}", "text": text, "document_name": document_name}
+            row.update((key, value) for key, value in (metadata or {}).items() if key not in row)
+            for name in row.keys() | self.rows.keys():
+                # Columns first seen in this row are back-filled with None
+                self.rows.setdefault(name, [None] * (self.count + i)).append(row.get(name))
+        self.count += len(texts)
+        self.documents.append({"name": document_name, "start": start, "stop": self.count,
+                               "source_hash": source_hash})
+
+    def add_document(self, document_name: str, chunks: List[ChunkWithEmbedding],
+                     source_hash: Optional[str] = None) -> None:
+        """Append the embedded chunks of one document."""
+        embeddings = (np.stack([np.asarray(chunk.embedding) for chunk in chunks])
+                      if chunks else np.zeros((0, self.dimension)))
+        self._append([chunk.text for chunk in chunks], [chunk.metadata for chunk in chunks],
+                     embeddings, document_name, source_hash)
+
+    def copy_document(self, artifact: "CorpusArtifact", document_name: str) -> None:
+        """Append a document's rows from an existing artifact without re-embedding."""
+        start, stop = artifact.document_range(document_name)
+        document = artifact.document_info(document_name)
+        self._append(artifact.column("text", start, stop), artifact.metadata(start, stop),
+                     artifact.embeddings[start:stop], document_name, document.get("source_hash"))
+
+    def close(self) -> None:
+        """Write the columns and manifest and move the artifact into place."""
+        self._embeddings.close()
+        columns = {}
+        for name, values in self.rows.items():
+            kind = _column_type(values)
+            columns[name] = kind
+            if kind == "str":
+                _write_strings(self._tmp_dir, name, values)
+            elif kind == "json":
+                _write_strings(self._tmp_dir, name, [json.dumps(value) for value in values])
+            else:
+                np.save(os.path.join(self._tmp_dir, f"{name}.npy"), np.array(values, dtype=kind))
+
+        manifest = {
+            "format": FORMAT_NAME,
+            "version": FORMAT_VERSION,
+            "count": self.count,
+            "dimension": self.dimension,
+            "dtype": self.dtype.name,
+            "embedding_model": self.embedding_model,
+            "projection": self.projection,
+            "created_at": datetime.now().isoformat(),
+            "columns": columns,
+            "documents": self.documents
+        }
+        with open(os.path.join(self._tmp_dir, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        self._swap_in()
+        logger.info(f"Wrote corpus artifact with {self.count} chunks from {len(self.documents)} documents "
+                    f"to {self.directory}", extra={"chunks": self.count, "documents": len(self.documents)})
+
+    def _swap_in(self) -> None:
+        """Point ``directory`` at the new version, then delete the previous one."""
+        previous = os.path.realpath(self.directory) if os.path.islink(self.directory) else None
+        if os.path.isdir(self.directory) and previous is None:
+            # Artifacts written before versioned directories are moved aside first
+            previous = f"{self._tmp_dir}.previous"
+            os.rename(self.directory, previous)
+        link = f"{self._tmp_dir}.link"
+        os.symlink(os.path.basename(self._tmp_dir), link)
+        os.replace(link, self.directory)
+        if previous is not None:
+            shutil.rmtree(previous, ignore_errors=True)
+
+    def abort(self) -> None:
+        """Discard a partially written artifact."""
+        self._embeddings.close()
+        shutil.rmtree(self._tmp_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class CorpusArtifact:
+    """Read-only, memory-mapped view of a corpus artifact."""
+
+    def __init__(self, directory: str):
+        """Open an artifact directory."""
+        while True:
+            # The version the symlink points at now, even if a writer swaps it later
+            self.directory = os.path.realpath(directory)
+            try:
+                self._open()
+                return
+            except FileNotFoundError:
+                # Replaced and deleted by a writer while it was being opened
+                if os.path.realpath(directory) == self.directory:
+                    raise
+
+    def _open(self) -> None:
+        with open(os.path.join(self.directory, MANIFEST_FILE)) as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format") != FORMAT_NAME:
+            raise ValueError(f"{self.directory} is not a corpus artifact")
+        if self.manifest["version"] > FORMAT_VERSION:
+            raise ValueError(f"Corpus artifact version {self.manifest['version']} is newer than "
+                             f"supported version {FORMAT_VERSION}")
+
+        self.count = self.manifest["count"]
+        self.dimension = self.manifest["dimension"]
+        self.columns: Dict[str, str] = self.manifest["columns"]
+        self.documents = {document["name"]: document for document in self.manifest["documents"]}
+        self.embeddings = (
+            np.memmap(os.path.join(self.directory, EMBEDDINGS_FILE), dtype=np.dtype(self.manifest["dtype"]),
+                      mode='r', shape=(self.count, self.dimension))
+            if self.count else np.zeros((0, self.dimension), dtype=self.manifest["dtype"])
+        )
+        self._arrays: Dict[str, Any] = {}
+        # Map every column now; mapped files stay readable after a writer deletes this version
+        for name in self.columns:
+            self._array(name)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _array(self, name: str):
+        """Memory map of a column's backing file(s)."""
+        if name not in self._arrays:
+            if self.columns[name] in ("str", "json"):
+                offsets = np.load(os.path.join(self.directory, f"{name}.offsets.npy"), mmap_mode='r')
+                path = os.path.join(self.directory, f"{name}.utf8")
+                data = np.memmap(path, dtype=np.uint8, mode='r') if os.path.getsize(path) else b""
+                self._arrays[name] = (offsets, data)
+            else:
+                self._arrays[name] = np.load(os.path.join(self.directory, f"{name}.npy"), mmap_mode='r')
+        return self._arrays[name]
+
+    def column(self, name: str, start: int = 0, stop: Optional[int] = None) -> List[Any]:
+        """Values of one column for rows ``start:stop``."""
+        stop = self.count if stop is None else stop
+        kind = self.columns[name]
+        if kind not in ("str", "json"):
+            return self._array(name)[start:stop].tolist()
+
+        offsets, data = self._array(name)
+        values = [bytes(data[offsets[i]:offsets[i + 1]]).decode('utf-8') for i in range(start, stop)]
+        return [json.loads(value) for value in values] if kind == "json" else values
+
+    def text(self, row: int) -> str:
+        """Text of one chunk."""
+        return self.column("text", row, row + 1)[0]
+
+    def metadata(self, start: int = 0, stop: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Chunk metadata (every column except id, text and document_name)."""
+        stop = self.count if stop is None else stop
+        names = [name for name in self.columns if name not in BASE_COLUMNS]
+        columns = [self.column(name, start, stop) for name in names]
+        return [
+            {name: values[i] for name, values in zip(names, columns) if values[i] is not None}
+            for i in range(stop - start)
+        ]
+
+    def document_info(self, document_name: str) -> Dict[str, Any]:
+        return self.documents[document_name]
+
+    def document_range(self, document_name: str) -> Tuple[int, int]:
+        """Row range ``(start, stop)`` of a document's chunks."""
+        document = self.documents[document_name]
+        return document["start"], document["stop"]
+
+    def chunks(self, start: int = 0, stop: Optional[int] = None) -> List[ChunkWithEmbedding]:
+        """Chunks for rows ``start:stop``; embeddings are views of the memory map."""
+        stop = self.count if stop is None else stop
+        texts = self.column("text", start, stop)
+        metadatas = self.metadata(start, stop)
+        embeddings = self.embeddings[start:stop]
+        return [
+            ChunkWithEmbedding(text=text, embedding=embeddings[i], metadata=metadatas[i])
+            for i, text in enumerate(texts)
+        ]
+
+    def iter_documents(self) -> Iterator[Tuple[str, List[ChunkWithEmbedding]]]:
+        """Yield each document's name and chunks."""
+        for name, document in self.documents.items():
+            yield name, self.chunks(document["start"], document["stop"])
+
+    def search(self, query: str, n_results: int = 5, document_name: str = None,
+               filters: FilterSpec = None) -> List[Dict[str, Any]]:
+        """Search for similar chunks using text query."""
+        from .query_encoder import get_query_encoder
+        query_embedding = get_query_encoder().encode([query])[0]
+        return self.search_by_embedding(query_embedding, n_results=n_results, document_name=document_name,
+                                        filters=filters)
+
+    def search_by_embedding(self, query_embedding: np.ndarray, n_results: int = 5, document_name: str = None,
+                            filters: FilterSpec = None, block_size: int = 65536) -> List[Dict[str, Any]]:
+        """Exact cosine search over the memory-mapped embeddings.
+
+        Rows are scanned in blocks so float16 artifacts are upcast a
+        block at a time; a document filter only scans that document's
+        rows, and ``filters`` are evaluated on the columns so only
+        matching rows are scored.
+        """
+        if document_name and document_name not in self.documents:
+            return []
+        start, stop = self.document_range(document_name) if document_name else (0, self.count)
+        where = combine(filters)
+        selected = None
+        if where is not None:
+            def column(name: str):
+                return self.column(name, start, stop) if name in self.columns else None
+            selected = start + np.flatnonzero(mask(where, column, stop - start))
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+        best_rows = np.zeros(0, dtype=np.int64)
+        best_scores = np.zeros(0, dtype=np.float32)
+        for block_start in range(start, stop, block_size):
+            block_stop = min(block_start + block_size, stop)
+            if selected is None:
+                rows = np.arange(block_start, block_stop)
+                block = np.asarray(self.embeddings[block_start:block_stop], dtype=np.float32)
+            else:
+                rows = selected[(selected >= block_start) & (selected < block_stop)]
+                if not len(rows):
+                    continue
+                block = np.asarray(self.embeddings[rows], dtype=np.float32)
+            norms = np.maximum(np.linalg.norm(block, axis=1), 1e-12)
+            scores = (block @ query) / norms
+            best_rows = np.concatenate([best_rows, rows])
+            best_scores = np.concatenate([best_scores, scores])
+            if len(best_rows) > n_results:
+                keep = np.argpartition(-best_scores, n_results)[:n_results]
+                best_rows, best_scores = best_rows[keep], best_scores[keep]
+
+        order = np.argsort(-best_scores)
+        results = []
+        for i in order:
+            row = int(best_rows[i])
+            results.append({
+                'id': self.column("id", row, row + 1)[0],
+                'text': self.text(row),
+                'distance': 1 - float(best_scores[i]),
+                'metadata': {**self.metadata(row, row + 1)[0],
+                             "document_name": self.column("document_name", row, row + 1)[0]}
+            })
+        return results
+
+    def get_index_info(self) -> Dict[str, Any]:
+        """Get information about the artifact."""
+        return {
+            "name": self.directory,
+            "dimension": self.dimension,
+            "total_vector_count": self.count,
+            "documents": len(self.documents),
+            "dtype": self.manifest["dtype"],
+            "created_at": self.manifest["created_at"]
+        }
+
+
+def upload_artifact(artifact: CorpusArtifact, storage: Any, documents: Optional[List[str]] = None) -> int:
+    """Upload an artifact's documents to a storage backend.
+
+    Chunk IDs match the ones ingestion produced, since storages derive
+    them from the document name and chunk position.
+
+    Returns:
+        Number of chunks uploaded
+    """
+    uploaded = 0
+    for name in documents or list(artifact.documents):
+        start, stop = artifact.document_range(name)
+        storage.save_chunks(artifact.chunks(start, stop), document_name=name)
+        uploaded += stop - start
+    return uploaded
@@ -0,0 +1,58 @@
+"""Decomposition of compound questions into retrievable sub-queries."""
+
+import re
+from typing import List
+
+
+REFERENCE = re.compile(
+    r'\b(?:article|art\.)\s*\d+[A-Z]?(?:\s*\(\d+\))?'
+    r'|\bpart\s+[IVXLC]+[A-Z]?\b'
+    r'|\b(?:first|second|third|fourth|fifth|sixth|seventh|eighth|ninth|tenth|eleventh|twelfth)\s+schedule\b'
+    r'|\bschedule\s+[IVXLC\d]+\b'
+    r'|\bpreamble\b',
+    re.IGNORECASE
+)
+# Words that only link the parts of a compound question together
+CONNECTIVES = re.compile(
+    r'\b(compare|comparison|contrast|between|and|or|with|versus|vs|their|its|the|of|to|'
+    r'relation|relationship|relate|difference|differences|similarities|both|each|also|how|do|does|'
+    r'what|which|is|are|say|says)\b',
+    re.IGNORECASE
+)
+
+
+def _normalize_reference(reference: str) -> str:
+    """Normalize a reference such as 'art. 21' to 'Article 21'."""
+    reference = re.sub(r'\s+', ' ', reference.strip())
+    reference = re.sub(r'^art\.\s*', 'Article ', reference, flags=re.IGNORECASE)
+    return reference[0].upper() + reference[1:]
+
+
+def decompose_query(question: str, max_sub_queries: int = 4) -> List[str]:
+    """Split a compound question into sub-queries.
+
+    Several separate questions are split at their question marks. A single
+    question that names two or more articles, parts or schedules gets one
+    sub-query per reference, carrying the question's topic words. Anything
+    else is returned unchanged as a single query.
+    """
+    questions = [q.strip() for q in re.split(r'(?<=\?)\s+', question.strip()) if q.strip()]
+    if len(questions) > 1:
+        return questions[:max_sub_queries]
+
+    references = []
+    for match in REFERENCE.finditer(question):
+        reference = _normalize_reference(match.group(0))
+        if reference.lower() not in (r.lower() for r in references):
+            references.append(reference)
+
+    if len(references) < 2:
+        return [question]
+
+    # Topic words that are left once references and connectives are removed
+    topic = CONNECTIVES.sub(' ', REFERENCE.sub(' ', question))
+    topic = re.sub(r'[^\w\s]', ' ', topic)
+    topic = re.sub(r'\s+', ' ', topic).strip()
+
+    sub_queries = [f"{reference} {topic}".strip() for reference in references]
+    return sub_queries[:max_sub_queries]
@@ -0,0 +1,128 @@
+"""Collapse duplicate and near-duplicate chunks of a document.
+
+Docling's contextualized chunks of the Constitution repeat themselves:
+"[Omitted.]" articles, repeated headings and amendment boilerplate.
+Each copy costs an encode, a stored vector and a top-k slot. At ingest:
+
+1. Exact duplicates (same text up to whitespace) are grouped by hash
+   before encoding, so only one copy is embedded.
+2. Near-duplicates are grouped by cosine similarity of the remaining
+   embeddings, computed a block of rows at a time, with pairs above the
+   threshold joined by union-find.
+
+Collapsing is opt-in (DEDUP_CHUNKS): near-identical provisions, such as
+parallel state-specific articles, differ in wording that only the first
+member's text keeps, and the stored chunks are renumbered. Exact
+duplicates are always encoded once, whether or not they are collapsed.
+
+Each group is stored once, as its first chunk in document order. The
+stored chunk's metadata gets ``duplicate_count`` and, for groups of
+more than one, ``source_refs``: the heading paths of all members, so
+the answer can cite every place the text occurs. Structural fields
+(article etc.) are those of the first member.
+"""
+
+import hashlib
+import re
+from typing import List, Dict, Any, Sequence
+import numpy as np
+
+
+def text_key(text: str) -> str:
+    """Hash of a text up to whitespace."""
+    return hashlib.sha1(re.sub(r'\s+', ' ', text).strip().encode('utf-8')).hexdigest()
+
+
+def exact_groups(texts: Sequence[str]) -> np.ndarray:
+    """For each text, the index of the first text with the same key."""
+    first: Dict[str, int] = {}
+    return np.fromiter((first.setdefault(text_key(text), i) for i, text in enumerate(texts)),
+                       dtype=np.int64, count=len(texts))
+
+
+def _components(n: int, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Union-find over edges: the smallest row index of each row's component."""
+    labels = np.arange(n)
+    while True:
+        previous = labels.copy()
+        # Hook each endpoint to the smaller root, then compress paths by pointer jumping
+        np.minimum.at(labels, labels[left], labels[right])
+        np.minimum.at(labels, labels[right], labels[left])
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+        if np.array_equal(labels, previous):
+            return labels
+
+
+def near_groups(embeddings: np.ndarray, threshold: float = 0.98, block_size: int = 256) -> np.ndarray:
+    """For each row, the first row of its group of near-duplicates.
+
+    Rows are joined when their cosine similarity is at least
+    ``threshold``; groups are the connected components, so a chain of
+    near-duplicates ends up in one group.
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    n = len(embeddings)
+    if n < 2:
+        return np.arange(n)
+    embeddings = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+
+    left, right = [], []
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        # Only pairs (i, j) with j > i: compare the block with itself and later rows
+        similarity = embeddings[start:stop] @ embeddings[start:].T
+        rows, columns = np.nonzero(similarity >= threshold)
+        rows += start
+        columns += start
+        upper = columns > rows
+        left.append(rows[upper])
+        right.append(columns[upper])
+
+    left, right = np.concatenate(left), np.concatenate(right)
+    if left.size == 0:
+        return np.arange(n)
+    return _components(n, left, right)
+
+
+def source_ref(metadata: Dict[str, Any]) -> str:
+    """Human-readable location of a chunk: its heading path, or its number."""
+    return metadata.get("heading_path") or f"chunk {metadata.get('chunk_id')}"
+
+
+def collapse(chunks: List[Any], groups: np.ndarray) -> List[Any]:
+    """Keep the first chunk of each group, annotated with its members.
+
+    Args:
+        chunks: ChunkWithEmbedding objects in document order
+        groups: For each chunk, the index of its group's first chunk
+    """
+    members: Dict[int, List[int]] = {}
+    for row, group in enumerate(groups.tolist()):
+        members.setdefault(group, []).append(row)
+
+    kept = []
+    for group, rows in members.items():
+        chunk = chunks[group]
+        metadata = dict(chunk.metadata or {})
+        metadata["duplicate_count"] = len(rows)
+        if len(rows) > 1:
+            refs = list(dict.fromkeys(source_ref(chunks[row].metadata or {}) for row in rows))
+            metadata["source_refs"] = "; ".join(refs)
+        chunk.metadata = metadata
+        kept.append(chunk)
+    return kept
+
+
+def deduplicate(chunks: List[Any], threshold: float = 0.98, block_size: int = 256) -> List[Any]:
+    """Collapse exact and near-duplicates among already embedded chunks."""
+    if not chunks:
+        return []
+    exact = exact_groups([chunk.text for chunk in chunks])
+    unique = np.flatnonzero(exact == np.arange(len(chunks)))
+    near = near_groups(np.stack([chunks[row].embedding for row in unique]), threshold, block_size)
+    # Map every chunk to its exact group's row in ``unique``, then to that row's near group
+    return collapse(chunks, unique[near][np.searchsorted(unique, exact)])
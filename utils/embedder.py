@@ -1,8 +1,12 @@
-from utils.chunker import chunk_document, embedding_model
-from docling_core.types.doc import DoclingDocument
+from utils.chunker import chunk_document, get_embedding_model
+from utils.tracing import start_span, traced
+from utils.metrics import EMBEDDING_BATCH_SIZE, COLLAPSED_CHUNKS
+from utils.dedup import exact_groups, near_groups, collapse
+from utils.legal_structure import structure_metadata
 import numpy as np
 from dataclasses import dataclass
 from typing import List, Any
+from config.config import config
 
 
 @dataclass
@@ -13,28 +17,72 @@ class ChunkWithEmbedding:
     metadata: dict = None
 
 
+@traced("ingest.embed_document")
 def embed_document(docling_document):
     """Chunk a document and generate embeddings for each chunk."""
     # docling_document = DoclingDocument.load_from_json(docling_document)
-    chunks = chunk_document(docling_document)
-    
-    # Generate embeddings for all chunks
+    with start_span("ingest.chunk") as span:
+        chunks = chunk_document(docling_document)
+        span.set_attribute("chunks", len(chunks))
+    return embed_chunks(chunks)
+
+
+@traced("ingest.embed_file")
+def embed_file(path: str):
+    """Chunk a docling JSON file section by section and embed the chunks.
+
+    Peak memory is bounded by the largest section instead of the whole
+    document (see utils/streaming_loader.py).
+    """
+    from utils.streaming_loader import chunk_file
+    return embed_chunks(chunk_file(path))
+
+
+def embed_chunks(chunks) -> List[ChunkWithEmbedding]:
+    """Generate embeddings for chunks from chunk_document()."""
+    # Exact duplicates are grouped before encoding so only one copy is embedded;
+    # they are only collapsed into one stored chunk when DEDUP_CHUNKS is on
     texts = [chunk.text for chunk in chunks]
-    embeddings = embedding_model.encode(texts)
+    dedup = config.chunking.dedup_enabled
+    groups = exact_groups(texts)
+    unique = np.flatnonzero(groups == np.arange(len(texts)))
     
-    # Create chunks with embeddings
+    # Generate embeddings for the unique chunks
+    unique_texts = [texts[i] for i in unique]
+    EMBEDDING_BATCH_SIZE.labels("ingest").observe(len(unique_texts))
+    with start_span("embedding.encode", texts=len(unique_texts)) as span:
+        embeddings = get_embedding_model().encode(unique_texts)
+        if span.recording:
+            span.set_attributes(dimension=int(embeddings.shape[1]), bytes=int(embeddings.nbytes))
+    
+    # Create chunks with embeddings; exact duplicates share their first copy's
+    rows = np.searchsorted(unique, groups)
     embedded_chunks = []
     for i, chunk in enumerate(chunks):
         embedded_chunk = ChunkWithEmbedding(
             text=chunk.text,
-            embedding=embeddings[i],
+            embedding=embeddings[rows[i]],
             metadata={
                 'chunk_id': i,
-                'chunk_type': type(chunk).__name__
+                'chunk_type': chunk.chunk_type,
+                'heading_path': ' > '.join(chunk.headings),
+                **structure_metadata(chunk.headings, chunk.text)
             }
         )
         embedded_chunks.append(embedded_chunk)
     
+    if dedup and embedded_chunks:
+        with start_span("ingest.dedup", chunks=len(embedded_chunks)) as span:
+            near = near_groups(embeddings, threshold=config.chunking.dedup_threshold)
+            embedded_chunks = collapse(embedded_chunks, unique[near][rows])
+            near_collapsed = len(unique) - len(embedded_chunks)
+            COLLAPSED_CHUNKS.labels("exact").inc(len(chunks) - len(unique))
+            COLLAPSED_CHUNKS.labels("near").inc(near_collapsed)
+            span.set_attributes(exact=len(chunks) - len(unique), near=near_collapsed)
+        # Stored chunks are numbered consecutively, like their IDs
+        for i, chunk in enumerate(embedded_chunks):
+            chunk.metadata['chunk_id'] = i
+    
     return embedded_chunks
 
 
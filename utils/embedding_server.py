@@ -0,0 +1,258 @@
+"""Shared embedding daemon serving encode requests over a Unix socket.
+
+One long-lived process owns the embedding model, so scripts and chat
+processes do not each load their own copy. Requests from concurrent
+clients are micro-batched into single forward passes.
+
+Every message is a frame: a 4-byte big-endian payload length followed
+by the payload. A request payload is the number of texts (u32) followed
+by each text as a u32 length and UTF-8 bytes. A response payload starts
+with a status byte; on success it is followed by the number of rows and
+the dimension (u32 each) and the embeddings as little-endian float32,
+on error by a UTF-8 message.
+
+The socket is only accessible to the user running the daemon, and
+clients only connect to sockets owned by their own user.
+"""
+
+import os
+import socket
+import socketserver
+import stat
+import struct
+import threading
+from typing import List, Any, Callable, Optional
+import numpy as np
+from .batching import MicroBatcher
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+MAX_FRAME_BYTES = 256 * 1024 * 1024
+
+_LENGTH = struct.Struct(">I")
+_SHAPE = struct.Struct(">II")
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    buffer = bytearray()
+    while len(buffer) < size:
+        data = sock.recv(size - len(buffer))
+        if not data:
+            raise ConnectionError("Connection closed by peer")
+        buffer.extend(data)
+    return bytes(buffer)
+
+
+def send_frame(sock: socket.socket, payload: bytes) -> None:
+    sock.sendall(_LENGTH.pack(len(payload)) + payload)
+
+
+def recv_frame(sock: socket.socket) -> bytes:
+    (size,) = _LENGTH.unpack(_recv_exact(sock, _LENGTH.size))
+    if size > MAX_FRAME_BYTES:
+        raise ValueError(f"Frame of {size} bytes exceeds the {MAX_FRAME_BYTES} byte limit")
+    return _recv_exact(sock, size)
+
+
+def encode_request(texts: List[str]) -> bytes:
+    parts = [_LENGTH.pack(len(texts))]
+    for text in texts:
+        data = text.encode('utf-8')
+        parts.append(_LENGTH.pack(len(data)))
+        parts.append(data)
+    return b"".join(parts)
+
+
+def decode_request(payload: bytes) -> List[str]:
+    (count,) = _LENGTH.unpack_from(payload, 0)
+    offset = _LENGTH.size
+    texts = []
+    for _ in range(count):
+        (size,) = _LENGTH.unpack_from(payload, offset)
+        offset += _LENGTH.size
+        texts.append(payload[offset:offset + size].decode('utf-8'))
+        offset += size
+    return texts
+
+
+def encode_response(embeddings: np.ndarray) -> bytes:
+    embeddings = np.ascontiguousarray(embeddings, dtype='<f4')
+    rows, dimension = embeddings.shape
+    return bytes([STATUS_OK]) + _SHAPE.pack(rows, dimension) + embeddings.tobytes()
+
+
+def encode_error(message: str) -> bytes:
+    return bytes([STATUS_ERROR]) + message.encode('utf-8')
+
+
+def decode_response(payload: bytes) -> np.ndarray:
+    if payload[0] != STATUS_OK:
+        raise RuntimeError(f"Embedding server error: {payload[1:].decode('utf-8', 'replace')}")
+    rows, dimension = _SHAPE.unpack_from(payload, 1)
+    data = np.frombuffer(payload, dtype='<f4', offset=1 + _SHAPE.size, count=rows * dimension)
+    return data.reshape(rows, dimension).astype(np.float32)
+
+
+class _RequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                payload = recv_frame(self.request)
+            except (ConnectionError, OSError):
+                return
+            try:
+                texts = decode_request(payload)
+                embeddings = self.server.batcher(texts) if texts else np.zeros((0, 0), dtype=np.float32)
+                response = encode_response(np.asarray(embeddings))
+            except Exception as e:
+                logger.error(f"Embedding request failed: {e}")
+                response = encode_error(str(e))
+            try:
+                send_frame(self.request, response)
+            except OSError:
+                return
+
+
+class EmbeddingServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server encoding micro-batched requests with one model."""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, socket_path: str, model: Any, max_batch_size: int = 64,
+                 max_wait_seconds: float = 0.005):
+        """Initialize the server.
+
+        Args:
+            socket_path: Path of the Unix socket to listen on
+            model: Embedding model with an encode() method
+            max_batch_size: Maximum number of texts per forward pass
+            max_wait_seconds: How long a request waits for others to batch with
+        """
+        if os.path.lexists(socket_path):
+            if not stat.S_ISSOCK(os.lstat(socket_path).st_mode):
+                raise FileExistsError(f"{socket_path} exists and is not a socket")
+            if EmbeddingClient(socket_path, timeout=5.0).ping():
+                raise RuntimeError(f"An embedding daemon is already listening on {socket_path}")
+            # Left behind by a daemon that did not shut down cleanly
+            os.unlink(socket_path)
+        os.makedirs(os.path.dirname(socket_path) or ".", mode=0o700, exist_ok=True)
+        self.socket_path = socket_path
+        self._socket_inode = None
+        self.model = model
+        self.batcher = MicroBatcher(
+            lambda texts: np.asarray(model.encode(texts, batch_size=max_batch_size)),
+            max_batch_size=max_batch_size,
+            max_wait_seconds=max_wait_seconds,
+            name="embedding-batcher"
+        )
+        super().__init__(socket_path, _RequestHandler)
+
+    def server_bind(self) -> None:
+        # Create the socket without group or other access, so no other user can connect even briefly
+        umask = os.umask(0o177)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(umask)
+        os.chmod(self.socket_path, 0o600)
+        self._socket_inode = os.lstat(self.socket_path).st_ino
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.batcher.close()
+        # Only remove our own socket, not one a later daemon bound to the same path
+        if os.path.lexists(self.socket_path) and os.lstat(self.socket_path).st_ino == self._socket_inode:
+            os.unlink(self.socket_path)
+
+
+class EmbeddingClient:
+    """encode() over the embedding daemon, with an in-process fallback.
+
+    Each thread uses its own connection. Requests the daemon cannot serve
+    because it is unreachable are encoded by the model returned by
+    ``fallback``, which is only loaded when first needed. A daemon that
+    does not answer within ``timeout`` raises TimeoutError instead: it is
+    busy, not gone.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 60.0,
+                 fallback: Optional[Callable[[], Any]] = None):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.fallback = fallback
+        self._local = threading.local()
+        self._fallback_model = None
+        self._fallback_lock = threading.Lock()
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def _drop_connection(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    def _encode_remote(self, texts: List[str]) -> np.ndarray:
+        sock = self._connection()
+        send_frame(sock, encode_request(texts))
+        return decode_response(recv_frame(sock))
+
+    def _fallback(self):
+        with self._fallback_lock:
+            if self._fallback_model is None:
+                logger.warning(f"Embedding daemon unavailable at {self.socket_path}, loading the model in-process")
+                self._fallback_model = self.fallback()
+            return self._fallback_model
+
+    def encode(self, texts: List[str], **kwargs) -> np.ndarray:
+        """Embed texts like SentenceTransformer.encode()."""
+        if isinstance(texts, str):
+            return self.encode([texts], **kwargs)[0]
+        try:
+            return self._encode_remote(list(texts))
+        except socket.timeout as e:
+            # The connection is out of step with the daemon's responses
+            self._drop_connection()
+            raise TimeoutError(f"Embedding daemon at {self.socket_path} did not answer "
+                               f"within {self.timeout}s") from e
+        except (ConnectionError, OSError):
+            self._drop_connection()
+            if self.fallback is None:
+                raise
+        return self._fallback().encode(texts, **kwargs)
+
+    def ping(self) -> bool:
+        """Check that the daemon answers requests."""
+        try:
+            self._encode_remote([])
+            return True
+        except (ConnectionError, OSError, RuntimeError):
+            self._drop_connection()
+            return False
+
+
+def connect(socket_path: str, fallback: Optional[Callable[[], Any]] = None) -> Optional[EmbeddingClient]:
+    """Return a client if a daemon is listening on socket_path, else None.
+
+    Sockets owned by another user are ignored, so that no one else can
+    answer in place of the daemon.
+    """
+    if not socket_path or not os.path.exists(socket_path):
+        return None
+    info = os.stat(socket_path)
+    if not stat.S_ISSOCK(info.st_mode) or info.st_uid != os.getuid():
+        logger.warning(f"Ignoring {socket_path}: not a socket owned by this user")
+        return None
+    client = EmbeddingClient(socket_path, fallback=fallback)
+    return client if client.ping() else None
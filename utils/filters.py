@@ -0,0 +1,212 @@
+"""Metadata filters that every storage backend can push down.
+
+Filters are built from fields and combined with ``&`` and ``|``:
+
+    (F("part") == "III") & (F("text_length") >= 200)
+    F("article").isin(["14", "21"]) | (F("schedule") == "7")
+
+or parsed from the equivalent dictionary, where a plain value means
+equality and several keys mean all of them:
+
+    {"part": "III", "text_length": {"$gte": 200, "$lte": 2000}}
+
+``to_where`` compiles a filter to the MongoDB-style operator syntax that
+both ChromaDB's ``where`` and Pinecone's ``filter`` accept, always
+nesting several conditions under ``$and`` as ChromaDB requires.
+Local stores evaluate filters with ``matches`` (one metadata dict) or
+``mask`` (whole columns at once, before any similarity is computed).
+Metadata without the filtered field never matches.
+"""
+
+import operator
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Union, Callable
+import numpy as np
+
+
+OPERATORS = {
+    "$eq": operator.eq,
+    "$ne": operator.ne,
+    "$gt": operator.gt,
+    "$gte": operator.ge,
+    "$lt": operator.lt,
+    "$lte": operator.le,
+}
+MEMBERSHIP = ("$in", "$nin")
+
+
+class Filter:
+    """Base class of filter expressions."""
+
+    def __and__(self, other: "Filter") -> "Filter":
+        return And(_flatten(And, [self, other]))
+
+    def __or__(self, other: "Filter") -> "Filter":
+        return Or(_flatten(Or, [self, other]))
+
+
+def _flatten(kind: type, filters: List["Filter"]) -> List["Filter"]:
+    """Inline nested filters of the same kind: (a & b) & c -> a & b & c."""
+    flat = []
+    for f in filters:
+        flat.extend(f.filters if isinstance(f, kind) else [f])
+    return flat
+
+
+@dataclass
+class Condition(Filter):
+    """Comparison of one metadata field with a value."""
+    field: str
+    op: str
+    value: Any
+
+    def __post_init__(self):
+        if self.op not in OPERATORS and self.op not in MEMBERSHIP:
+            raise ValueError(f"Unsupported filter operator: {self.op}")
+        if self.op in MEMBERSHIP:
+            self.value = list(self.value)
+
+
+@dataclass
+class And(Filter):
+    """All of several filters."""
+    filters: List[Filter]
+
+
+@dataclass
+class Or(Filter):
+    """Any of several filters."""
+    filters: List[Filter]
+
+
+class F:
+    """A metadata field, used to build conditions."""
+
+    __hash__ = None
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __eq__(self, value) -> Condition:
+        return Condition(self.name, "$eq", value)
+
+    def __ne__(self, value) -> Condition:
+        return Condition(self.name, "$ne", value)
+
+    def __gt__(self, value) -> Condition:
+        return Condition(self.name, "$gt", value)
+
+    def __ge__(self, value) -> Condition:
+        return Condition(self.name, "$gte", value)
+
+    def __lt__(self, value) -> Condition:
+        return Condition(self.name, "$lt", value)
+
+    def __le__(self, value) -> Condition:
+        return Condition(self.name, "$lte", value)
+
+    def isin(self, values) -> Condition:
+        return Condition(self.name, "$in", values)
+
+    def notin(self, values) -> Condition:
+        return Condition(self.name, "$nin", values)
+
+
+# What storages accept as ``filters``: an expression, a dictionary or None
+FilterSpec = Union[Filter, Dict[str, Any], None]
+
+
+def parse(spec: Dict[str, Any]) -> Filter:
+    """Parse a MongoDB-style filter dictionary."""
+    filters = []
+    for key, value in spec.items():
+        if key in ("$and", "$or"):
+            parts = [parse(part) for part in value]
+            filters.append(And(parts) if key == "$and" else Or(parts))
+        elif isinstance(value, dict):
+            filters.extend(Condition(key, op, operand) for op, operand in value.items())
+        else:
+            filters.append(Condition(key, "$eq", value))
+    if not filters:
+        raise ValueError("Empty filter")
+    return filters[0] if len(filters) == 1 else And(filters)
+
+
+def combine(*filters: FilterSpec) -> Optional[Filter]:
+    """AND together filters, skipping None; dictionaries are parsed."""
+    parsed = [parse(f) if isinstance(f, dict) else f for f in filters if f]
+    if not parsed:
+        return None
+    return parsed[0] if len(parsed) == 1 else And(_flatten(And, parsed))
+
+
+def to_where(f: Optional[Filter]) -> Optional[Dict[str, Any]]:
+    """Compile a filter for ChromaDB ``where`` and Pinecone ``filter``."""
+    if f is None:
+        return None
+    if isinstance(f, Condition):
+        return {f.field: {f.op: f.value}}
+    key = "$and" if isinstance(f, And) else "$or"
+    parts = [to_where(part) for part in f.filters]
+    return parts[0] if len(parts) == 1 else {key: parts}
+
+
+def matches(f: Optional[Filter], metadata: Dict[str, Any]) -> bool:
+    """Whether one metadata dictionary satisfies a filter."""
+    if f is None:
+        return True
+    if isinstance(f, And):
+        return all(matches(part, metadata) for part in f.filters)
+    if isinstance(f, Or):
+        return any(matches(part, metadata) for part in f.filters)
+    if metadata.get(f.field) is None:
+        return False
+    value = metadata[f.field]
+    if f.op == "$in":
+        return value in f.value
+    if f.op == "$nin":
+        return value not in f.value
+    try:
+        return OPERATORS[f.op](value, f.value)
+    except TypeError:
+        return False
+
+
+def mask(f: Optional[Filter], column: Callable[[str], Optional[np.ndarray]], n: int) -> np.ndarray:
+    """Evaluate a filter over columns, returning a boolean row mask.
+
+    Args:
+        f: Filter to evaluate
+        column: Returns the values of a field for all ``n`` rows, or None
+            if no row has the field
+        n: Number of rows
+    """
+    if f is None:
+        return np.ones(n, dtype=bool)
+    if isinstance(f, And):
+        result = np.ones(n, dtype=bool)
+        for part in f.filters:
+            result &= mask(part, column, n)
+        return result
+    if isinstance(f, Or):
+        result = np.zeros(n, dtype=bool)
+        for part in f.filters:
+            result |= mask(part, column, n)
+        return result
+
+    values = column(f.field)
+    if values is None:
+        return np.zeros(n, dtype=bool)
+    values = np.asarray(values)
+    if values.dtype == object:
+        # Mixed or missing values are compared one by one
+        return np.array([matches(f, {f.field: value}) for value in values], dtype=bool)
+    if f.op in MEMBERSHIP:
+        member = np.isin(values, f.value)
+        result = member if f.op == "$in" else ~member
+    else:
+        try:
+            result = np.asarray(OPERATORS[f.op](values, f.value), dtype=bool)
+        except TypeError:
+            return np.zeros(n, dtype=bool)
+    return result
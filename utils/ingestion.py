@@ -0,0 +1,435 @@
+"""Incremental ingestion of every document under the data directory.
+
+Raw files (PDF, DOCX, Markdown, text) are converted to docling JSON,
+with conversions cached by file hash, and already converted
+``.docling.json`` files are used as they are. Documents are converted,
+chunked and embedded in a process pool while the parent process uploads
+finished documents.
+
+A manifest records, per file, its hash, the chunk IDs it was uploaded
+as, the backend and index or collection they went to, and the embedding
+model and projection they were made with. Later runs only process
+documents that were added or changed since, and delete the chunks of
+documents that were changed or removed, so the corpus grows without
+full rebuilds.
+
+Optionally the embedded corpus is also written as a corpus artifact
+(see corpus_artifact.py), copying unchanged documents from the previous
+artifact instead of embedding them again. A previous artifact made with
+another embedding model or projection is not reused.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+from .logger import get_logger, worker_logging
+from config.config import config
+
+logger = get_logger(__name__)
+
+DOCLING_SUFFIX = ".docling.json"
+
+# One converter per worker process, created on first use
+_converter = None
+
+
+def file_hash(path: str) -> str:
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def document_name_for(relative_path: str) -> str:
+    """Document name (and chunk ID prefix) for a path under the data directory."""
+    name = relative_path.replace(os.sep, "/")
+    if name.endswith(DOCLING_SUFFIX):
+        return name[:-len(DOCLING_SUFFIX)]
+    return os.path.splitext(name)[0]
+
+
+def scan_corpus(data_dir: str, supported_formats: List[str]) -> Dict[str, str]:
+    """Map relative paths of ingestible files under ``data_dir`` to absolute paths."""
+    files = {}
+    for root, dirs, names in os.walk(data_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(names):
+            if name.startswith("."):
+                continue
+            if not (name.endswith(DOCLING_SUFFIX) or os.path.splitext(name)[1].lower() in supported_formats):
+                continue
+            path = os.path.join(root, name)
+            files[os.path.relpath(path, data_dir)] = os.path.abspath(path)
+    return files
+
+
+def converted_path(digest: str, conversion_cache_dir: str) -> str:
+    """Where the docling conversion of a file with this hash is cached."""
+    return os.path.join(conversion_cache_dir, digest[:2], f"{digest}{DOCLING_SUFFIX}")
+
+
+def load_document(path: str, digest: str, conversion_cache_dir: str):
+    """Load a file as a DoclingDocument, converting it if needed.
+
+    Conversions are cached under ``conversion_cache_dir`` by file hash,
+    so renaming or re-ingesting an unchanged file does not reconvert it.
+    """
+    from docling_core.types.doc import DoclingDocument
+
+    if path.endswith(DOCLING_SUFFIX):
+        return DoclingDocument.load_from_json(path)
+
+    cached = converted_path(digest, conversion_cache_dir)
+    if os.path.exists(cached):
+        return DoclingDocument.load_from_json(cached)
+
+    global _converter
+    if _converter is None:
+        from docling.document_converter import DocumentConverter
+        _converter = DocumentConverter()
+
+    if path.lower().endswith(".txt"):
+        # Docling has no plain text reader; text is valid Markdown
+        from io import BytesIO
+        from docling.datamodel.base_models import DocumentStream
+        with open(path, 'rb') as f:
+            stem = os.path.splitext(os.path.basename(path))[0]
+            source = DocumentStream(name=f"{stem}.md", stream=BytesIO(f.read()))
+        document = _converter.convert(source).document
+    else:
+        document = _converter.convert(path).document
+
+    os.makedirs(os.path.dirname(cached), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cached), suffix=".tmp")
+    os.close(fd)
+    try:
+        document.save_as_json(tmp_path)
+        os.replace(tmp_path, cached)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return document
+
+
+def process_document(path: str, digest: str, conversion_cache_dir: str) -> list:
+    """Convert, chunk and embed one file (runs in a worker process)."""
+    from .embedder import embed_document, embed_file
+    from .streaming_loader import should_stream
+
+    # Large docling JSON is chunked a section at a time instead of loaded whole
+    source = path if path.endswith(DOCLING_SUFFIX) else converted_path(digest, conversion_cache_dir)
+    if should_stream(source):
+        return embed_file(source)
+
+    document = load_document(path, digest, conversion_cache_dir)
+    return embed_document(document)
+
+
+def create_storage(backend: str, index: str, collection: str):
+    """Connect to a storage backend: pinecone, chroma or chroma_cloud."""
+    if backend == "pinecone":
+        from .pinecone_storage import PineconeStorage
+        return PineconeStorage(index_name=index)
+    if backend == "chroma_cloud":
+        from .cloud_storage import CloudChromaStorage
+        return CloudChromaStorage(collection_name=collection)
+    from .storage import ChromaStorage
+    return ChromaStorage(collection_name=collection, persist_directory=config.storage.persist_directory)
+
+
+def embedding_fingerprint() -> str:
+    """Embedding model and projection that new embeddings are made with."""
+    from .chunker import EMBEDDING_MODEL
+    from .projection import projection_fingerprint
+    projection = projection_fingerprint()
+    return f"{EMBEDDING_MODEL}+{projection}" if projection else EMBEDDING_MODEL
+
+
+def compatible_artifact(directory: str):
+    """The corpus artifact in ``directory`` if its embeddings can be reused, else None.
+
+    Embeddings are reusable when they were made with the current model and
+    projection; otherwise every document has to be embedded again.
+    """
+    from .chunker import EMBEDDING_MODEL
+    from .corpus_artifact import CorpusArtifact, MANIFEST_FILE
+    from .projection import projection_fingerprint
+
+    if not os.path.exists(os.path.join(directory, MANIFEST_FILE)):
+        return None
+    artifact = CorpusArtifact(directory)
+    model = artifact.manifest.get("embedding_model")
+    projection = artifact.manifest.get("projection") or ""
+    if (model, projection) != (EMBEDDING_MODEL, projection_fingerprint()):
+        logger.warning(f"Corpus artifact {directory} was embedded with {model} and projection "
+                       f"'{projection or 'none'}'; re-embedding every document")
+        return None
+    return artifact
+
+
+@dataclass
+class ManifestEntry:
+    """What was uploaded for one file."""
+    hash: str
+    document_name: str
+    chunk_ids: List[str] = field(default_factory=list)
+    backend: str = ""
+    index: str = ""
+    embedding: str = ""
+    ingested_at: str = ""
+
+    def uploaded_to(self, backend: str, index: str, embedding: Optional[str] = None) -> bool:
+        """Whether the chunks are in ``index`` on ``backend`` (and embedded as ``embedding``, if given)."""
+        return (self.backend, self.index) == (backend, index) and embedding in (None, self.embedding)
+
+
+class Manifest:
+    """Per-file record of ingested documents, stored as JSON."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, ManifestEntry] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            self.entries = {
+                relative_path: ManifestEntry(**entry)
+                for relative_path, entry in data.get("documents", {}).items()
+            }
+
+    def save(self) -> None:
+        """Write the manifest atomically."""
+        data = {"documents": {
+            relative_path: vars(entry) for relative_path, entry in sorted(self.entries.items())
+        }}
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+@dataclass
+class IngestionPlan:
+    """Files to process and remove in one run."""
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    hashes: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def to_process(self) -> List[str]:
+        return self.added + self.changed
+
+
+def plan_ingestion(files: Dict[str, str], manifest: Manifest, backend: str, index: str = "",
+                   embedding: Optional[str] = None, force: bool = False,
+                   artifact_documents: Optional[set] = None) -> IngestionPlan:
+    """Compare files on disk with the manifest.
+
+    A file is unchanged only if its hash matches and it was uploaded to
+    ``index`` (the index or collection name) on ``backend`` with the
+    ``embedding`` fingerprint (default: the current model and
+    projection); a file last uploaded elsewhere or embedded differently
+    is treated as added.
+    When a corpus artifact is being kept, ``artifact_documents`` names
+    the documents it holds, and unchanged files missing from it are
+    processed again.
+    """
+    embedding = embedding_fingerprint() if embedding is None else embedding
+    plan = IngestionPlan()
+    for relative_path, path in files.items():
+        digest = file_hash(path)
+        plan.hashes[relative_path] = digest
+        entry = manifest.entries.get(relative_path)
+        if entry is None or not entry.uploaded_to(backend, index, embedding):
+            plan.added.append(relative_path)
+        elif force or entry.hash != digest:
+            plan.changed.append(relative_path)
+        elif artifact_documents is not None and entry.document_name not in artifact_documents:
+            plan.changed.append(relative_path)
+        else:
+            plan.unchanged.append(relative_path)
+
+    plan.deleted = [
+        relative_path for relative_path, entry in manifest.entries.items()
+        if relative_path not in files and entry.uploaded_to(backend, index)
+    ]
+    return plan
+
+
+class CorpusIngestor:
+    """Bring a storage backend in line with the documents on disk."""
+
+    def __init__(self, storage: Any, backend: str, manifest: Manifest, conversion_cache_dir: str,
+                 workers: int = 2, artifact_dir: Optional[str] = None, index: str = "",
+                 embedding: Optional[str] = None):
+        """Initialize the ingestor.
+
+        Args:
+            storage: Storage with save_chunks() and delete_chunks()
+            backend: Name recorded in the manifest for this storage
+            manifest: Manifest of previously ingested files
+            conversion_cache_dir: Where converted docling JSON is cached
+            workers: Worker processes converting and embedding documents
+            artifact_dir: Corpus artifact to rewrite with the embedded
+                corpus; unchanged documents are copied from the previous one
+            index: Index or collection name recorded in the manifest
+            embedding: Embedding fingerprint recorded in the manifest
+                (default: the current model and projection)
+        """
+        self.storage = storage
+        self.backend = backend
+        self.index = index
+        self.embedding = embedding_fingerprint() if embedding is None else embedding
+        self.manifest = manifest
+        self.conversion_cache_dir = conversion_cache_dir
+        self.workers = workers
+        self.artifact_dir = artifact_dir
+        self._writer = None
+        self._pending_empty: List[tuple] = []
+
+    def _new_writer(self, dimension: int, dtype: str = "float32"):
+        from .chunker import EMBEDDING_MODEL
+        from .corpus_artifact import CorpusWriter
+        from .projection import projection_fingerprint
+        return CorpusWriter(self.artifact_dir, dimension=dimension, dtype=dtype,
+                            embedding_model=EMBEDDING_MODEL, projection=projection_fingerprint())
+
+    def _write_artifact(self, document_name: str, digest: str, chunks: list) -> None:
+        if not chunks and self._writer is None:
+            # The dimension is only known once a document has chunks
+            self._pending_empty.append((document_name, digest))
+            return
+        if self._writer is None:
+            self._writer = self._new_writer(len(chunks[0].embedding))
+            for name, pending_digest in self._pending_empty:
+                self._writer.add_document(name, [], source_hash=pending_digest)
+        self._writer.add_document(document_name, chunks, source_hash=digest)
+
+    def _finish_artifact(self, files: Dict[str, str], processed: set) -> None:
+        """Copy documents that were not processed from the previous artifact, then write it."""
+        previous = compatible_artifact(self.artifact_dir)
+        if self._writer is None:
+            if previous is None:
+                return
+            self._writer = self._new_writer(previous.dimension, previous.manifest["dtype"])
+            for name, digest in self._pending_empty:
+                self._writer.add_document(name, [], source_hash=digest)
+
+        try:
+            for relative_path in files:
+                document_name = document_name_for(relative_path)
+                if document_name not in processed and previous is not None and document_name in previous.documents:
+                    self._writer.copy_document(previous, document_name)
+        except BaseException:
+            self._writer.abort()
+            raise
+        self._writer.close()
+
+    def _remove(self, relative_path: str) -> None:
+        entry = self.manifest.entries[relative_path]
+        if entry.chunk_ids:
+            self.storage.delete_chunks(entry.chunk_ids)
+        del self.manifest.entries[relative_path]
+        self.manifest.save()
+
+    def _upload(self, relative_path: str, digest: str, chunks: list) -> int:
+        from .validators import check_upload
+        document_name = document_name_for(relative_path)
+        chunk_ids = [f"{document_name}_{i}" for i in range(len(chunks))]
+        # Validate before stale chunks are deleted, so a bad document keeps its previous version
+        check_upload(self.backend, chunk_ids, [chunk.text for chunk in chunks], [chunk.embedding for chunk in chunks],
+                     dimension=getattr(self.storage, "dimension", None))
+        # Chroma's add() does not overwrite existing IDs, so stale chunks go first
+        previous = self.manifest.entries.get(relative_path)
+        uploaded_here = previous is not None and previous.uploaded_to(self.backend, self.index)
+        if uploaded_here and previous.chunk_ids:
+            self.storage.delete_chunks(previous.chunk_ids)
+
+        try:
+            self.storage.save_chunks(chunks, document_name=document_name)
+        except Exception:
+            # Record the IDs that may now exist with no hash, so the next run
+            # deletes whatever was uploaded and retries the document
+            stale = previous.chunk_ids if uploaded_here else []
+            self.manifest.entries[relative_path] = ManifestEntry(
+                hash="",
+                document_name=document_name,
+                chunk_ids=list(dict.fromkeys(stale + chunk_ids)),
+                backend=self.backend,
+                index=self.index,
+                embedding=self.embedding,
+                ingested_at=datetime.now().isoformat()
+            )
+            self.manifest.save()
+            raise
+        # Only a complete upload is recorded with the document's hash
+        self.manifest.entries[relative_path] = ManifestEntry(
+            hash=digest,
+            document_name=document_name,
+            chunk_ids=chunk_ids,
+            backend=self.backend,
+            index=self.index,
+            embedding=self.embedding,
+            ingested_at=datetime.now().isoformat()
+        )
+        self.manifest.save()
+        return len(chunks)
+
+    def run(self, files: Dict[str, str], plan: IngestionPlan) -> Dict[str, Any]:
+        """Apply a plan; the manifest is saved after every document.
+
+        Returns counts of uploaded chunks and processed, deleted and
+        failed documents.
+        """
+        summary = {"processed": 0, "deleted": 0, "chunks": 0, "failed": []}
+
+        for relative_path in plan.deleted:
+            logger.info(f"Removing chunks of deleted document {relative_path}")
+            self._remove(relative_path)
+            summary["deleted"] += 1
+
+        processed = set()
+        if plan.to_process:
+            self._process(files, plan, summary, processed)
+        if self.artifact_dir:
+            self._finish_artifact(files, processed)
+        return summary
+
+    def _process(self, files: Dict[str, str], plan: IngestionPlan, summary: Dict[str, Any], processed: set) -> None:
+        with worker_logging() as (initializer, initargs), \
+                ProcessPoolExecutor(max_workers=self.workers, initializer=initializer, initargs=initargs) as pool:
+            futures = {
+                pool.submit(process_document, files[relative_path], plan.hashes[relative_path],
+                            self.conversion_cache_dir): relative_path
+                for relative_path in plan.to_process
+            }
+            for future in as_completed(futures):
+                relative_path = futures[future]
+                try:
+                    chunks = future.result()
+                    summary["chunks"] += self._upload(relative_path, plan.hashes[relative_path], chunks)
+                    summary["processed"] += 1
+                    if self.artifact_dir:
+                        document_name = document_name_for(relative_path)
+                        self._write_artifact(document_name, plan.hashes[relative_path], chunks)
+                        processed.add(document_name)
+                    logger.info(f"Ingested {relative_path} ({len(chunks)} chunks)",
+                                extra={"document": relative_path, "chunks": len(chunks)})
+                except Exception as e:
+                    logger.error(f"Failed to ingest {relative_path}: {e}", extra={"document": relative_path})
+                    summary["failed"].append(relative_path)
@@ -0,0 +1,358 @@
+"""IVF-PQ approximate nearest neighbour index.
+
+For corpora too large to scan in full, vectors are partitioned by a
+coarse k-means quantizer (the inverted file). Within a partition each
+vector is stored as a product-quantized code of its residual from the
+partition centroid: the residual is split into ``n_subvectors`` pieces
+and each piece is replaced by the index of its nearest centroid in that
+piece's 256-entry codebook, one byte per piece.
+
+A query scores the ``n_probe`` closest partitions with lookup tables
+(asymmetric distance computation), then rescores the best ``rescore``
+candidates exactly against the full-precision vectors, which are kept
+in a memory-mapped file and only touched for those rows.
+
+Similarity is the inner product of normalized vectors (cosine), the
+metric the storage backends use.
+"""
+
+import json
+import os
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+from .filters import FilterSpec, combine, mask
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+INDEX_FILE = "index.json"
+VECTORS_FILE = "vectors.f32"
+N_CODES = 256
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12)
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray, block_size: int = 8192) -> np.ndarray:
+    """Index of the nearest centroid (L2) for every vector."""
+    centroid_norms = (centroids ** 2).sum(axis=1)
+    labels = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), block_size):
+        block = vectors[start:start + block_size]
+        distances = centroid_norms - 2 * block @ centroids.T
+        labels[start:start + len(block)] = distances.argmin(axis=1)
+    return labels
+
+
+def kmeans(vectors: np.ndarray, k: int, iterations: int = 20, seed: int = 0) -> np.ndarray:
+    """Lloyd's k-means with random initialization; returns the centroids."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if len(vectors) < k:
+        raise ValueError(f"Need at least {k} training vectors, got {len(vectors)}")
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), k, replace=False)].copy()
+    for _ in range(iterations):
+        labels = _assign(vectors, centroids)
+        counts = np.bincount(labels, minlength=k)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, vectors)
+        empty = counts == 0
+        centroids[~empty] = sums[~empty] / counts[~empty, None]
+        # Re-seed empty clusters with random training vectors
+        if empty.any():
+            centroids[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)]
+    return centroids
+
+
+class IVFPQIndex:
+    """Inverted file of product-quantized residuals with exact rescoring."""
+
+    def __init__(self, dimension: int, n_lists: int = 1024, n_subvectors: int = 16,
+                 n_probe: int = 16, rescore: int = 100):
+        """Initialize an untrained index.
+
+        Args:
+            dimension: Vector dimension; must be divisible by n_subvectors
+            n_lists: Coarse partitions (roughly 4 * sqrt(corpus size))
+            n_subvectors: Bytes per PQ code
+            n_probe: Partitions searched per query by default
+            rescore: Candidates rescored exactly by default
+        """
+        if dimension % n_subvectors:
+            raise ValueError(f"Dimension {dimension} is not divisible by {n_subvectors} subvectors")
+        self.dimension = dimension
+        self.n_lists = n_lists
+        self.n_subvectors = n_subvectors
+        self.n_probe = n_probe
+        self.rescore = rescore
+        self.sub_dim = dimension // n_subvectors
+
+        self.coarse: Optional[np.ndarray] = None     # (n_lists, dimension)
+        self.codebooks: Optional[np.ndarray] = None  # (n_subvectors, 256, sub_dim)
+        self.codes = np.zeros((0, n_subvectors), dtype=np.uint8)
+        self.lists = np.zeros(0, dtype=np.int32)
+
+        self.directory: Optional[str] = None
+        self._stored = np.zeros((0, dimension), dtype=np.float32)  # memory-mapped once saved
+        self._pending: List[np.ndarray] = []
+        self._order: Optional[np.ndarray] = None
+        self._offsets: Optional[np.ndarray] = None
+
+    @property
+    def trained(self) -> bool:
+        return self.coarse is not None
+
+    def __len__(self) -> int:
+        return len(self.lists)
+
+    def train(self, vectors: np.ndarray, sample_size: int = 100000, iterations: int = 20, seed: int = 0) -> None:
+        """Fit the coarse quantizer and the residual codebooks."""
+        vectors = np.asarray(vectors)
+        if len(vectors) > sample_size:
+            vectors = vectors[np.sort(np.random.default_rng(seed).choice(len(vectors), sample_size, replace=False))]
+        vectors = _normalize(vectors)
+
+        self.coarse = kmeans(vectors, self.n_lists, iterations=iterations, seed=seed)
+        residuals = vectors - self.coarse[_assign(vectors, self.coarse)]
+        self.codebooks = np.stack([
+            kmeans(residuals[:, j * self.sub_dim:(j + 1) * self.sub_dim], N_CODES, iterations=iterations, seed=seed + j)
+            for j in range(self.n_subvectors)
+        ])
+
+    def _encode(self, vectors: np.ndarray, lists: np.ndarray) -> np.ndarray:
+        residuals = vectors - self.coarse[lists]
+        codes = np.empty((len(vectors), self.n_subvectors), dtype=np.uint8)
+        for j in range(self.n_subvectors):
+            codes[:, j] = _assign(residuals[:, j * self.sub_dim:(j + 1) * self.sub_dim], self.codebooks[j])
+        return codes
+
+    def add(self, vectors: np.ndarray) -> np.ndarray:
+        """Add vectors; returns their row numbers in the index."""
+        if not self.trained:
+            raise RuntimeError("Train the index before adding vectors")
+        vectors = _normalize(vectors)
+        lists = _assign(vectors, self.coarse)
+        start = len(self)
+        self.codes = np.concatenate([self.codes, self._encode(vectors, lists)])
+        self.lists = np.concatenate([self.lists, lists.astype(np.int32)])
+        self._pending.append(vectors)
+        self._order = None
+        return np.arange(start, len(self))
+
+    def _inverted_lists(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows grouped by partition, and each partition's offsets."""
+        if self._order is None:
+            self._order = np.argsort(self.lists, kind="stable")
+            self._offsets = np.concatenate([[0], np.cumsum(np.bincount(self.lists, minlength=self.n_lists))])
+        return self._order, self._offsets
+
+    def _vectors(self, rows: np.ndarray) -> np.ndarray:
+        """Full-precision vectors of some rows."""
+        stored = len(self._stored)
+        if not self._pending or rows.size == 0 or rows.max() < stored:
+            return np.asarray(self._stored[rows])
+        if len(self._pending) > 1:
+            self._pending = [np.concatenate(self._pending)]
+        pending = self._pending[0]
+        out = np.empty((len(rows), self.dimension), dtype=np.float32)
+        saved = rows < stored
+        out[saved] = self._stored[rows[saved]]
+        out[~saved] = pending[rows[~saved] - stored]
+        return out
+
+    def search(self, query: np.ndarray, k: int = 10, n_probe: int = None, rescore: int = None,
+               allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Approximate top-k rows and their exact cosine similarities.
+
+        Args:
+            query: Query vector
+            k: Results to return
+            n_probe: Partitions to search (defaults to the index setting)
+            rescore: Candidates to rescore exactly (defaults to the index setting)
+            allowed: Optional boolean mask of rows that may be returned
+        """
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+        rescore = max(rescore or self.rescore, k)
+        query = _normalize(query)
+        if allowed is not None and np.count_nonzero(allowed) <= rescore:
+            # A selective filter leaves few enough rows to score them all exactly
+            return self._rescore(np.flatnonzero(allowed), query, k)
+        order, offsets = self._inverted_lists()
+
+        coarse_scores = self.coarse @ query
+        probed = np.argpartition(-coarse_scores, n_probe - 1)[:n_probe]
+        rows = np.concatenate([order[offsets[l]:offsets[l + 1]] for l in probed])
+        if allowed is not None:
+            rows = rows[allowed[rows]]
+        if rows.size == 0:
+            return rows, np.zeros(0, dtype=np.float32)
+
+        # Inner product with the centroid plus the residual looked up per subvector
+        tables = np.einsum('jcs,js->jc', self.codebooks, query.reshape(self.n_subvectors, self.sub_dim))
+        approximate = coarse_scores[self.lists[rows]] + tables[np.arange(self.n_subvectors), self.codes[rows]].sum(axis=1)
+
+        if rows.size > rescore:
+            candidates = np.argpartition(-approximate, rescore - 1)[:rescore]
+            rows = rows[candidates]
+        return self._rescore(rows, query, k)
+
+    def _rescore(self, rows: np.ndarray, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k of some rows by exact similarity to a normalized query."""
+        rows = np.sort(rows)
+        exact = self._vectors(rows) @ query
+        top = np.argsort(-exact)[:k]
+        return rows[top], exact[top]
+
+    def save(self, directory: str) -> None:
+        """Save the index; full-precision vectors are appended to ``vectors.f32``."""
+        os.makedirs(directory, exist_ok=True)
+        vectors_path = os.path.join(directory, VECTORS_FILE)
+        if os.path.abspath(directory) == self.directory:
+            with open(vectors_path, 'ab') as f:
+                for block in self._pending:
+                    f.write(block.tobytes())
+        else:
+            with open(vectors_path, 'wb') as f:
+                for start in range(0, len(self._stored), 65536):
+                    f.write(np.asarray(self._stored[start:start + 65536], dtype=np.float32).tobytes())
+                for block in self._pending:
+                    f.write(block.tobytes())
+
+        np.save(os.path.join(directory, "coarse.npy"), self.coarse)
+        np.save(os.path.join(directory, "codebooks.npy"), self.codebooks)
+        np.save(os.path.join(directory, "codes.npy"), self.codes)
+        np.save(os.path.join(directory, "lists.npy"), self.lists)
+        with open(os.path.join(directory, INDEX_FILE), 'w') as f:
+            json.dump({
+                "dimension": self.dimension,
+                "n_lists": self.n_lists,
+                "n_subvectors": self.n_subvectors,
+                "n_probe": self.n_probe,
+                "rescore": self.rescore,
+                "count": len(self)
+            }, f, indent=2)
+
+        self.directory = os.path.abspath(directory)
+        self._stored = self._map_vectors(len(self))
+        self._pending = []
+
+    def _map_vectors(self, count: int):
+        if not count:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return np.memmap(os.path.join(self.directory, VECTORS_FILE), dtype=np.float32, mode='r',
+                         shape=(count, self.dimension))
+
+    @classmethod
+    def load(cls, directory: str) -> "IVFPQIndex":
+        """Load a saved index; vectors are memory-mapped, codes are read into memory."""
+        with open(os.path.join(directory, INDEX_FILE)) as f:
+            settings = json.load(f)
+        index = cls(settings["dimension"], n_lists=settings["n_lists"], n_subvectors=settings["n_subvectors"],
+                    n_probe=settings["n_probe"], rescore=settings["rescore"])
+        index.coarse = np.load(os.path.join(directory, "coarse.npy"))
+        index.codebooks = np.load(os.path.join(directory, "codebooks.npy"))
+        index.codes = np.load(os.path.join(directory, "codes.npy"))
+        index.lists = np.load(os.path.join(directory, "lists.npy"))
+        index.directory = os.path.abspath(directory)
+        index._stored = index._map_vectors(settings["count"])
+        return index
+
+    def memory_bytes(self) -> int:
+        """Bytes held in memory: quantizers, codes and partition assignments."""
+        return int(self.coarse.nbytes + self.codebooks.nbytes + self.codes.nbytes + self.lists.nbytes)
+
+
+class IVFPQStorage:
+    """Search a corpus artifact through an IVF-PQ index of its rows.
+
+    Has the search interface of the storage classes, so it can serve
+    NyayaRAGAgent locally. Index row ``i`` is artifact row ``i``.
+    """
+
+    def __init__(self, artifact: Any, index: IVFPQIndex, embedder: Any = None):
+        """Initialize the storage.
+
+        Args:
+            artifact: CorpusArtifact holding texts and metadata
+            index: IVFPQIndex built over the artifact's embeddings
+            embedder: Model used to embed text queries in search()
+        """
+        if len(index) != len(artifact):
+            raise ValueError(f"Index has {len(index)} rows but the artifact has {len(artifact)}")
+        self.artifact = artifact
+        self.index = index
+        self.embedder = embedder
+        self._columns: Dict[str, np.ndarray] = {}
+
+    def _column(self, name: str) -> Optional[np.ndarray]:
+        """A whole artifact column, decoded once for filtering."""
+        if name not in self.artifact.columns:
+            return None
+        if name not in self._columns:
+            values = self.artifact.column(name)
+            kind = self.artifact.columns[name]
+            self._columns[name] = np.asarray(values, dtype=object if kind in ("str", "json") else None)
+        return self._columns[name]
+
+    @classmethod
+    def build(cls, artifact: Any, n_lists: int = None, n_subvectors: int = 16, train_size: int = 100000,
+              embedder: Any = None) -> "IVFPQStorage":
+        """Train and fill an index from an artifact's embeddings."""
+        n_lists = n_lists or max(1, min(65536, int(4 * np.sqrt(len(artifact)))))
+        index = IVFPQIndex(artifact.dimension, n_lists=n_lists, n_subvectors=n_subvectors)
+        index.train(artifact.embeddings, sample_size=train_size)
+        for start in range(0, len(artifact), 65536):
+            index.add(artifact.embeddings[start:start + 65536])
+        return cls(artifact, index, embedder=embedder)
+
+    def search(self, query: str, n_results: int = 5, document_name: str = None,
+               filters: FilterSpec = None) -> List[Dict[str, Any]]:
+        """Search for similar chunks using text query."""
+        if self.embedder is None:
+            from .query_encoder import get_query_encoder
+            self.embedder = get_query_encoder()
+        query_embedding = self.embedder.encode([query])[0]
+        return self.search_by_embedding(query_embedding, n_results=n_results, document_name=document_name,
+                                        filters=filters)
+
+    def search_by_embedding(self, query_embedding: np.ndarray, n_results: int = 5, document_name: str = None,
+                            filters: FilterSpec = None, n_probe: int = None,
+                            rescore: int = None) -> List[Dict[str, Any]]:
+        """Search for similar chunks using embedding vector."""
+        allowed = None
+        if document_name:
+            if document_name not in self.artifact.documents:
+                return []
+            start, stop = self.artifact.document_range(document_name)
+            allowed = np.zeros(len(self.artifact), dtype=bool)
+            allowed[start:stop] = True
+        where = combine(filters)
+        if where is not None:
+            selected = mask(where, self._column, len(self.artifact))
+            allowed = selected if allowed is None else allowed & selected
+
+        rows, scores = self.index.search(query_embedding, k=n_results, n_probe=n_probe, rescore=rescore,
+                                         allowed=allowed)
+        results = []
+        for row, score in zip(rows.tolist(), scores.tolist()):
+            results.append({
+                'id': self.artifact.column("id", row, row + 1)[0],
+                'text': self.artifact.text(row),
+                'distance': 1 - score,
+                'metadata': {**self.artifact.metadata(row, row + 1)[0],
+                             "document_name": self.artifact.column("document_name", row, row + 1)[0]}
+            })
+        return results
+
+    def get_index_info(self) -> Dict[str, Any]:
+        """Get information about the index."""
+        return {
+            "name": self.index.directory or "ivfpq",
+            "dimension": self.index.dimension,
+            "total_vector_count": len(self.index),
+            "n_lists": self.index.n_lists,
+            "n_subvectors": self.index.n_subvectors,
+            "memory_bytes": self.index.memory_bytes()
+        }
@@ -0,0 +1,105 @@
+"""Part, Chapter, Article and Schedule of chunks and questions.
+
+Chunk metadata gets flat ``part``, ``chapter``, ``article`` and
+``schedule`` fields from docling's heading path (and, for articles, the
+first article that starts in the chunk text), and questions are mapped
+to the same fields, so retrieval can filter on them. Values are
+normalized the same way on both sides: parts and chapters as upper-case
+Roman numerals, articles as their number with any letter suffix
+("21A"), and schedules as Arabic numerals ("Seventh Schedule" -> "7").
+"""
+
+import re
+from typing import List, Dict
+from .decomposer import REFERENCE
+
+STRUCTURE_FIELDS = ("part", "chapter", "article", "schedule")
+
+ORDINALS = {
+    "first": 1, "second": 2, "third": 3, "fourth": 4, "fifth": 5, "sixth": 6,
+    "seventh": 7, "eighth": 8, "ninth": 9, "tenth": 10, "eleventh": 11, "twelfth": 12
+}
+ROMAN = {"I": 1, "V": 5, "X": 10, "L": 50, "C": 100}
+
+PART = re.compile(r'\bpart\s+([IVXLC]+[A-Z]?)\b', re.IGNORECASE)
+CHAPTER = re.compile(r'\bchapter\s+([IVXLC]+|\d+)\b', re.IGNORECASE)
+SCHEDULE = re.compile(
+    r'\b(' + '|'.join(ORDINALS) + r')\s+schedule\b|\bschedule\s+([IVXLC]+|\d+)\b',
+    re.IGNORECASE
+)
+ARTICLE_REFERENCE = re.compile(r'\b(?:article|art\.)\s*(\d+[A-Z]{0,2})\b', re.IGNORECASE)
+# An article heading or the start of an article in the text, e.g. "21A. Right to education."
+ARTICLE_START = re.compile(r'^\s*(?:article\s+)?(\d+[A-Z]{0,2})\.\s+\S', re.IGNORECASE | re.MULTILINE)
+
+
+def _roman_to_int(numeral: str) -> int:
+    total = 0
+    for i, char in enumerate(numeral):
+        value = ROMAN[char]
+        total += -value if i + 1 < len(numeral) and ROMAN[numeral[i + 1]] > value else value
+    return total
+
+
+def _schedule_number(match: re.Match) -> str:
+    ordinal, number = match.group(1), match.group(2)
+    if ordinal:
+        return str(ORDINALS[ordinal.lower()])
+    return number if number.isdigit() else str(_roman_to_int(number.upper()))
+
+
+def _chapter_number(value: str) -> str:
+    return value.upper() if not value.isdigit() else value
+
+
+def structure_metadata(headings: List[str], text: str = "") -> Dict[str, str]:
+    """Flat structural fields for a chunk.
+
+    The deepest heading that names a part, chapter or schedule wins. The
+    article comes from the headings, or else from the first article that
+    starts in the chunk text (outside schedules).
+    """
+    fields = {}
+    for heading in headings:
+        match = PART.search(heading)
+        if match:
+            fields["part"] = match.group(1).upper()
+            # A new part starts a new chapter numbering
+            fields.pop("chapter", None)
+        match = CHAPTER.search(heading)
+        if match:
+            fields["chapter"] = _chapter_number(match.group(1))
+        match = SCHEDULE.search(heading)
+        if match:
+            fields["schedule"] = _schedule_number(match)
+        match = ARTICLE_START.match(heading) or ARTICLE_REFERENCE.match(heading.strip())
+        if match:
+            fields["article"] = match.group(1).upper()
+
+    # Numbered entries in schedules are not articles
+    if "article" not in fields and "schedule" not in fields and text:
+        match = ARTICLE_START.search(text)
+        if match:
+            fields["article"] = match.group(1).upper()
+    return fields
+
+
+def question_structure(question: str) -> Dict[str, str]:
+    """Structural fields a question unambiguously refers to.
+
+    A field is only returned when the question names exactly one value
+    for it; "Articles 14 and 21" restricts nothing.
+    """
+    values = {field: set() for field in STRUCTURE_FIELDS}
+    for match in REFERENCE.finditer(question):
+        reference = match.group(0)
+        for field, pattern in (("part", PART), ("article", ARTICLE_REFERENCE), ("schedule", SCHEDULE)):
+            found = pattern.search(reference)
+            if not found:
+                continue
+            if field == "schedule":
+                values[field].add(_schedule_number(found))
+            else:
+                values[field].add(found.group(1).upper())
+    for match in CHAPTER.finditer(question):
+        values["chapter"].add(_chapter_number(match.group(1)))
+    return {field: found.pop() for field, found in values.items() if len(found) == 1}
@@ -1,33 +1,241 @@
-"""Logging configuration for NyayaGPT."""
+"""Logging configuration for NyayaGPT.
 
+Loggers only put records on a bounded queue; a background listener
+thread formats them and writes them to the console and to a rotating
+JSON-lines file. If the queue is full, records are dropped and counted
+rather than blocking the caller, so log I/O never stalls a request or
+an upload loop.
+
+Importing this module only sets logger levels. The queue, the listener
+thread and the log file are set up by ``configure_logging()``, which an
+entry point may call explicitly and which otherwise runs when the first
+record is emitted.
+"""
+
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
+import multiprocessing
+import os
+import queue
 import sys
+import threading
+from contextlib import contextmanager
 from datetime import datetime
+from config.config import config
+
+
+ROOT_LOGGER = "nyayagpt"
+
+_listener = None
+_queue_handler = None
+_configure_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON objects."""
+
+    # Attributes every LogRecord has; anything else was passed via extra=
+    RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "timestamp": datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in self.RESERVED:
+                data[key] = value
+        if record.exc_text or record.exc_info:
+            data["exception"] = record.exc_text or self.formatException(record.exc_info)
+        return json.dumps(data, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that drops records instead of blocking when full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Make the record safe to hand to another thread or process.
+
+        The base class formats the traceback into the message and clears
+        ``exc_info``, which would leave the JSON ``exception`` field empty.
+        Here the message is merged with its arguments and the traceback is
+        kept separately in ``exc_text``, which formatters print in place of
+        ``exc_info``.
+        """
+        # Attach the trace ID while still on the calling thread
+        from .tracing import current_trace_id
+        record = copy.copy(record)
+        trace_id = current_trace_id()
+        if trace_id:
+            record.trace_id = trace_id
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _DeferredHandler(logging.Handler):
+    """Configure logging when the first record arrives, then hand it on."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        configure_logging()
+        _queue_handler.handle(record)
+
+
+class _ForwardHandler(logging.Handler):
+    """Hand records from worker processes to this process's loggers."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        logging.getLogger(record.name).handle(record)
+
+
+def configure_worker_logging(log_queue) -> None:
+    """Send a worker process's records to the queue of ``worker_logging``.
+
+    Used as a ProcessPoolExecutor initializer. A forked worker inherits
+    the parent's queue handler but not its listener thread, so records
+    put on the inherited queue would never be written. The worker never
+    opens the log file itself.
+    """
+    global _queue_handler
+    root = logging.getLogger(ROOT_LOGGER)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    _queue_handler = DroppingQueueHandler(log_queue)
+    root.addHandler(_queue_handler)
 
 
-def setup_logger(name: str = "nyayagpt", level: int = logging.INFO) -> logging.Logger:
+@contextmanager
+def worker_logging(context=None):
+    """Write the log records of worker processes through this process's handlers.
+
+    Yields the ``initializer`` and ``initargs`` to pass to a
+    ProcessPoolExecutor using the multiprocessing ``context`` (default:
+    the default one); the pool must be shut down before the block ends.
+    """
+    log_queue = (context or multiprocessing.get_context()).Queue(config.logging.queue_size)
+    listener = logging.handlers.QueueListener(log_queue, _ForwardHandler())
+    listener.start()
+    try:
+        yield configure_worker_logging, (log_queue,)
+    finally:
+        listener.stop()
+        log_queue.close()
+
+
+def _parse_module_levels(spec: str) -> dict:
+    """Parse 'storage=DEBUG,rag_agent=WARNING' into logger levels."""
+    levels = {}
+    for item in spec.split(','):
+        if '=' in item:
+            module, level = item.split('=', 1)
+            levels[module.strip()] = level.strip().upper()
+    return levels
+
+
+def _set_levels(logging_config) -> None:
+    """Apply the root and per-module levels; opens nothing."""
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(logging_config.level.upper())
+    root.propagate = False
+
+    for module, level in _parse_module_levels(logging_config.module_levels).items():
+        logging.getLogger(f"{ROOT_LOGGER}.{module}").setLevel(level)
+
+
+def configure_logging(logging_config=None) -> None:
+    """Set up the queue, background listener and handlers once."""
+    global _listener, _queue_handler
+
+    with _configure_lock:
+        if _listener is not None:
+            return
+
+        logging_config = logging_config or config.logging
+        _set_levels(logging_config)
+        handlers = []
+
+        # Console handler
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(logging.Formatter(logging_config.format, datefmt='%Y-%m-%d %H:%M:%S'))
+        handlers.append(console_handler)
+
+        # Rotating JSON file handler
+        if logging_config.file:
+            directory = os.path.dirname(logging_config.file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            file_handler = logging.handlers.RotatingFileHandler(
+                logging_config.file,
+                maxBytes=logging_config.max_bytes,
+                backupCount=logging_config.backup_count,
+                encoding='utf-8'
+            )
+            file_handler.setFormatter(JsonFormatter())
+            handlers.append(file_handler)
+
+        _queue_handler = DroppingQueueHandler(queue.Queue(maxsize=logging_config.queue_size))
+        _listener = logging.handlers.QueueListener(_queue_handler.queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+        root = logging.getLogger(ROOT_LOGGER)
+        root.removeHandler(_deferred_handler)
+        root.addHandler(_queue_handler)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def dropped_records() -> int:
+    """Number of records dropped because the queue was full."""
+    return _queue_handler.dropped if _queue_handler else 0
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Get a logger for a module, e.g. get_logger(__name__) in utils/storage.py."""
+    if name.startswith("utils."):
+        name = name[len("utils."):]
+    if name == ROOT_LOGGER or name.startswith(f"{ROOT_LOGGER}."):
+        return logging.getLogger(name)
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def setup_logger(name: str = ROOT_LOGGER, level: int = None) -> logging.Logger:
     """Set up logger with consistent formatting."""
-    logger = logging.getLogger(name)
-    logger.setLevel(level)
-    
-    # Avoid adding multiple handlers
-    if logger.handlers:
-        return logger
-    
-    # Create formatter
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    
-    # Console handler
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(level)
-    console_handler.setFormatter(formatter)
-    
-    logger.addHandler(console_handler)
+    logger = get_logger(name)
+    if level is not None:
+        logger.setLevel(level)
     return logger
 
 
+_deferred_handler = _DeferredHandler()
+_set_levels(config.logging)
+logging.getLogger(ROOT_LOGGER).addHandler(_deferred_handler)
+
 # Default logger
 logger = setup_logger()
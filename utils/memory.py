@@ -0,0 +1,128 @@
+"""Bounded multi-turn conversation memory for the RAG agent."""
+
+import re
+import threading
+from dataclasses import dataclass
+from typing import List, Dict, Any, Callable, Optional
+
+
+# Follow-ups that lean on the previous turn instead of naming their subject
+ANAPHORIC_START = re.compile(
+    r'^\s*(and|also|but|so|then|what about|how about|what if|elaborate|continue)\b',
+    re.IGNORECASE
+)
+ANAPHORIC_WORDS = re.compile(
+    r'\b(it|its|it\'s|this|that|these|those|they|them|their|he|she|his|her|'
+    r'former|latter|above|same|such|said)\b',
+    re.IGNORECASE
+)
+EXPLICIT_REFERENCE = re.compile(
+    r'\b(article|part|schedule|chapter|section|amendment|preamble)\s*[\dIVXLC]*\b',
+    re.IGNORECASE
+)
+
+
+def is_anaphoric(question: str) -> bool:
+    """Check whether a question refers back to the previous turn."""
+    if EXPLICIT_REFERENCE.search(question):
+        return False
+    return bool(ANAPHORIC_START.search(question) or ANAPHORIC_WORDS.search(question))
+
+
+@dataclass
+class Turn:
+    """A single question and answer exchange."""
+    question: str
+    answer: str
+    tokens: int = 0
+
+
+class ConversationMemory:
+    """Conversation history kept under a fixed token budget.
+
+    Recent turns are kept verbatim. Whenever the history exceeds
+    ``max_tokens``, the oldest turns are folded one at a time into a
+    running summary, so the history sent with each prompt stays bounded
+    no matter how long the conversation runs.
+    """
+
+    def __init__(self, max_tokens: int = 1500, summary_max_tokens: int = 400,
+                 token_counter: Optional[Callable[[str], int]] = None,
+                 summarizer: Optional[Callable[[str, Turn], str]] = None):
+        """Initialize the memory.
+
+        Args:
+            max_tokens: Budget for the summary plus verbatim turns
+            summary_max_tokens: Budget for the running summary alone
+            token_counter: Function counting tokens in a string
+            summarizer: Function folding a turn into the running summary
+        """
+        if token_counter is None:
+            from .context_builder import count_tokens
+            token_counter = count_tokens
+
+        self.max_tokens = max_tokens
+        self.summary_max_tokens = summary_max_tokens
+        self.token_counter = token_counter
+        self.summarizer = summarizer or self._extractive_summary
+        self.summary = ""
+        self.summary_tokens = 0
+        self.turns: List[Turn] = []
+        self.last_question = ""
+        self.last_retrieved: List[Dict[str, Any]] = []
+        # time.monotonic() of the last request, for expiring idle sessions
+        self.last_used = 0.0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _extractive_summary(summary: str, turn: Turn) -> str:
+        """Fold a turn into the summary without calling an LLM."""
+        first_sentence = re.split(r'(?<=[.!?])\s', turn.answer.strip(), maxsplit=1)[0]
+        line = f"- Q: {turn.question} A: {first_sentence}"
+        return f"{summary}\n{line}".strip()
+
+    def history_tokens(self) -> int:
+        """Tokens used by the summary and verbatim turns."""
+        return self.summary_tokens + sum(turn.tokens for turn in self.turns)
+
+    def _fit_summary(self) -> None:
+        """Drop the oldest summary lines until the summary fits its budget."""
+        self.summary_tokens = self.token_counter(self.summary) if self.summary else 0
+        while self.summary_tokens > self.summary_max_tokens and '\n' in self.summary:
+            self.summary = self.summary.split('\n', 1)[1]
+            self.summary_tokens = self.token_counter(self.summary)
+        if self.summary_tokens > self.summary_max_tokens:
+            keep = int(len(self.summary) * self.summary_max_tokens / self.summary_tokens)
+            self.summary = self.summary[-keep:] if keep else ""
+            self.summary_tokens = self.token_counter(self.summary) if self.summary else 0
+
+    def add_turn(self, question: str, answer: str, retrieved: List[Dict[str, Any]]) -> None:
+        """Record a turn and compact older turns if over budget."""
+        turn = Turn(question, answer, self.token_counter(f"{question}\n{answer}"))
+        self.turns.append(turn)
+        self.last_question = question
+        self.last_retrieved = retrieved
+
+        # Incrementally fold the oldest turns into the summary
+        while self.turns and self.history_tokens() > self.max_tokens:
+            oldest = self.turns.pop(0)
+            self.summary = self.summarizer(self.summary, oldest)
+            self._fit_summary()
+
+    def messages(self) -> List[Dict[str, Any]]:
+        """Return the history as role/content messages."""
+        messages = []
+        if self.summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{self.summary}"})
+        for turn in self.turns:
+            messages.append({"role": "user", "content": turn.question})
+            messages.append({"role": "assistant", "content": turn.answer})
+        return messages
+
+    def clear(self) -> None:
+        """Forget the whole conversation."""
+        self.summary = ""
+        self.summary_tokens = 0
+        self.turns = []
+        self.last_question = ""
+        self.last_retrieved = []
@@ -0,0 +1,321 @@
+"""In-process metrics registry with Prometheus text exposition.
+
+Counters and histograms are striped over a fixed number of cells, each
+with its own lock; a thread writes to the cell its native thread ID maps
+to, so concurrent threads rarely contend, and the cells are summed when
+the registry is rendered. The number of cells does not grow with the
+number of threads, which matters under ThreadingHTTPServer's thread per
+connection.
+"""
+
+import bisect
+import functools
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple, Sequence
+
+
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+# Cells per counter or histogram child
+STRIPES = 16
+
+
+class _StripedCells:
+    """A fixed set of cells of a metric, each guarded by its own lock."""
+
+    def __init__(self, factory, stripes: int = STRIPES):
+        self._cells = [factory() for _ in range(stripes)]
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    def stripe(self):
+        """The calling thread's cell and its lock."""
+        i = threading.get_native_id() % len(self._cells)
+        return self._cells[i], self._locks[i]
+
+    def all(self) -> list:
+        """Copies of all cells."""
+        copies = []
+        for cell, lock in zip(self._cells, self._locks):
+            with lock:
+                copies.append(list(cell))
+        return copies
+
+
+class _Counter:
+    def __init__(self):
+        self._cells = _StripedCells(lambda: [0.0])
+
+    def inc(self, amount: float = 1.0) -> None:
+        cell, lock = self._cells.stripe()
+        with lock:
+            cell[0] += amount
+
+    @property
+    def value(self) -> float:
+        return sum(cell[0] for cell in self._cells.all())
+
+
+class _Gauge:
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self._value = float(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class _Histogram:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        # Each cell holds one count per bucket, the +Inf count and the sum
+        self._cells = _StripedCells(lambda: [0] * (len(self.buckets) + 1) + [0.0])
+
+    def observe(self, value: float) -> None:
+        bucket = bisect.bisect_left(self.buckets, value)
+        cell, lock = self._cells.stripe()
+        with lock:
+            cell[bucket] += 1
+            cell[-1] += value
+
+    def time(self):
+        """Context manager observing the duration of its block."""
+        return _Timer(self)
+
+    def snapshot(self) -> Tuple[List[int], int, float]:
+        """Cumulative bucket counts, total count and sum."""
+        totals = [0] * (len(self.buckets) + 1)
+        total_sum = 0.0
+        for cell in self._cells.all():
+            for i in range(len(totals)):
+                totals[i] += cell[i]
+            total_sum += cell[-1]
+        cumulative = []
+        running = 0
+        for count in totals:
+            running += count
+            cumulative.append(running)
+        return cumulative, running, total_sum
+
+
+class _Timer:
+    def __init__(self, histogram: _Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+class Metric:
+    """A named metric family with optional labels."""
+
+    def __init__(self, kind: str, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.kind = kind
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        if self.kind == "counter":
+            return _Counter()
+        if self.kind == "gauge":
+            return _Gauge()
+        return _Histogram(self.buckets)
+
+    def labels(self, *values, **kwargs):
+        """Return the child metric for a label combination."""
+        if kwargs:
+            values = tuple(str(kwargs[name]) for name in self.labelnames)
+        else:
+            values = tuple(str(value) for value in values)
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    # Label-less metrics can be used directly
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def render(self) -> List[str]:
+        """Render the family in the Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            children = list(self._children.items())
+
+        for values, child in children:
+            labels = ",".join(f'{name}="{value}"' for name, value in zip(self.labelnames, values))
+            if self.kind != "histogram":
+                suffix = f"{{{labels}}}" if labels else ""
+                lines.append(f"{self.name}{suffix} {child.value}")
+                continue
+
+            cumulative, count, total = child.snapshot()
+            bounds = [str(bound) for bound in self.buckets] + ["+Inf"]
+            for bound, bucket_count in zip(bounds, cumulative):
+                bucket_labels = f'{labels},le="{bound}"' if labels else f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{{{bucket_labels}}} {bucket_count}")
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{self.name}_count{suffix} {count}")
+            lines.append(f"{self.name}_sum{suffix} {total}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metric families and renders them."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, kind: str, name: str, documentation: str, labelnames, **kwargs) -> Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = Metric(kind, name, documentation, labelnames, **kwargs)
+            elif metric.kind != kind:
+                raise ValueError(f"Metric {name} already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Metric:
+        return self._get_or_create("counter", name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Metric:
+        return self._get_or_create("gauge", name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> Metric:
+        return self._get_or_create("histogram", name, documentation, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str) -> None:
+        """Write the text exposition to a file."""
+        with open(path, 'w') as f:
+            f.write(self.render())
+
+
+registry = MetricsRegistry()
+
+# Pipeline metrics
+STAGE_LATENCY = registry.histogram(
+    "nyayagpt_stage_latency_seconds", "Latency of each RAG pipeline stage", ["stage"])
+REQUESTS = registry.counter(
+    "nyayagpt_requests_total", "Questions answered by the RAG agent", ["status"])
+INFLIGHT_REQUESTS = registry.gauge(
+    "nyayagpt_inflight_requests", "Questions currently being answered")
+CACHE_LOOKUPS = registry.counter(
+    "nyayagpt_cache_lookups_total", "Cache lookups by cache and result", ["cache", "result"])
+BACKEND_LATENCY = registry.histogram(
+    "nyayagpt_backend_latency_seconds", "Latency of vector store calls", ["backend", "operation"])
+BACKEND_ERRORS = registry.counter(
+    "nyayagpt_backend_errors_total", "Failed vector store calls", ["backend", "operation"])
+LLM_TOKENS = registry.counter(
+    "nyayagpt_llm_tokens_total", "LLM tokens used", ["kind"])
+EMBEDDING_BATCH_SIZE = registry.histogram(
+    "nyayagpt_embedding_batch_size", "Number of texts per encode call", ["source"], buckets=BATCH_SIZE_BUCKETS)
+BATCH_SIZE = registry.histogram(
+    "nyayagpt_microbatch_size", "Items per micro-batch", ["batcher"], buckets=BATCH_SIZE_BUCKETS)
+BATCH_QUEUE_DELAY = registry.histogram(
+    "nyayagpt_microbatch_queue_delay_seconds", "Time a request waited before its batch ran", ["batcher"],
+    buckets=(0.0001, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0))
+UPLOADED_VECTORS = registry.counter(
+    "nyayagpt_uploaded_vectors_total", "Vectors uploaded to a vector store", ["backend"])
+UPLOAD_THROUGHPUT = registry.gauge(
+    "nyayagpt_upload_vectors_per_second", "Throughput of the most recent upload", ["backend"])
+COLLAPSED_CHUNKS = registry.counter(
+    "nyayagpt_collapsed_chunks_total", "Duplicate chunks collapsed at ingest", ["kind"])
+VALIDATION_FAILURES = registry.counter(
+    "nyayagpt_validation_failures_total", "Upload batches rejected by pre-flight validation", ["backend", "check"])
+
+
+def timed_backend_call(backend: str, operation: str):
+    """Decorator recording latency and errors of a vector store call."""
+    def decorator(function):
+        latency = BACKEND_LATENCY.labels(backend, operation)
+        errors = BACKEND_ERRORS.labels(backend, operation)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            except Exception:
+                errors.inc()
+                raise
+            finally:
+                latency.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def record_upload(backend: str, vectors: int, seconds: float) -> None:
+    """Count uploaded vectors and record the upload's throughput."""
+    UPLOADED_VECTORS.labels(backend).inc(vectors)
+    if seconds > 0:
+        UPLOAD_THROUGHPUT.labels(backend).set(vectors / seconds)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve /metrics for Prometheus to scrape from a daemon thread."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True)
+    thread.start()
+    return server
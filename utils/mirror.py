@@ -0,0 +1,502 @@
+"""Local read-through mirror of a remote vector index.
+
+Queries to Pinecone or Chroma Cloud pay their tail latency and fail
+with their outages. A ``LocalMirror`` keeps a copy of the remote index
+on local disk and answers queries with an exact scan of memory-mapped
+vectors:
+
+- ``vectors.<g>.f32``: normalized float32 rows, appended
+- ``texts.<g>.utf8``: chunk texts, appended
+- ``records.<g>.jsonl``: one line per upsert (ID, text span, metadata)
+  or deletion, appended; replaying it gives the live rows
+- ``mirror.json``: the valid length of each file, the sync watermark
+  and the outcome of the last sync, replaced atomically
+
+Readers only look at the lengths in ``mirror.json``. Syncs and
+compactions hold an exclusive ``flock`` on ``mirror.lock``, so the agent
+and scripts/sync_mirror.py can share a directory. A sync first re-reads
+``mirror.json`` to pick up rows that another process committed. Then it
+truncates anything written past the committed lengths, which is what an
+interrupted sync leaves behind. Opening a mirror takes a shared lock and
+never truncates. Once dead rows outnumber live ones (and there are more
+than a thousand) the live rows are compacted into generation ``<g + 1>``.
+
+``sync()`` lists the remote IDs and fetches only what changed: new IDs
+are fetched, missing IDs are deleted, and the first chunk of every
+mirrored document is re-fetched to detect documents that were
+re-ingested under the same IDs (their ``created_at`` changes).
+``MirrorSyncer`` runs it on a schedule and ``MirroredStorage`` answers
+from the mirror while it is fresh enough, falling back to the remote
+index.
+"""
+
+import fcntl
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+import numpy as np
+from .filters import F, FilterSpec, combine, mask
+from .metrics import registry
+from .logger import get_logger
+from config.config import config
+
+logger = get_logger(__name__)
+
+STATE_FILE = "mirror.json"
+LOCK_FILE = "mirror.lock"
+FORMAT_NAME = "nyayagpt-mirror"
+CHUNK_ID = re.compile(r'^(.*)_(\d+)$')
+
+MIRROR_QUERIES = registry.counter(
+    "nyayagpt_mirror_queries_total", "Queries answered by the local mirror or the remote index", ["source"])
+MIRROR_ROWS = registry.gauge(
+    "nyayagpt_mirror_rows", "Live rows in the local mirror")
+MIRROR_LAST_SYNC = registry.gauge(
+    "nyayagpt_mirror_last_sync_timestamp_seconds", "Start time of the last successful mirror sync")
+
+
+def _document_of(chunk_id: str) -> str:
+    match = CHUNK_ID.match(chunk_id)
+    return match.group(1) if match else chunk_id
+
+
+def _chunk_number(chunk_id: str) -> int:
+    match = CHUNK_ID.match(chunk_id)
+    return int(match.group(2)) if match else 0
+
+
+class _View:
+    """Immutable snapshot of the mirror that queries read."""
+
+    def __init__(self, directory: str, generation: int, dimension: int, rows: int, text_bytes: int,
+                 ids: List[str], text_spans: np.ndarray, metadatas: List[Dict[str, Any]], live: np.ndarray):
+        self.dimension = dimension
+        self.ids = ids
+        self.text_spans = text_spans
+        self.metadatas = metadatas
+        self.live = live
+        self.vectors = (np.memmap(os.path.join(directory, f"vectors.{generation}.f32"), dtype='<f4', mode='r',
+                                  shape=(rows, dimension))
+                        if rows else np.zeros((0, dimension), dtype=np.float32))
+        self.texts = (np.memmap(os.path.join(directory, f"texts.{generation}.utf8"), dtype=np.uint8, mode='r',
+                                shape=(text_bytes,))
+                      if text_bytes else np.zeros(0, dtype=np.uint8))
+        self._columns: Dict[str, np.ndarray] = {}
+
+    def text(self, row: int) -> str:
+        start, length = self.text_spans[row]
+        return bytes(self.texts[start:start + length]).decode('utf-8')
+
+    def column(self, name: str) -> Optional[np.ndarray]:
+        """Values of a metadata field for the live rows, or None if no row has it."""
+        if name not in self._columns:
+            values = [self.metadatas[row].get(name) for row in self.live]
+            if all(value is None for value in values):
+                self._columns[name] = None
+            else:
+                self._columns[name] = np.array(values, dtype=object)
+        return self._columns[name]
+
+
+class LocalMirror:
+    """Memory-mapped copy of a remote vector index."""
+
+    def __init__(self, directory: str):
+        """Open or create a mirror directory."""
+        self.directory = directory
+        self._sync_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        with self._locked(exclusive=False):
+            self.state = self._read_state()
+            self._replay()
+
+    # Files
+
+    @contextmanager
+    def _locked(self, exclusive: bool = True):
+        """Hold the directory's lock file, shared or exclusive, across processes."""
+        with open(os.path.join(self.directory, LOCK_FILE), 'a') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _read_state(self) -> Dict[str, Any]:
+        """Load the committed state from ``mirror.json``."""
+        path = os.path.join(self.directory, STATE_FILE)
+        if not os.path.exists(path):
+            return {"format": FORMAT_NAME, "generation": 0, "dimension": None, "rows": 0,
+                    "text_bytes": 0, "record_bytes": 0, "source": None, "synced_at": None,
+                    "watermark": None, "last_attempt": None, "last_error": None, "last_sync": None}
+        with open(path) as f:
+            state = json.load(f)
+        if state.get("format") != FORMAT_NAME:
+            raise ValueError(f"{self.directory} is not a vector index mirror")
+        return state
+
+    def _reload(self) -> None:
+        """Pick up what other processes committed; call with the exclusive lock held."""
+        state = self._read_state()
+        changed = (state["generation"], state["record_bytes"]) != \
+            (self.state["generation"], self.state["record_bytes"])
+        self.state = state
+        if changed:
+            self._replay()
+
+    def _path(self, kind: str, generation: int = None) -> str:
+        generation = self.state["generation"] if generation is None else generation
+        extension = {"vectors": "f32", "texts": "utf8", "records": "jsonl"}[kind]
+        return os.path.join(self.directory, f"{kind}.{generation}.{extension}")
+
+    def _truncate(self) -> None:
+        """Cut off anything an interrupted sync appended."""
+        dimension = self.state["dimension"] or 0
+        for kind, size in (("vectors", self.state["rows"] * dimension * 4),
+                           ("texts", self.state["text_bytes"]),
+                           ("records", self.state["record_bytes"])):
+            path = self._path(kind)
+            with open(path, 'ab') as f:
+                if f.tell() != size:
+                    f.truncate(size)
+
+    def _replay(self) -> None:
+        """Rebuild the in-memory row table from the record log."""
+        self._ids: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        spans = []
+        self._rows: Dict[str, int] = {}
+        path = self._path("records")
+        data = b""
+        if os.path.exists(path):
+            # Only the committed part; a sync in another process may be appending
+            with open(path, 'rb') as f:
+                data = f.read(self.state["record_bytes"])
+        for line in data.splitlines():
+            record = json.loads(line)
+            if record.get("deleted"):
+                self._rows.pop(record["id"], None)
+                continue
+            self._rows[record["id"]] = len(self._ids)
+            self._ids.append(record["id"])
+            spans.append(record["text"])
+            self._metadatas.append(record["metadata"])
+        self._spans = np.array(spans, dtype=np.int64).reshape(-1, 2)
+        self._publish()
+
+    def _publish(self) -> None:
+        """Make the current rows visible to queries."""
+        live = np.array(sorted(self._rows.values()), dtype=np.int64)
+        self._view = _View(self.directory, self.state["generation"], self.state["dimension"] or 0,
+                           self.state["rows"], self.state["text_bytes"], self._ids, self._spans,
+                           self._metadatas, live)
+        MIRROR_ROWS.set(len(live))
+
+    def _save_state(self) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, os.path.join(self.directory, STATE_FILE))
+
+    def _append(self, records: List[Dict[str, Any]], deleted: List[str]) -> None:
+        """Append fetched records and deletions, then commit the new lengths."""
+        if records and self.state["dimension"] is None:
+            self.state["dimension"] = len(records[0]["embedding"])
+        dimension = self.state["dimension"]
+
+        lines = [json.dumps({"id": chunk_id, "deleted": True}) + "\n" for chunk_id in deleted]
+        spans = []
+        if records:
+            vectors = np.stack([np.asarray(record["embedding"], dtype=np.float32) for record in records])
+            if vectors.shape[1] != dimension:
+                raise ValueError(f"Remote vectors have dimension {vectors.shape[1]}, mirror has {dimension}")
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+            texts = [(record["text"] or "").encode('utf-8') for record in records]
+            offset = self.state["text_bytes"]
+            for record, text in zip(records, texts):
+                spans.append([offset, len(text)])
+                lines.append(json.dumps({"id": record["id"], "text": [offset, len(text)],
+                                         "metadata": record["metadata"]}) + "\n")
+                offset += len(text)
+            with open(self._path("vectors"), 'ab') as f:
+                f.write(vectors.astype('<f4').tobytes())
+            with open(self._path("texts"), 'ab') as f:
+                f.write(b"".join(texts))
+        encoded = "".join(lines).encode('utf-8')
+        with open(self._path("records"), 'ab') as f:
+            f.write(encoded)
+            f.flush()
+            os.fsync(f.fileno())
+
+        for chunk_id in deleted:
+            self._rows.pop(chunk_id, None)
+        for record in records:
+            self._rows[record["id"]] = len(self._ids)
+            self._ids.append(record["id"])
+            self._metadatas.append(record["metadata"])
+        if spans:
+            self._spans = np.concatenate([self._spans, np.array(spans, dtype=np.int64)])
+        self.state["rows"] += len(records)
+        self.state["text_bytes"] += sum(span[1] for span in spans)
+        self.state["record_bytes"] += len(encoded)
+
+    def _compact(self) -> None:
+        """Rewrite the live rows into the next generation of files."""
+        view = self._view
+        old_generation = self.state["generation"]
+        records = [{"id": view.ids[row], "text": view.text(row), "metadata": view.metadatas[row],
+                    "embedding": np.asarray(view.vectors[row])} for row in view.live]
+        self.state.update(generation=old_generation + 1, rows=0, text_bytes=0, record_bytes=0)
+        self._truncate()
+        self._ids, self._metadatas, self._rows = [], [], {}
+        self._spans = np.zeros((0, 2), dtype=np.int64)
+        self._append(records, [])
+        self._save_state()
+        for kind in ("vectors", "texts", "records"):
+            os.unlink(self._path(kind, old_generation))
+        logger.info(f"Compacted mirror {self.directory} to {len(records)} rows")
+
+    # Sync
+
+    def sync(self, remote: Any, batch_size: int = None) -> Dict[str, Any]:
+        """Bring the mirror up to date with a remote storage.
+
+        ``remote`` needs ``list_ids()`` (yielding lists of IDs) and
+        ``fetch(ids)`` (returning dicts with id, text, embedding and
+        metadata), as PineconeStorage and CloudChromaStorage provide.
+        Returns counts of added, updated and deleted rows. Other processes
+        syncing the same directory wait for the lock.
+        """
+        batch_size = batch_size or config.mirror.fetch_batch_size
+        with self._sync_lock, self._locked():
+            self._reload()
+            self._truncate()
+            started = time.time()
+            self.state["last_attempt"] = datetime.fromtimestamp(started).isoformat()
+            try:
+                summary = self._sync(remote, batch_size)
+            except Exception as e:
+                self.state["last_error"] = f"{type(e).__name__}: {e}"
+                self._save_state()
+                logger.error(f"Mirror sync failed: {e}")
+                raise
+            summary["seconds"] = round(time.time() - started, 3)
+            self.state.update(synced_at=started, last_error=None, last_sync=summary,
+                              source=getattr(remote, "index_name", None) or
+                              getattr(getattr(remote, "collection", None), "name", None))
+            self._save_state()
+            MIRROR_LAST_SYNC.set(started)
+            logger.info(f"Synced mirror: {summary['added']} added, {summary['updated']} updated, "
+                        f"{summary['deleted']} deleted in {summary['seconds']}s", extra=summary)
+            return summary
+
+    def _sync(self, remote: Any, batch_size: int) -> Dict[str, Any]:
+        remote_ids = set()
+        for ids in remote.list_ids():
+            remote_ids.update(ids)
+        local_ids = set(self._rows)
+        added = sorted(remote_ids - local_ids)
+        deleted = sorted(local_ids - remote_ids)
+
+        # Re-ingested documents keep their IDs; their first chunk shows the change
+        first_chunks: Dict[str, str] = {}
+        for chunk_id in sorted(local_ids & remote_ids, key=_chunk_number):
+            first_chunks.setdefault(_document_of(chunk_id), chunk_id)
+        changed_documents = set()
+        sentinels = list(first_chunks.values())
+        for start in range(0, len(sentinels), batch_size):
+            for record in remote.fetch(sentinels[start:start + batch_size]):
+                local = self._metadatas[self._rows[record["id"]]]
+                if record["metadata"].get("created_at") != local.get("created_at"):
+                    changed_documents.add(_document_of(record["id"]))
+        updated = sorted(chunk_id for chunk_id in local_ids & remote_ids
+                         if _document_of(chunk_id) in changed_documents)
+
+        to_fetch = added + updated
+        if deleted:
+            self._append([], deleted)
+        for start in range(0, len(to_fetch), batch_size):
+            self._append(remote.fetch(to_fetch[start:start + batch_size]), [])
+        self._publish()
+
+        dead = self.state["rows"] - len(self._rows)
+        if dead > max(len(self._rows), 1000):
+            self._compact()
+            self._publish()
+
+        created = [metadata.get("created_at") for metadata in self._metadatas if metadata.get("created_at")]
+        if created:
+            self.state["watermark"] = max(created)
+        return {"added": len(added), "updated": len(updated), "deleted": len(deleted),
+                "remote_ids": len(remote_ids)}
+
+    # Status
+
+    def staleness(self) -> Optional[float]:
+        """Seconds since the start of the last successful sync, None if never synced."""
+        synced_at = self.state["synced_at"]
+        return None if synced_at is None else max(0.0, time.time() - synced_at)
+
+    def status(self) -> Dict[str, Any]:
+        """Sync watermark, staleness and outcome of the last sync."""
+        staleness = self.staleness()
+        synced_at = self.state["synced_at"]
+        return {
+            "directory": self.directory,
+            "source": self.state["source"],
+            "rows": len(self._view.live),
+            "dead_rows": self.state["rows"] - len(self._view.live),
+            "dimension": self.state["dimension"],
+            "synced_at": datetime.fromtimestamp(synced_at).isoformat() if synced_at else None,
+            "staleness_seconds": round(staleness, 1) if staleness is not None else None,
+            "watermark": self.state["watermark"],
+            "last_attempt": self.state["last_attempt"],
+            "last_error": self.state["last_error"],
+            "last_sync": self.state["last_sync"]
+        }
+
+    def __len__(self) -> int:
+        return len(self._view.live)
+
+    # Search
+
+    def search_by_embedding(self, query_embedding: np.ndarray, n_results: int = 5, document_name: str = None,
+                            filters: FilterSpec = None, block_size: int = 65536) -> List[Dict[str, Any]]:
+        """Exact cosine search over the mirrored vectors."""
+        view = self._view
+        where = combine(F("document_name") == document_name if document_name else None, filters)
+        rows = view.live
+        if where is not None:
+            rows = rows[mask(where, view.column, len(rows))]
+        if not len(rows):
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        scores = np.concatenate([np.asarray(view.vectors[rows[start:start + block_size]]) @ query
+                                 for start in range(0, len(rows), block_size)])
+        top = np.argsort(-scores)[:n_results] if len(scores) <= n_results else \
+            np.argpartition(-scores, n_results - 1)[:n_results]
+        top = top[np.argsort(-scores[top])]
+        return [{
+            'id': view.ids[rows[i]],
+            'text': view.text(rows[i]),
+            'distance': 1 - float(scores[i]),
+            'metadata': view.metadatas[rows[i]]
+        } for i in top]
+
+
+class MirrorSyncer:
+    """Background thread syncing a mirror every ``interval`` seconds."""
+
+    def __init__(self, mirror: LocalMirror, remote: Any, interval: float = None):
+        self.mirror = mirror
+        self.remote = remote
+        self.interval = interval or config.mirror.sync_interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="mirror-sync", daemon=True)
+
+    def start(self) -> "MirrorSyncer":
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.mirror.sync(self.remote)
+            except Exception:
+                # Recorded in the mirror status; the next run retries
+                pass
+            self._stop.wait(self.interval)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+class MirroredStorage:
+    """Storage answering queries from a local mirror, falling back to the remote.
+
+    The mirror is used while it has been synced within ``max_staleness``
+    seconds; otherwise, or if the local search fails, the remote index
+    is queried. If the remote fails too, a stale mirror still answers.
+    Writes go to the remote and reach the mirror with the next sync.
+    """
+
+    def __init__(self, remote: Any, mirror: LocalMirror, max_staleness: float = None):
+        self.remote = remote
+        self.mirror = mirror
+        self.max_staleness = config.mirror.max_staleness if max_staleness is None else max_staleness
+
+    def _fresh(self) -> bool:
+        staleness = self.mirror.staleness()
+        return staleness is not None and staleness <= self.max_staleness and len(self.mirror) > 0
+
+    def search(self, query: str, n_results: int = 5, document_name: str = None,
+               filters: FilterSpec = None) -> List[Dict[str, Any]]:
+        """Search for similar chunks using text query."""
+        from .query_encoder import get_query_encoder
+        query_embedding = get_query_encoder().encode([query])[0]
+        return self.search_by_embedding(query_embedding, n_results=n_results, document_name=document_name,
+                                        filters=filters)
+
+    def search_by_embedding(self, query_embedding: np.ndarray, n_results: int = 5, document_name: str = None,
+                            filters: FilterSpec = None) -> List[Dict[str, Any]]:
+        """Search for similar chunks using embedding vector."""
+        if self._fresh():
+            try:
+                results = self.mirror.search_by_embedding(query_embedding, n_results=n_results,
+                                                          document_name=document_name, filters=filters)
+                MIRROR_QUERIES.labels("local").inc()
+                return results
+            except Exception as e:
+                logger.error(f"Mirror search failed, querying the remote index: {e}")
+        try:
+            results = self.remote.search_by_embedding(query_embedding, n_results=n_results,
+                                                      document_name=document_name, filters=filters)
+            MIRROR_QUERIES.labels("remote").inc()
+            return results
+        except Exception as e:
+            if len(self.mirror) == 0:
+                raise
+            logger.warning(f"Remote search failed, answering from the mirror "
+                           f"({self.mirror.staleness() or 0:.0f}s stale): {e}")
+            MIRROR_QUERIES.labels("local_stale").inc()
+            return self.mirror.search_by_embedding(query_embedding, n_results=n_results,
+                                                   document_name=document_name, filters=filters)
+
+    def save_chunks(self, chunks, document_name: str = "document") -> None:
+        self.remote.save_chunks(chunks, document_name=document_name)
+
+    def delete_chunks(self, ids: List[str]) -> None:
+        self.remote.delete_chunks(ids)
+
+    def get_index_info(self) -> Dict[str, Any]:
+        """Get information about the remote index and the mirror."""
+        info = self.remote.get_index_info() if hasattr(self.remote, "get_index_info") else {}
+        return {**info, "mirror": self.mirror.status()}
+
+
+_mirrors: Dict[str, LocalMirror] = {}
+_mirrors_lock = threading.Lock()
+
+
+def mirrored(remote: Any, directory: str = None) -> MirroredStorage:
+    """Wrap a remote storage with a mirror kept in sync in the background.
+
+    Storages wrapped with the same directory share one mirror and one
+    background syncer.
+    """
+    directory = os.path.realpath(directory or config.mirror.directory)
+    with _mirrors_lock:
+        if directory not in _mirrors:
+            _mirrors[directory] = LocalMirror(directory)
+            MirrorSyncer(_mirrors[directory], remote).start()
+        mirror = _mirrors[directory]
+    return MirroredStorage(remote, mirror)
@@ -1,34 +1,54 @@
 """Pinecone storage for document chunks and embeddings."""
 
 from pinecone import Pinecone, ServerlessSpec
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator
+import time
 import numpy as np
 from datetime import datetime
 import os
 from dotenv import load_dotenv
 from .embedder import ChunkWithEmbedding
-from .chunker import embedding_model
+from .query_encoder import get_query_encoder
+from .projection import embedding_dimension
+from .tracing import start_span, traced, current_span
+from .metrics import timed_backend_call, record_upload, BACKEND_ERRORS
+from .filters import F, FilterSpec, combine, to_where
+from .validators import check_upload, PINECONE_METADATA_LIMIT
+from .logger import get_logger
 
 # Load environment variables
 load_dotenv()
 
+logger = get_logger(__name__)
+
 
 class PineconeStorage:
     """Pinecone storage for document chunks and embeddings."""
     
-    def __init__(self, index_name: str = "nyayagpt", dimension: int = 1024):
-        """Initialize Pinecone client and index."""
+    def __init__(self, index_name: str = "nyayagpt", dimension: int = None, index: Any = None):
+        """Initialize Pinecone client and index.
+        
+        The dimension defaults to that of the configured embeddings,
+        after any projection. An already connected index (or a stand-in
+        with the same interface) can be passed as ``index`` to skip
+        connecting to Pinecone.
+        """
+        self.index_name = index_name
+        self.dimension = dimension or embedding_dimension()
+        self.environment = os.getenv('PINECONE_ENVIRONMENT', 'us-east-1')
+        
+        if index is not None:
+            self.pc = None
+            self.index = index
+            return
+        
         # Get credentials from environment
         api_key = os.getenv('PINECONE_API_KEY')
-        environment = os.getenv('PINECONE_ENVIRONMENT', 'us-east-1')
         
         if not api_key:
             raise ValueError("Missing PINECONE_API_KEY. Please set it in your .env file")
         
         self.pc = Pinecone(api_key=api_key)
-        self.index_name = index_name
-        self.dimension = dimension
-        self.environment = environment
         
         # Get or create index
         self.index = self._get_or_create_index()
@@ -38,11 +58,17 @@ class PineconeStorage:
         try:
             # Check if index exists
             if self.index_name in self.pc.list_indexes().names():
-                print(f"Using existing Pinecone index: {self.index_name}")
+                index_dimension = self.pc.describe_index(self.index_name).dimension
+                if index_dimension != self.dimension:
+                    raise ValueError(
+                        f"Pinecone index '{self.index_name}' has dimension {index_dimension}, but embeddings "
+                        f"have dimension {self.dimension}; check EMBEDDING_PROJECTION or use another index"
+                    )
+                logger.info(f"Using existing Pinecone index: {self.index_name}")
                 return self.pc.Index(self.index_name)
             
             # Create new index
-            print(f"Creating Pinecone index: {self.index_name}")
+            logger.info(f"Creating Pinecone index: {self.index_name}")
             self.pc.create_index(
                 name=self.index_name,
                 dimension=self.dimension,
@@ -54,25 +80,37 @@ class PineconeStorage:
             )
             
             # Wait for index to be ready
-            print("Waiting for index to be ready...")
+            logger.info("Waiting for index to be ready...")
             import time
             while not self.pc.describe_index(self.index_name).status['ready']:
                 time.sleep(1)
             
-            print("✅ Index created successfully!")
+            logger.info("Index created successfully!")
             return self.pc.Index(self.index_name)
             
         except Exception as e:
-            print(f"❌ Error with Pinecone index: {e}")
+            logger.error(f"Error with Pinecone index: {e}")
             raise
     
+    @traced("storage.save_chunks")
+    @timed_backend_call("pinecone", "save_chunks")
     def save_chunks(self, chunks: List[ChunkWithEmbedding], document_name: str = "document") -> None:
-        """Save embedded chunks to Pinecone."""
+        """Save embedded chunks to Pinecone.
+        
+        Raises RuntimeError if a batch fails; earlier batches stay uploaded.
+        """
         if not chunks:
-            print("No chunks to save!")
+            logger.warning("No chunks to save!")
             return
         
-        print(f"Preparing {len(chunks)} chunks for Pinecone upload...")
+        logger.info(f"Preparing {len(chunks)} chunks for Pinecone upload...")
+        span = current_span()
+        if span.recording:
+            span.set_attributes(
+                backend="pinecone",
+                chunks=len(chunks),
+                bytes=sum(len(chunk.text.encode('utf-8')) for chunk in chunks)
+            )
         
         # Prepare data for Pinecone
         vectors = []
@@ -90,40 +128,89 @@ class PineconeStorage:
                     "embedding_dim": self.dimension
                 }
             }
+            # Pinecone metadata cannot hold nulls or nested values
+            if chunk.metadata:
+                for key, value in chunk.metadata.items():
+                    if isinstance(value, (str, int, float, bool)) and key not in vector["metadata"]:
+                        vector["metadata"][key] = value
             vectors.append(vector)
         
+        # Reject malformed batches before anything is sent
+        check_upload("pinecone", [vector["id"] for vector in vectors], [chunk.text for chunk in chunks],
+                     [chunk.embedding for chunk in chunks], [vector["metadata"] for vector in vectors],
+                     dimension=self.dimension, max_record_bytes=PINECONE_METADATA_LIMIT)
+        
         # Upload in batches
         batch_size = 100  # Pinecone handles larger batches well
         total_uploaded = 0
+        start = time.perf_counter()
         
         for i in range(0, len(vectors), batch_size):
             batch = vectors[i:i + batch_size]
             batch_num = (i // batch_size) + 1
             total_batches = (len(vectors) + batch_size - 1) // batch_size
             
-            print(f"Uploading batch {batch_num}/{total_batches} ({len(batch)} vectors)")
+            logger.debug(f"Uploading batch {batch_num}/{total_batches} ({len(batch)} vectors)")
             
             try:
-                self.index.upsert(vectors=batch)
+                with start_span("pinecone.upsert", batch=batch_num, vectors=len(batch)):
+                    self.index.upsert(vectors=batch)
                 total_uploaded += len(batch)
-                print(f"✅ Uploaded {len(batch)} vectors")
+                logger.debug(f"Uploaded {len(batch)} vectors", extra={"batch": batch_num, "vectors": len(batch)})
             except Exception as e:
-                print(f"❌ Error uploading batch {batch_num}: {e}")
-                break
+                logger.error(f"Error uploading batch {batch_num}: {e}", extra={"batch": batch_num})
+                BACKEND_ERRORS.labels("pinecone", "upsert").inc()
+                record_upload("pinecone", total_uploaded, time.perf_counter() - start)
+                # A partial upload must not look like a finished one to the caller
+                raise RuntimeError(f"Pinecone upload stopped at batch {batch_num}/{total_batches}: "
+                                   f"{total_uploaded}/{len(vectors)} vectors uploaded") from e
         
-        print(f"🎉 Upload complete! {total_uploaded}/{len(vectors)} vectors uploaded to Pinecone")
+        record_upload("pinecone", total_uploaded, time.perf_counter() - start)
+        logger.info(f"Upload complete! {total_uploaded}/{len(vectors)} vectors uploaded to Pinecone",
+                    extra={"vectors": total_uploaded, "index": self.index_name})
     
-    def search(self, query: str, n_results: int = 5, document_name: str = None) -> List[Dict[str, Any]]:
+    @traced("storage.delete_chunks")
+    @timed_backend_call("pinecone", "delete_chunks")
+    def delete_chunks(self, ids: List[str]) -> None:
+        """Delete chunks from Pinecone by ID."""
+        if not ids:
+            return
+        current_span().set_attributes(backend="pinecone", chunks=len(ids))
+        
+        # Pinecone accepts at most 1000 IDs per delete request
+        batch_size = 1000
+        for i in range(0, len(ids), batch_size):
+            self.index.delete(ids=ids[i:i + batch_size])
+        logger.info(f"Deleted {len(ids)} vectors from Pinecone index '{self.index_name}'",
+                    extra={"vectors": len(ids), "index": self.index_name})
+    
+    def search(self, query: str, n_results: int = 5, document_name: str = None,
+               filters: FilterSpec = None) -> List[Dict[str, Any]]:
         """Search for similar chunks using text query."""
         # Generate embedding for the query
-        query_embedding = embedding_model.encode([query])[0].tolist()
+        with start_span("embedding.encode", texts=1):
+            query_embedding = get_query_encoder().encode([query])[0]
+        
+        return self.search_by_embedding(query_embedding, n_results=n_results, document_name=document_name,
+                                        filters=filters)
+    
+    @traced("storage.query")
+    @timed_backend_call("pinecone", "query")
+    def search_by_embedding(self, query_embedding: np.ndarray, n_results: int = 5, document_name: str = None,
+                            filters: FilterSpec = None) -> List[Dict[str, Any]]:
+        """Search for similar chunks using embedding vector.
+        
+        ``filters`` (a utils.filters expression or filter dictionary) is
+        applied by the backend before similarity scoring.
+        """
+        current_span().set_attributes(backend="pinecone", n_results=n_results)
         
         # Prepare filter
-        filter_dict = {"document_name": document_name} if document_name else None
+        filter_dict = to_where(combine(F("document_name") == document_name if document_name else None, filters))
         
         # Search
         results = self.index.query(
-            vector=query_embedding,
+            vector=query_embedding.tolist(),
             top_k=n_results,
             include_metadata=True,
             filter=filter_dict
@@ -141,6 +228,28 @@ class PineconeStorage:
         
         return formatted_results
     
+    def list_ids(self, page_size: int = 100) -> Iterator[List[str]]:
+        """Yield the IDs in the index a page at a time (serverless indexes)."""
+        for ids in self.index.list(limit=page_size):
+            yield list(ids)
+    
+    @timed_backend_call("pinecone", "fetch")
+    def fetch(self, ids: List[str]) -> List[Dict[str, Any]]:
+        """Fetch records by ID, with the text taken out of the metadata."""
+        records = []
+        # Fetch IDs travel in the URL; keep requests short
+        for i in range(0, len(ids), 100):
+            response = self.index.fetch(ids=ids[i:i + 100])
+            for chunk_id, vector in response.vectors.items():
+                metadata = dict(vector.metadata or {})
+                records.append({
+                    "id": chunk_id,
+                    "text": metadata.pop("text", ""),
+                    "embedding": vector.values,
+                    "metadata": metadata
+                })
+        return records
+    
     def get_index_info(self) -> Dict[str, Any]:
         """Get information about the index."""
         try:
@@ -179,6 +288,6 @@ class PineconeStorage:
         try:
             # Delete all vectors
             self.index.delete(delete_all=True)
-            print(f"✅ Cleared all vectors from index '{self.index_name}'")
+            logger.info(f"Cleared all vectors from index '{self.index_name}'")
         except Exception as e:
-            print(f"❌ Error clearing index: {e}")
+            logger.error(f"Error clearing index: {e}")
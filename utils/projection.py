@@ -0,0 +1,181 @@
+"""Dimensionality reduction of embeddings.
+
+bge-large produces 1024-d vectors, and index size, upload volume and
+scoring cost all grow with the dimension. A projection maps every
+embedding, chunks and queries alike, to fewer dimensions:
+
+- ``PCAProjection`` is fitted on our own corpus and keeps the directions
+  with the most variance.
+- ``TruncationProjection`` keeps the first dimensions (Matryoshka-style).
+  It only works well for models trained for it.
+
+Both re-normalize their output to unit length for cosine search.
+Projections are saved as ``.npz`` files; pointing EMBEDDING_PROJECTION at
+one makes ``get_embedding_model()`` return a projected model, so
+ingestion and retrieval stay consistent; ``projection_fingerprint()``
+lets ingestion tell when stored embeddings were made with a different
+projection. scripts/evaluate_projection.py fits projections and
+measures their recall@k against full-dimension search.
+"""
+
+import hashlib
+import threading
+from typing import Any
+import numpy as np
+from .logger import get_logger
+from config.config import config
+
+logger = get_logger(__name__)
+
+
+def _normalize(embeddings: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.maximum(norms, 1e-12)
+
+
+class TruncationProjection:
+    """Keep the first ``output_dim`` dimensions."""
+
+    kind = "truncate"
+
+    def __init__(self, input_dim: int, output_dim: int):
+        if output_dim > input_dim:
+            raise ValueError(f"Cannot truncate {input_dim}-d embeddings to {output_dim} dimensions")
+        self.input_dim = input_dim
+        self.output_dim = output_dim
+
+    def apply(self, embeddings: np.ndarray) -> np.ndarray:
+        """Project a batch of embeddings."""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        return _normalize(embeddings[:, :self.output_dim])
+
+    def save(self, path: str) -> None:
+        np.savez(path, kind=self.kind, input_dim=self.input_dim, output_dim=self.output_dim)
+
+    def __repr__(self) -> str:
+        return f"TruncationProjection({self.input_dim} -> {self.output_dim})"
+
+
+class PCAProjection:
+    """Project onto the principal components of a corpus."""
+
+    kind = "pca"
+
+    def __init__(self, mean: np.ndarray, components: np.ndarray, explained_variance_ratio: float = None):
+        """Initialize the projection.
+
+        Args:
+            mean: Corpus mean, shape (input_dim,)
+            components: Principal axes, shape (output_dim, input_dim)
+            explained_variance_ratio: Share of variance the components keep
+        """
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.components = np.asarray(components, dtype=np.float32)
+        self.explained_variance_ratio = explained_variance_ratio
+        self.input_dim = self.components.shape[1]
+        self.output_dim = self.components.shape[0]
+
+    @classmethod
+    def fit(cls, embeddings: np.ndarray, output_dim: int, sample_size: int = 50000,
+            seed: int = 0) -> "PCAProjection":
+        """Fit on (a random sample of) corpus embeddings."""
+        embeddings = np.asarray(embeddings)
+        if output_dim > min(embeddings.shape):
+            raise ValueError(f"Cannot fit {output_dim} components on {embeddings.shape[0]} "
+                             f"{embeddings.shape[1]}-d embeddings")
+        if len(embeddings) > sample_size:
+            rows = np.sort(np.random.default_rng(seed).choice(len(embeddings), sample_size, replace=False))
+            embeddings = embeddings[rows]
+        sample = _normalize(np.asarray(embeddings, dtype=np.float32))
+
+        mean = sample.mean(axis=0)
+        # Right singular vectors of the centred data are the principal axes
+        _, singular_values, vt = np.linalg.svd(sample - mean, full_matrices=False)
+        variance = singular_values ** 2
+        ratio = float(variance[:output_dim].sum() / variance.sum())
+        return cls(mean, vt[:output_dim], explained_variance_ratio=ratio)
+
+    def apply(self, embeddings: np.ndarray) -> np.ndarray:
+        """Project a batch of embeddings."""
+        embeddings = _normalize(np.asarray(embeddings, dtype=np.float32))
+        return _normalize((embeddings - self.mean) @ self.components.T)
+
+    def save(self, path: str) -> None:
+        np.savez(path, kind=self.kind, mean=self.mean, components=self.components,
+                 explained_variance_ratio=np.nan if self.explained_variance_ratio is None
+                 else self.explained_variance_ratio)
+
+    def __repr__(self) -> str:
+        return f"PCAProjection({self.input_dim} -> {self.output_dim})"
+
+
+def load_projection(path: str):
+    """Load a projection saved with ``save()``."""
+    with np.load(path) as data:
+        kind = str(data["kind"])
+        if kind == TruncationProjection.kind:
+            return TruncationProjection(int(data["input_dim"]), int(data["output_dim"]))
+        if kind == PCAProjection.kind:
+            ratio = float(data["explained_variance_ratio"])
+            return PCAProjection(data["mean"], data["components"],
+                                 explained_variance_ratio=None if np.isnan(ratio) else ratio)
+    raise ValueError(f"Unknown projection type in {path}: {kind}")
+
+
+class ProjectedModel:
+    """Embedding model wrapper whose encode() returns projected embeddings."""
+
+    def __init__(self, model: Any, projection: Any):
+        self.model = model
+        self.projection = projection
+
+    def encode(self, texts, **kwargs) -> np.ndarray:
+        if isinstance(texts, str):
+            return self.encode([texts], **kwargs)[0]
+        embeddings = np.asarray(self.model.encode(list(texts), **kwargs))
+        if embeddings.ndim == 1 or len(embeddings) == 0:
+            return np.zeros((0, self.projection.output_dim), dtype=np.float32)
+        return self.projection.apply(embeddings)
+
+
+_projection = None
+_projection_digest = ""
+_projection_loaded = False
+_lock = threading.Lock()
+
+
+def get_projection():
+    """The configured projection, or None when embeddings are full size."""
+    global _projection, _projection_digest, _projection_loaded
+    with _lock:
+        if not _projection_loaded:
+            if config.embedding.projection_path:
+                _projection = load_projection(config.embedding.projection_path)
+                with open(config.embedding.projection_path, 'rb') as f:
+                    _projection_digest = hashlib.sha256(f.read()).hexdigest()[:16]
+                logger.info(f"Using embedding projection {_projection} from {config.embedding.projection_path}")
+            _projection_loaded = True
+        return _projection
+
+
+def projection_fingerprint() -> str:
+    """Kind, output size and file digest of the configured projection; empty when there is none.
+
+    The digest changes when a projection is refitted to the same path.
+    """
+    projection = get_projection()
+    if projection is None:
+        return ""
+    return f"{projection.kind}-{projection.output_dim}-{_projection_digest}"
+
+
+def embedding_dimension() -> int:
+    """Dimension of stored and query embeddings after any projection."""
+    projection = get_projection()
+    return projection.output_dim if projection is not None else config.embedding.dimension
+
+
+def project_model(model: Any) -> Any:
+    """Wrap a model with the configured projection, if any."""
+    projection = get_projection()
+    return ProjectedModel(model, projection) if projection is not None else model
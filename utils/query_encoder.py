@@ -0,0 +1,75 @@
+"""Micro-batched query encoding for concurrent requests.
+
+Under load every request would otherwise call ``encode([query])`` with a
+batch of one. The query encoder collects queries arriving within a
+short window and embeds them in a single forward pass; batch sizes and
+queueing delays are exported as the ``query-encoder`` micro-batcher
+metrics.
+"""
+
+import threading
+from typing import List, Any
+import numpy as np
+from .batching import MicroBatcher
+from config.config import config
+
+
+class QueryEncoder:
+    """encode() front-end that batches concurrent calls to a model."""
+
+    def __init__(self, model: Any, max_batch_size: int = 32, max_wait_seconds: float = 0.002,
+                 name: str = "query-encoder"):
+        """Initialize the encoder.
+
+        Args:
+            model: Embedding model with an encode() method
+            max_batch_size: Maximum number of queries per forward pass
+            max_wait_seconds: How long a query waits for others to batch with
+            name: Name of the batcher in metrics
+        """
+        self.model = model
+        self._batcher = MicroBatcher(
+            lambda texts: np.asarray(model.encode(texts)),
+            max_batch_size=max_batch_size,
+            max_wait_seconds=max_wait_seconds,
+            name=name
+        )
+
+    def encode(self, texts: List[str], **kwargs) -> np.ndarray:
+        """Embed texts, sharing a forward pass with concurrent callers."""
+        if isinstance(texts, str):
+            return self.encode([texts])[0]
+        if not texts:
+            return np.asarray(self.model.encode([]))
+        return self._batcher(list(texts))
+
+    def encode_query(self, query: str) -> np.ndarray:
+        """Embed a single query."""
+        return self.encode([query])[0]
+
+    def close(self) -> None:
+        self._batcher.close()
+
+
+_query_encoder = None
+_lock = threading.Lock()
+
+
+def get_query_encoder():
+    """Shared query encoder over the default embedding model.
+
+    Returns the embedding model itself when query batching is disabled.
+    """
+    global _query_encoder
+    with _lock:
+        if _query_encoder is None:
+            from .chunker import get_embedding_model
+            model = get_embedding_model()
+            if config.embedding.query_batching:
+                model = QueryEncoder(
+                    model,
+                    max_batch_size=config.embedding.query_batch_max_size,
+                    max_wait_seconds=config.embedding.query_batch_max_wait_ms / 1000
+                )
+            _query_encoder = model
+        return _query_encoder
@@ -1,94 +1,374 @@
 """RAG Agent using LangGraph and Gemini for Indian Constitution queries."""
 
 import os
-from typing import Dict, List, Any, TypedDict, Annotated
+import time
+import queue
+import operator
+import threading
+import contextvars
+from collections import OrderedDict
+from typing import Dict, List, Any, Iterator, TypedDict, Annotated
 from dotenv import load_dotenv
-from langgraph.graph import StateGraph, END
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-from langchain_core.prompts import ChatPromptTemplate
-from .pinecone_storage import PineconeStorage
+from .chunker import get_embedding_model
+from .query_encoder import QueryEncoder, get_query_encoder
+from .context_builder import build_context
+from .compressor import compress_results
+from .reranker import CrossEncoderReranker
+from .memory import ConversationMemory, Turn, is_anaphoric
+from .decomposer import decompose_query
+from .legal_structure import question_structure
+from .tracing import start_span, current_span
+from .metrics import STAGE_LATENCY, REQUESTS, INFLIGHT_REQUESTS, LLM_TOKENS, EMBEDDING_BATCH_SIZE
+from .logger import get_logger
+from config.config import config
 
 # Load environment variables
 load_dotenv()
 
+logger = get_logger(__name__)
+
+# Receives answer tokens as they are generated, set by NyayaRAGAgent.stream()
+_token_sink = contextvars.ContextVar("nyayagpt_token_sink", default=None)
+
+
+class StreamCancelled(Exception):
+    """Raised in the generating thread when a stream's consumer has gone away."""
+
+
+def message_text(content: Any) -> str:
+    """Extract the text from message content, which may be a list of parts."""
+    if isinstance(content, str):
+        return content
+    return "".join(
+        part if isinstance(part, str) else part.get("text", "")
+        for part in content
+    )
+
+
+def merge_timings(left: Dict[str, float], right: Dict[str, float]) -> Dict[str, float]:
+    """Merge stage timings reported by nodes, including parallel branches."""
+    return {**left, **right}
+
 
 class AgentState(TypedDict):
     """State for the RAG agent."""
     messages: List[Dict[str, Any]]
     query: str
+    search_query: str
+    previous_retrieved: List[Dict[str, Any]]
+    query_embedding: Any
+    sub_queries: List[Dict[str, Any]]
+    branch_results: Annotated[List[Dict[str, Any]], operator.add]
+    # This turn's merged search results, before reranking and compression
+    candidates: List[Dict[str, Any]]
+    retrieved: List[Dict[str, Any]]
     context: str
+    sources: List[Dict[str, Any]]
     response: str
+    compression: Dict[str, Any]
+    rerank: Dict[str, Any]
+    timings: Annotated[Dict[str, float], merge_timings]
 
 
 class NyayaRAGAgent:
     """RAG Agent for Indian Constitution queries using LangGraph and Gemini."""
     
-    def __init__(self, index_name: str = "nyayagpt-constitution"):
-        """Initialize the RAG agent."""
+    def __init__(self, index_name: str = "nyayagpt-constitution", compress: bool = None,
+                 rerank: bool = None, storage: Any = None, llm: Any = None,
+                 embedder: Any = None, document_name: str = None):
+        """Initialize the RAG agent.
+        
+        Args:
+            index_name: Pinecone index to retrieve from
+            compress: Enable extractive context compression (defaults to config)
+            rerank: Enable cross-encoder reranking (defaults to config)
+            storage: Vector store to use instead of Pinecone
+            llm: Chat model to use instead of Gemini
+            embedder: Query embedding model to use instead of the default
+            document_name: Only retrieve from this document (defaults to config,
+                where empty means every document)
+        """
+        self.compress = config.retrieval.compression_enabled if compress is None else compress
+        self.document_name = (config.retrieval.document_name if document_name is None else document_name) or None
+        self.reranker = None
+        if config.retrieval.rerank_enabled if rerank is None else rerank:
+            self.reranker = CrossEncoderReranker(
+                model_name=config.retrieval.rerank_model,
+                batch_size=config.retrieval.rerank_batch_size
+            )
+        
+        # The default embedding model is loaded on first use
+        self._embedder = embedder
+        self._query_encoder = None
+        self._query_encoder_lock = threading.Lock()
+        
         # Initialize Pinecone storage
-        self.storage = PineconeStorage(
-            index_name=index_name,
-            dimension=1024
-        )
+        if storage is None:
+            from .pinecone_storage import PineconeStorage
+            storage = PineconeStorage(index_name=index_name)
+            if config.mirror.directory:
+                # Answer queries from a local copy kept in sync in the background,
+                # one syncer per mirror directory however many agents are created
+                from .mirror import mirrored
+                storage = mirrored(storage)
+        self.storage = storage
         
         # Initialize Gemini model
-        api_key = os.getenv('GOOGLE_API_KEY')
-        if not api_key:
-            raise ValueError("Missing GOOGLE_API_KEY. Please set it in your .env file")
-        
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash",
-            google_api_key=api_key,
-            temperature=0.1,
-            max_output_tokens=2048
-        )
+        if llm is None:
+            api_key = os.getenv('GOOGLE_API_KEY')
+            if not api_key:
+                raise ValueError("Missing GOOGLE_API_KEY. Please set it in your .env file")
+            
+            from langchain_google_genai import ChatGoogleGenerativeAI
+            llm = ChatGoogleGenerativeAI(
+                model="gemini-2.5-flash",
+                google_api_key=api_key,
+                temperature=0.1,
+                max_output_tokens=2048
+            )
+        self.llm = llm
+        
+        # Conversation memories keyed by session ID, least recently used first
+        self.sessions: "OrderedDict[str, ConversationMemory]" = OrderedDict()
+        self._sessions_lock = threading.Lock()
         
         # Create the agent graph
         self.agent = self._create_agent()
     
-    def _create_agent(self) -> StateGraph:
+    @property
+    def embedding_model(self):
+        """Query embedding model, loading the default one on first use."""
+        if self._embedder is None:
+            self._embedder = get_embedding_model()
+        return self._embedder
+    
+    @property
+    def query_encoder(self):
+        """Encoder that batches the query embeddings of concurrent requests."""
+        with self._query_encoder_lock:
+            if self._query_encoder is None:
+                if self._embedder is None:
+                    self._query_encoder = get_query_encoder()
+                elif config.embedding.query_batching:
+                    self._query_encoder = QueryEncoder(
+                        self._embedder,
+                        max_batch_size=config.embedding.query_batch_max_size,
+                        max_wait_seconds=config.embedding.query_batch_max_wait_ms / 1000
+                    )
+                else:
+                    self._query_encoder = self._embedder
+            return self._query_encoder
+    
+    def _create_agent(self):
         """Create the LangGraph agent."""
+        from langgraph.graph import StateGraph, END
+        
         workflow = StateGraph(AgentState)
         
-        # Add nodes
-        workflow.add_node("retrieve", self._retrieve_context)
-        workflow.add_node("generate", self._generate_response)
+        # Compound questions fan out to one retrieve branch per sub-query
+        workflow.add_node("decompose", self._traced("decompose", self._decompose_query))
+        workflow.add_node("retrieve", self._traced("retrieve", self._retrieve_context))
+        workflow.set_entry_point("decompose")
+        workflow.add_conditional_edges("decompose", self._route_sub_queries, ["retrieve"])
+        
+        # Add nodes, skipping optional stages that are disabled
+        stages = [("merge", self._merge_results)]
+        if self.reranker:
+            stages.append(("rerank", self._rerank_results))
+        if self.compress:
+            stages.append(("compress", self._compress_context))
+        stages.append(("build_context", self._build_context))
+        stages.append(("generate", self._generate_response))
+        
+        for name, node in stages:
+            workflow.add_node(name, self._traced(name, node))
         
         # Add edges
-        workflow.set_entry_point("retrieve")
-        workflow.add_edge("retrieve", "generate")
-        workflow.add_edge("generate", END)
+        workflow.add_edge("retrieve", stages[0][0])
+        for (name, _), (next_name, _) in zip(stages, stages[1:]):
+            workflow.add_edge(name, next_name)
+        workflow.add_edge(stages[-1][0], END)
         
         return workflow.compile()
     
-    def _retrieve_context(self, state: AgentState) -> AgentState:
-        """Retrieve relevant context from Pinecone."""
-        query = state["query"]
+    @staticmethod
+    def _traced(name: str, node):
+        """Wrap a graph node in its own tracing span and latency histogram."""
+        latency = STAGE_LATENCY.labels(name)
         
-        # Search for relevant chunks
-        search_results = self.storage.search(
-            query=query,
-            n_results=5,
-            document_name="indian_constitution"
-        )
+        def traced_node(state):
+            start = time.perf_counter()
+            try:
+                with start_span(f"rag.{name}"):
+                    return node(state)
+            finally:
+                latency.observe(time.perf_counter() - start)
+        return traced_node
+    
+    def _decompose_query(self, state: AgentState) -> Dict[str, Any]:
+        """Split the question into sub-queries and embed them in one batch."""
+        start = time.perf_counter()
+        query = state["search_query"] or state["query"]
+        
+        sub_queries = decompose_query(query, max_sub_queries=config.retrieval.max_sub_queries)
+        # The whole question is always searched as well
+        queries = [query] + [sub_query for sub_query in sub_queries if sub_query != query]
+        
+        # Embed all queries in one forward pass so later stages can reuse them
+        EMBEDDING_BATCH_SIZE.labels("query").observe(len(queries))
+        encode_start = time.perf_counter()
+        with start_span("embedding.encode", texts=len(queries)):
+            embeddings = self.query_encoder.encode(queries)
+        encode_seconds = time.perf_counter() - encode_start
+        current_span().set_attribute("sub_queries", len(queries))
+        
+        return {
+            "query_embedding": embeddings[0],
+            "sub_queries": [
+                {"branch": i, "query": sub_query, "embedding": embeddings[i]}
+                for i, sub_query in enumerate(queries)
+            ],
+            "timings": {"decompose": time.perf_counter() - start, "encode": encode_seconds}
+        }
+    
+    def _route_sub_queries(self, state: AgentState) -> List[Any]:
+        """Send each sub-query to its own retrieve branch."""
+        from langgraph.types import Send
+        return [Send("retrieve", sub_query) for sub_query in state["sub_queries"]]
+    
+    def _retrieve_context(self, sub_query: Dict[str, Any]) -> Dict[str, Any]:
+        """Retrieve relevant context for one sub-query from Pinecone."""
+        start = time.perf_counter()
         
-        # Format context
-        context_parts = []
-        for i, result in enumerate(search_results, 1):
-            context_parts.append(
-                f"Source {i} (Relevance: {1-result['distance']:.2f}):\n{result['text']}\n"
+        # Over-fetch candidates when a reranker will pick the final top-k
+        n_results = config.retrieval.rerank_candidates if self.reranker else config.retrieval.n_results
+        
+        # A sub-query naming one article, part, chapter or schedule is
+        # searched within it first, then topped up without the filter
+        structure = question_structure(sub_query["query"]) if config.retrieval.structural_filters else {}
+        search_results = []
+        if structure:
+            search_results = self.storage.search_by_embedding(
+                sub_query["embedding"],
+                n_results=n_results,
+                document_name=self.document_name,
+                filters=structure
             )
+            current_span().set_attributes(filters=",".join(f"{k}={v}" for k, v in structure.items()),
+                                          filtered_results=len(search_results))
+        
+        if len(search_results) < n_results:
+            seen = {result['id'] for result in search_results}
+            search_results += [
+                result for result in self.storage.search_by_embedding(
+                    sub_query["embedding"],
+                    n_results=n_results,
+                    document_name=self.document_name
+                )
+                if result['id'] not in seen
+            ][:n_results - len(search_results)]
+        current_span().set_attributes(branch=sub_query["branch"], results=len(search_results))
+        
+        return {
+            "branch_results": [{"branch": sub_query["branch"], "results": search_results}],
+            "timings": {f"retrieve.{sub_query['branch']}": time.perf_counter() - start}
+        }
+    
+    def _merge_results(self, state: AgentState) -> Dict[str, Any]:
+        """Merge and deduplicate the results of all retrieve branches."""
+        start = time.perf_counter()
+        branches = [branch["results"] for branch in sorted(state["branch_results"], key=lambda b: b["branch"])]
+        
+        merged = []
+        seen = set()
+        
+        # Interleave branches rank by rank so every sub-query is represented
+        for rank in range(max((len(results) for results in branches), default=0)):
+            for results in branches:
+                if rank < len(results) and results[rank]['id'] not in seen:
+                    seen.add(results[rank]['id'])
+                    merged.append(results[rank])
+        candidates = list(merged)
         
-        context = "\n".join(context_parts)
+        # Follow-ups also keep the previous turn's candidates, after the fresh
+        # results: the reranker scores them with the rest, and without it they
+        # only fill what is left of the context budget
+        merged += [result for result in state["previous_retrieved"] if result['id'] not in seen]
         
+        current_span().set_attribute("chunks", len(merged))
+        branch_times = [seconds for name, seconds in state["timings"].items() if name.startswith("retrieve.")]
         return {
-            **state,
-            "context": context
+            "candidates": candidates,
+            "retrieved": merged,
+            "timings": {
+                "retrieve": max(branch_times, default=0.0),
+                "merge": time.perf_counter() - start
+            }
         }
     
-    def _generate_response(self, state: AgentState) -> AgentState:
+    def _rerank_results(self, state: AgentState) -> Dict[str, Any]:
+        """Rerank over-fetched candidates with the cross-encoder."""
+        result = self.reranker.rerank(
+            state["query"],
+            state["retrieved"],
+            top_k=config.retrieval.n_results,
+            budget_seconds=config.retrieval.rerank_budget_ms / 1000
+        )
+        current_span().set_attributes(**result.stats())
+        if result.fell_back:
+            logger.warning("Reranking exceeded its latency budget, using vector order",
+                           extra={"scored": result.scored, "seconds": result.seconds})
+        
+        return {
+            "retrieved": result.results,
+            "rerank": result.stats(),
+            "timings": {"rerank": result.seconds}
+        }
+    
+    def _compress_context(self, state: AgentState) -> Dict[str, Any]:
+        """Keep only the query-relevant sentences of the retrieved chunks."""
+        result = compress_results(
+            state["retrieved"],
+            state["query_embedding"],
+            target_ratio=config.retrieval.compression_ratio,
+            neighbours=config.retrieval.compression_neighbours,
+            encoder=self.embedding_model
+        )
+        current_span().set_attributes(**result.stats())
+        
+        return {
+            "retrieved": result.results,
+            "compression": result.stats(),
+            "timings": {"compress": result.seconds}
+        }
+    
+    def _build_context(self, state: AgentState) -> Dict[str, Any]:
+        """Pack retrieved chunks into a deduplicated, token-budgeted context."""
+        start = time.perf_counter()
+        packed = build_context(
+            state["retrieved"],
+            max_tokens=config.retrieval.context_max_tokens,
+            min_span_chars=config.retrieval.min_dedup_span_chars
+        )
+        span = current_span()
+        if span.recording:
+            span.set_attributes(
+                chunks=len(packed.sources),
+                dropped=len(packed.dropped),
+                tokens=packed.token_count,
+                bytes=len(packed.text.encode('utf-8'))
+            )
+        
+        return {
+            "context": packed.text,
+            "sources": packed.sources,
+            "timings": {"build_context": time.perf_counter() - start}
+        }
+    
+    def _generate_response(self, state: AgentState) -> Dict[str, Any]:
         """Generate response using Gemini with retrieved context."""
+        start = time.perf_counter()
         query = state["query"]
         context = state["context"]
         
@@ -117,69 +397,239 @@ Question: {query}
 
 Please provide a comprehensive answer based on the context above. If you reference specific articles, parts, or sections, please mention them clearly."""
 
-        # Generate response
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=user_prompt)
-        ]
+        # Generate response, including the bounded conversation history
+        messages = [SystemMessage(content=system_prompt)]
+        for message in state["messages"]:
+            if message["role"] == "user":
+                messages.append(HumanMessage(content=message["content"]))
+            elif message["role"] == "assistant":
+                messages.append(AIMessage(content=message["content"]))
+            else:
+                messages.append(SystemMessage(content=message["content"]))
+        messages.append(HumanMessage(content=user_prompt))
+        
+        # Stream the answer so time to first token can be measured
+        sink = _token_sink.get()
+        parts = []
+        first_token = None
+        usage = None
+        with start_span("llm.stream", messages=len(messages)) as span:
+            for chunk in self.llm.stream(messages):
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+                text = message_text(chunk.content)
+                parts.append(text)
+                if sink is not None and text:
+                    sink(text)
+                usage = getattr(chunk, "usage_metadata", None) or usage
+            
+            if span.recording:
+                span.set_attributes(
+                    prompt_chars=sum(len(message_text(message.content)) for message in messages),
+                    completion_chars=sum(len(part) for part in parts)
+                )
+                if usage:
+                    span.set_attributes(
+                        prompt_tokens=usage.get("input_tokens", 0),
+                        completion_tokens=usage.get("output_tokens", 0)
+                    )
         
-        response = self.llm.invoke(messages)
+        if usage:
+            LLM_TOKENS.labels("prompt").inc(usage.get("input_tokens", 0))
+            LLM_TOKENS.labels("completion").inc(usage.get("output_tokens", 0))
         
+        generate_seconds = time.perf_counter() - start
         return {
-            **state,
-            "response": response.content
+            "response": "".join(parts),
+            "timings": {
+                "generate": generate_seconds,
+                "first_token": generate_seconds if first_token is None else first_token
+            }
         }
     
-    def ask(self, question: str) -> str:
-        """Ask a question and get a response."""
-        # Create initial state
-        state = {
-            "messages": [],
+    def _summarize_turn(self, summary: str, turn: Turn) -> str:
+        """Fold a conversation turn into the running summary with Gemini."""
+        prompt = f"""Update the running summary of a conversation about the Indian Constitution.
+Keep it under {config.memory.summary_max_tokens // 2} words and keep every article, part or schedule mentioned.
+
+Current summary:
+{summary or "(empty)"}
+
+New exchange:
+Q: {turn.question}
+A: {turn.answer}
+
+Updated summary:"""
+        response = self.llm.invoke([HumanMessage(content=prompt)])
+        return message_text(response.content).strip()
+    
+    def get_session(self, session_id: str) -> ConversationMemory:
+        """Get or create the conversation memory for a session.
+        
+        Sessions unused for SESSION_TTL_S are forgotten, and beyond
+        MAX_SESSIONS the least recently used one is, so clients cannot
+        grow memory without bound.
+        """
+        now = time.monotonic()
+        with self._sessions_lock:
+            memory = self.sessions.get(session_id)
+            if memory is None:
+                memory = ConversationMemory(
+                    max_tokens=config.memory.max_history_tokens,
+                    summary_max_tokens=config.memory.summary_max_tokens,
+                    summarizer=self._summarize_turn if config.memory.llm_summaries else None
+                )
+                self.sessions[session_id] = memory
+            memory.last_used = now
+            self.sessions.move_to_end(session_id)
+            
+            while self.sessions:
+                oldest_id, oldest = next(iter(self.sessions.items()))
+                if len(self.sessions) <= config.memory.max_sessions and \
+                        now - oldest.last_used <= config.memory.session_ttl_s:
+                    break
+                del self.sessions[oldest_id]
+            return memory
+    
+    def reset_session(self, session_id: str) -> None:
+        """Forget the conversation history of a session."""
+        with self._sessions_lock:
+            self.sessions.pop(session_id, None)
+    
+    def _initial_state(self, question: str, memory: ConversationMemory = None) -> AgentState:
+        """Create the initial agent state for a question."""
+        messages = []
+        search_query = question
+        previous_retrieved = []
+        
+        if memory is not None:
+            messages = memory.messages()
+            # Resolve follow-ups against the previous turn
+            if memory.last_retrieved and is_anaphoric(question):
+                search_query = f"{memory.last_question} {question}"
+                previous_retrieved = memory.last_retrieved
+        
+        return {
+            "messages": messages,
             "query": question,
+            "search_query": search_query,
+            "previous_retrieved": previous_retrieved,
+            "query_embedding": None,
+            "sub_queries": [],
+            "branch_results": [],
+            "candidates": [],
+            "retrieved": [],
             "context": "",
-            "response": ""
+            "sources": [],
+            "response": "",
+            "compression": {},
+            "rerank": {},
+            "timings": {}
         }
+    
+    def _run(self, question: str, session_id: str = None) -> AgentState:
+        """Run the agent graph, reading and updating session memory."""
+        start = time.perf_counter()
+        INFLIGHT_REQUESTS.inc()
+        try:
+            with start_span("rag.request", question_chars=len(question), session=session_id is not None) as span:
+                if session_id is None:
+                    result = self.agent.invoke(self._initial_state(question))
+                else:
+                    memory = self.get_session(session_id)
+                    with memory.lock:
+                        result = self.agent.invoke(self._initial_state(question, memory))
+                        # Raw search results, so follow-ups never compress compressed text again
+                        memory.add_turn(question, result["response"], result["candidates"])
+        except StreamCancelled:
+            REQUESTS.labels("cancelled").inc()
+            raise
+        except Exception:
+            REQUESTS.labels("error").inc()
+            raise
+        finally:
+            INFLIGHT_REQUESTS.dec()
+        
+        REQUESTS.labels("ok").inc()
+        STAGE_LATENCY.labels("total").observe(time.perf_counter() - start)
+        logger.debug("Answered question", extra={"timings": result["timings"], "session": session_id})
+        return {**result, "trace_id": span.trace_id}
+    
+    def ask(self, question: str, session_id: str = None) -> str:
+        """Ask a question and get a response.
         
+        Questions with a session_id are answered with that session's
+        conversation history; without one they are answered statelessly.
+        """
         # Run the agent
-        result = self.agent.invoke(state)
+        result = self._run(question, session_id)
         
         return result["response"]
     
-    def chat(self, question: str) -> Dict[str, Any]:
+    def chat(self, question: str, session_id: str = None) -> Dict[str, Any]:
         """Chat with the agent and get detailed response."""
-        # Create initial state
-        state = {
-            "messages": [],
-            "query": question,
-            "context": "",
-            "response": ""
-        }
-        
         # Run the agent
-        result = self.agent.invoke(state)
+        result = self._run(question, session_id)
+        
+        return self._chat_result(question, result)
+    
+    def stream(self, question: str, session_id: str = None) -> Iterator[Dict[str, Any]]:
+        """Answer a question, yielding the answer as it is generated.
+        
+        Yields {"token": text} events while the answer is generated,
+        followed by a single {"result": ...} event holding what chat()
+        would have returned.
+        """
+        events = queue.Queue()
+        cancelled = threading.Event()
         
+        def sink(text: str) -> None:
+            if cancelled.is_set():
+                raise StreamCancelled()
+            events.put(("token", text))
+        
+        def run():
+            _token_sink.set(sink)
+            try:
+                result = self._run(question, session_id)
+                events.put(("result", self._chat_result(question, result)))
+            except StreamCancelled:
+                logger.info("Stopped generating for a cancelled stream")
+            except Exception as e:
+                events.put(("error", e))
+        
+        # The graph runs in its own thread; the copied context carries the sink
+        # and the current tracing span into it
+        context = contextvars.copy_context()
+        worker = threading.Thread(target=context.run, args=(run,), name="rag-stream", daemon=True)
+        worker.start()
+        
+        try:
+            while True:
+                kind, value = events.get()
+                if kind == "token":
+                    yield {"token": value}
+                elif kind == "result":
+                    yield {"result": value}
+                    return
+                else:
+                    raise value
+        finally:
+            # Closing the generator early stops generation at the next token;
+            # wait for it so callers only release resources once it has stopped
+            cancelled.set()
+            worker.join()
+    
+    def _chat_result(self, question: str, result: AgentState) -> Dict[str, Any]:
+        """Build the detailed response returned by chat() and stream()."""
         return {
             "question": question,
             "answer": result["response"],
             "context": result["context"],
-            "sources": self._extract_sources(result["context"])
+            "sources": result["sources"],
+            "sub_queries": [sub_query["query"] for sub_query in result["sub_queries"]],
+            "compression": result["compression"],
+            "rerank": result["rerank"],
+            "timings": result["timings"],
+            "trace_id": result["trace_id"]
         }
-    
-    def _extract_sources(self, context: str) -> List[Dict[str, Any]]:
-        """Extract source information from context."""
-        sources = []
-        lines = context.split('\n')
-        
-        for line in lines:
-            if line.startswith('Source '):
-                # Extract source number and relevance
-                parts = line.split(' (Relevance: ')
-                if len(parts) == 2:
-                    source_num = parts[0].replace('Source ', '')
-                    relevance = parts[1].replace('):', '')
-                    sources.append({
-                        "source": source_num,
-                        "relevance": float(relevance)
-                    })
-        
-        return sources
@@ -0,0 +1,47 @@
+"""Token-bucket rate limiting for LLM calls."""
+
+import threading
+import time
+from typing import Any
+
+
+class TokenBucket:
+    """Allow ``rate`` acquisitions per second with bursts of ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until ``tokens`` are available; returns the seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class RateLimitedLLM:
+    """Chat model wrapper that takes a bucket token before every call."""
+
+    def __init__(self, llm: Any, bucket: TokenBucket):
+        self.llm = llm
+        self.bucket = bucket
+
+    def stream(self, messages, **kwargs):
+        self.bucket.acquire()
+        yield from self.llm.stream(messages, **kwargs)
+
+    def invoke(self, messages, **kwargs):
+        self.bucket.acquire()
+        return self.llm.invoke(messages, **kwargs)
@@ -0,0 +1,139 @@
+"""Cross-encoder reranking of retrieved chunks."""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional
+from .metrics import CACHE_LOOKUPS
+
+
+DEFAULT_RERANK_MODEL = 'cross-encoder/ms-marco-MiniLM-L-6-v2'
+
+
+@dataclass
+class RerankResult:
+    """Reranked results and statistics about the reranking pass."""
+    results: List[Dict[str, Any]] = field(default_factory=list)
+    fell_back: bool = False
+    scored: int = 0
+    cache_hits: int = 0
+    seconds: float = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return statistics suitable for reporting."""
+        return {
+            "fell_back": self.fell_back,
+            "scored": self.scored,
+            "cache_hits": self.cache_hits,
+            "seconds": round(self.seconds, 6)
+        }
+
+
+class CrossEncoderReranker:
+    """Score (query, chunk) pairs with a small cross-encoder on CPU."""
+
+    def __init__(self, model_name: str = DEFAULT_RERANK_MODEL, batch_size: int = 16,
+                 cache_size: int = 10000, model: Optional[Any] = None):
+        """Initialize the reranker.
+
+        Args:
+            model_name: Cross-encoder model to load
+            batch_size: Number of pairs scored per forward pass
+            cache_size: Maximum number of cached (query, chunk) scores
+            model: Preloaded model exposing predict(pairs), mainly for testing
+        """
+        if model is None:
+            from sentence_transformers import CrossEncoder
+            model = CrossEncoder(model_name, device="cpu")
+
+        self.model = model
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        # Running estimate of seconds per scored pair, used for budgeting
+        self._seconds_per_pair = None
+
+    @staticmethod
+    def _query_hash(query: str) -> str:
+        return hashlib.sha1(query.encode('utf-8')).hexdigest()
+
+    def _cache_get(self, key):
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        return None
+
+    def _cache_put(self, key, score: float) -> None:
+        with self._lock:
+            self._cache[key] = score
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def rerank(self, query: str, results: List[Dict[str, Any]], top_k: int,
+               budget_seconds: Optional[float] = None) -> RerankResult:
+        """Rerank results by cross-encoder score.
+
+        If scoring the remaining pairs would exceed ``budget_seconds``, the
+        pass is abandoned and the first ``top_k`` results are returned in
+        their original vector-search order.
+        """
+        start = time.perf_counter()
+        query_hash = self._query_hash(query)
+
+        scores = {}
+        pending = []
+        for index, result in enumerate(results):
+            cached = self._cache_get((query_hash, result['id']))
+            if cached is None:
+                pending.append(index)
+            else:
+                scores[index] = cached
+        cache_hits = len(scores)
+        CACHE_LOOKUPS.labels("rerank", "hit").inc(cache_hits)
+        CACHE_LOOKUPS.labels("rerank", "miss").inc(len(pending))
+
+        for offset in range(0, len(pending), self.batch_size):
+            batch = pending[offset:offset + self.batch_size]
+
+            if budget_seconds is not None:
+                elapsed = time.perf_counter() - start
+                estimate = (self._seconds_per_pair or 0.0) * len(batch)
+                if elapsed + estimate > budget_seconds:
+                    return RerankResult(
+                        results=results[:top_k],
+                        fell_back=True,
+                        scored=len(scores) - cache_hits,
+                        cache_hits=cache_hits,
+                        seconds=time.perf_counter() - start
+                    )
+
+            batch_start = time.perf_counter()
+            batch_scores = self.model.predict(
+                [(query, results[index]['text']) for index in batch],
+                batch_size=self.batch_size
+            )
+            per_pair = (time.perf_counter() - batch_start) / len(batch)
+            if self._seconds_per_pair is None:
+                self._seconds_per_pair = per_pair
+            else:
+                self._seconds_per_pair = 0.8 * self._seconds_per_pair + 0.2 * per_pair
+
+            for index, score in zip(batch, batch_scores):
+                scores[index] = float(score)
+                self._cache_put((query_hash, results[index]['id']), float(score))
+
+        order = sorted(range(len(results)), key=lambda index: -scores[index])
+        reranked = [{**results[index], 'rerank_score': scores[index]} for index in order[:top_k]]
+
+        return RerankResult(
+            results=reranked,
+            fell_back=False,
+            scored=len(scores) - cache_hits,
+            cache_hits=cache_hits,
+            seconds=time.perf_counter() - start
+        )
@@ -0,0 +1,271 @@
+"""HTTP service around NyayaRAGAgent.
+
+One agent, and with it one embedding model and one storage client, is
+shared by all requests. At most ``max_in_flight`` questions are
+answered at once; further requests wait in a bounded queue and are shed
+with 503 when the queue is full or they have waited too long.
+
+Endpoints:
+    POST /ask     {"question", "session_id"?} -> {"answer", "trace_id"}
+    POST /chat    {"question", "session_id"?} -> the agent's chat() response
+    POST /stream  {"question", "session_id"?} -> server-sent events with
+                  answer tokens, then a "done" event with the chat() response
+    POST /reset   {"session_id"} -> forget a conversation
+    GET  /healthz, GET /metrics
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional, Tuple
+from .metrics import registry
+from .logger import get_logger
+from config.config import config
+
+logger = get_logger(__name__)
+
+ENDPOINTS = {"/ask", "/chat", "/stream", "/reset", "/healthz", "/metrics"}
+
+HTTP_REQUESTS = registry.counter(
+    "nyayagpt_http_requests_total", "HTTP requests by endpoint and status code", ["endpoint", "code"])
+HTTP_QUEUE_DEPTH = registry.gauge(
+    "nyayagpt_http_queued_requests", "HTTP requests waiting for an in-flight slot")
+HTTP_QUEUE_WAIT = registry.histogram(
+    "nyayagpt_http_queue_wait_seconds", "Time HTTP requests waited for an in-flight slot")
+
+
+class AdmissionController:
+    """Bound the number of requests in flight and the queue behind them."""
+
+    def __init__(self, max_in_flight: int, max_queue: int, queue_timeout: float):
+        """Initialize the controller.
+
+        Args:
+            max_in_flight: Requests processed at once
+            max_queue: Requests allowed to wait for a slot
+            queue_timeout: Seconds a request may wait before it is shed
+        """
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.queued = 0
+
+    def acquire(self) -> Tuple[bool, float]:
+        """Wait for a slot; returns whether one was granted and the wait."""
+        start = time.perf_counter()
+        if self._slots.acquire(blocking=False):
+            with self._lock:
+                self.in_flight += 1
+            return True, 0.0
+
+        with self._lock:
+            if self.queued >= self.max_queue:
+                return False, 0.0
+            self.queued += 1
+            HTTP_QUEUE_DEPTH.set(self.queued)
+
+        granted = self._slots.acquire(timeout=self.queue_timeout)
+        with self._lock:
+            self.queued -= 1
+            HTTP_QUEUE_DEPTH.set(self.queued)
+            if granted:
+                self.in_flight += 1
+        waited = time.perf_counter() - start
+        HTTP_QUEUE_WAIT.observe(waited)
+        return granted, waited
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+
+def server_timing(timings: Dict[str, float], queue_seconds: float, total_seconds: float) -> str:
+    """Format stage timings as a Server-Timing header."""
+    entries = [f"queue;dur={queue_seconds * 1000:.1f}"]
+    for name, seconds in timings.items():
+        if not name.startswith("retrieve."):
+            entries.append(f"{name};dur={seconds * 1000:.1f}")
+    entries.append(f"total;dur={total_seconds * 1000:.1f}")
+    return ", ".join(entries)
+
+
+class BadRequest(Exception):
+    """Raised for invalid request bodies."""
+
+    def __init__(self, message: str, code: int = 400):
+        super().__init__(message)
+        self.code = code
+
+
+class NyayaRequestHandler(BaseHTTPRequestHandler):
+    """Routes requests to the shared agent."""
+
+    server_version = "NyayaGPT"
+
+    def log_message(self, format, *args):
+        logger.debug(format % args, extra={"client": self.client_address[0]})
+
+    def _send_json(self, code: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(body, default=str).encode('utf-8')
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+        HTTP_REQUESTS.labels(self.path if self.path in ENDPOINTS else "other", code).inc()
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > self.server.max_body_bytes:
+            raise BadRequest("Request body too large", code=413)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            raise BadRequest("Request body must be JSON")
+        if not isinstance(body, dict):
+            raise BadRequest("Request body must be a JSON object")
+        return body
+
+    def _question(self, body: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+        question = body.get("question")
+        if not isinstance(question, str) or not question.strip():
+            raise BadRequest("'question' must be a non-empty string")
+        session_id = body.get("session_id")
+        if session_id is not None and not isinstance(session_id, str):
+            raise BadRequest("'session_id' must be a string")
+        return question.strip(), session_id
+
+    def do_GET(self):
+        if self.path == "/healthz":
+            admission = self.server.admission
+            self._send_json(200, {"status": "ok", "in_flight": admission.in_flight, "queued": admission.queued})
+        elif self.path == "/metrics":
+            data = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        handlers = {"/ask": self._handle_ask, "/chat": self._handle_chat,
+                    "/stream": self._handle_stream, "/reset": self._handle_reset}
+        handler = handlers.get(self.path)
+        if handler is None:
+            self._send_json(404, {"error": "Not found"})
+            return
+
+        try:
+            body = self._read_json()
+            if self.path == "/reset":
+                handler(body)
+                return
+            question, session_id = self._question(body)
+        except BadRequest as e:
+            self._send_json(e.code, {"error": str(e)})
+            return
+
+        admission = self.server.admission
+        granted, waited = admission.acquire()
+        if not granted:
+            self._send_json(503, {"error": "Server overloaded, retry later"}, {"Retry-After": "1"})
+            return
+        try:
+            handler(question, session_id, waited)
+        except Exception as e:
+            logger.exception(f"Request to {self.path} failed")
+            self._send_json(500, {"error": str(e)})
+        finally:
+            admission.release()
+
+    def _handle_ask(self, question: str, session_id: Optional[str], waited: float) -> None:
+        start = time.perf_counter()
+        result = self.server.agent.chat(question, session_id=session_id)
+        self._send_json(200, {"answer": result["answer"], "trace_id": result["trace_id"]}, {
+            "Server-Timing": server_timing(result["timings"], waited, time.perf_counter() - start + waited),
+            "X-Trace-Id": result["trace_id"] or ""
+        })
+
+    def _handle_chat(self, question: str, session_id: Optional[str], waited: float) -> None:
+        start = time.perf_counter()
+        result = self.server.agent.chat(question, session_id=session_id)
+        self._send_json(200, result, {
+            "Server-Timing": server_timing(result["timings"], waited, time.perf_counter() - start + waited),
+            "X-Trace-Id": result["trace_id"] or ""
+        })
+
+    def _handle_stream(self, question: str, session_id: Optional[str], waited: float) -> None:
+        start = time.perf_counter()
+        events = self.server.agent.stream(question, session_id=session_id)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("X-Queue-Time-Ms", f"{waited * 1000:.1f}")
+        self.end_headers()
+        HTTP_REQUESTS.labels(self.path, 200).inc()
+
+        # Timings are only known at the end, so they go in the final event
+        try:
+            for event in events:
+                if "token" in event:
+                    self.wfile.write(f"data: {json.dumps(event['token'])}\n\n".encode('utf-8'))
+                    self.wfile.flush()
+                else:
+                    result = event["result"]
+                    result["server_timing"] = server_timing(
+                        result["timings"], waited, time.perf_counter() - start + waited)
+                    data = json.dumps(result, default=str)
+                    self.wfile.write(f"event: done\ndata: {data}\n\n".encode('utf-8'))
+        except (BrokenPipeError, ConnectionResetError):
+            logger.info("Client disconnected during streaming")
+        except Exception as e:
+            logger.exception("Streaming request failed")
+            self.wfile.write(f"event: error\ndata: {json.dumps(str(e))}\n\n".encode('utf-8'))
+        finally:
+            # Stop generating before the admission slot is released
+            events.close()
+
+    def _handle_reset(self, body: Dict[str, Any]) -> None:
+        session_id = body.get("session_id")
+        if not isinstance(session_id, str):
+            raise BadRequest("'session_id' must be a string")
+        self.server.agent.reset_session(session_id)
+        self._send_json(200, {"reset": session_id})
+
+
+class NyayaHTTPServer(ThreadingHTTPServer):
+    """Threaded HTTP server sharing one agent across requests."""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address: Tuple[str, int], agent: Any, max_in_flight: int = None,
+                 max_queue: int = None, queue_timeout: float = None, max_body_bytes: int = None):
+        """Initialize the server.
+
+        Args:
+            address: (host, port) to listen on
+            agent: The NyayaRAGAgent answering every request
+            max_in_flight: Questions answered at once (defaults to config)
+            max_queue: Requests allowed to wait for a slot (defaults to config)
+            queue_timeout: Seconds a request may wait (defaults to config)
+            max_body_bytes: Largest accepted request body (defaults to config)
+        """
+        super().__init__(address, NyayaRequestHandler)
+        self.agent = agent
+        self.admission = AdmissionController(
+            max_in_flight or config.server.max_in_flight,
+            config.server.max_queue if max_queue is None else max_queue,
+            config.server.queue_timeout_ms / 1000 if queue_timeout is None else queue_timeout
+        )
+        self.max_body_bytes = max_body_bytes or config.server.max_body_bytes
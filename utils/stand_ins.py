@@ -0,0 +1,358 @@
+"""Offline stand-ins for the LLM, embedding model and vector store.
+
+These let NyayaRAGAgent and the ingestion code run without Gemini,
+Pinecone, ChromaDB Cloud or a downloaded embedding model, which is what
+the benchmarks in scripts/ use. The stand-in sinks serialize every
+payload to JSON, as the real clients do before sending it, and record
+how long that took.
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+from types import SimpleNamespace
+from typing import List, Dict, Any, Iterator
+import numpy as np
+from langchain_core.messages import AIMessage, AIMessageChunk
+from .embedder import ChunkWithEmbedding
+from .filters import F, FilterSpec, combine, matches
+from .legal_structure import structure_metadata
+
+
+VOCABULARY = (
+    "the constitution article part clause state citizen right law parliament "
+    "shall may provided union court person equality liberty protection"
+).split()
+
+
+class FakeLLM:
+    """Deterministic chat model with configurable latency and token rate."""
+
+    def __init__(self, first_token_latency: float = 0.3, tokens_per_second: float = 80.0,
+                 answer_tokens: int = 150):
+        """Initialize the fake model.
+
+        Args:
+            first_token_latency: Seconds before the first token is produced
+            tokens_per_second: Rate at which the remaining tokens are produced
+            answer_tokens: Number of tokens in every answer
+        """
+        self.first_token_latency = first_token_latency
+        self.tokens_per_second = tokens_per_second
+        self.answer_tokens = answer_tokens
+
+    def _tokens(self, messages) -> List[str]:
+        """Answer tokens derived from a hash of the prompt."""
+        prompt = "".join(str(message.content) for message in messages)
+        seed = int(hashlib.sha1(prompt.encode('utf-8')).hexdigest()[:8], 16)
+        rng = np.random.default_rng(seed)
+        words = rng.choice(VOCABULARY, size=self.answer_tokens)
+        return [f"{word} " for word in words]
+
+    def stream(self, messages) -> Iterator[AIMessageChunk]:
+        """Yield the answer token by token."""
+        tokens = self._tokens(messages)
+        time.sleep(self.first_token_latency)
+        for i, token in enumerate(tokens):
+            if i and self.tokens_per_second:
+                time.sleep(1 / self.tokens_per_second)
+            yield AIMessageChunk(content=token)
+
+    def invoke(self, messages) -> AIMessage:
+        """Return the whole answer."""
+        return AIMessage(content="".join(chunk.content for chunk in self.stream(messages)))
+
+
+class WordTokenizer:
+    """Tokenizer stand-in counting words and punctuation, with the encode() API."""
+
+    def encode(self, text: str, add_special_tokens: bool = False) -> List[str]:
+        return re.findall(r'\w+|[^\w\s]', text)
+
+
+class HashingEmbedder:
+    """Deterministic bag-of-words embedding model with the encode() API."""
+
+    def __init__(self, dimension: int = 1024, seconds_per_text: float = 0.0):
+        """Initialize the embedder.
+
+        Args:
+            dimension: Embedding dimension
+            seconds_per_text: Simulated encoding cost per text
+        """
+        self.dimension = dimension
+        self.seconds_per_text = seconds_per_text
+
+    def _bucket(self, word: str) -> int:
+        return int(hashlib.md5(word.encode('utf-8')).hexdigest()[:8], 16) % self.dimension
+
+    def encode(self, texts: List[str], **kwargs) -> np.ndarray:
+        """Embed texts as normalized hashed word counts."""
+        if self.seconds_per_text:
+            time.sleep(self.seconds_per_text * len(texts))
+        embeddings = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in re.findall(r'\w+', text.lower()):
+                embeddings[row, self._bucket(word)] += 1.0
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.maximum(norms, 1e-12)
+
+
+class InMemoryVectorStore:
+    """Local exact-search vector store with the storage classes' interface."""
+
+    def __init__(self, dimension: int = 1024, query_latency: float = 0.0, embedder: Any = None):
+        """Initialize the store.
+
+        Args:
+            dimension: Embedding dimension
+            query_latency: Simulated network latency per query
+            embedder: Model used to embed text queries in search()
+        """
+        self.dimension = dimension
+        self.query_latency = query_latency
+        self.embedder = embedder or HashingEmbedder(dimension)
+        self.ids: List[str] = []
+        self.texts: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self.matrix = np.zeros((0, dimension), dtype=np.float32)
+        self._lock = threading.Lock()
+
+    def save_chunks(self, chunks, document_name: str = "document") -> None:
+        """Save embedded chunks to the store."""
+        if not chunks:
+            return
+
+        embeddings = np.stack([np.asarray(chunk.embedding, dtype=np.float32) for chunk in chunks])
+        embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+
+        with self._lock:
+            for i, chunk in enumerate(chunks):
+                self.ids.append(f"{document_name}_{i}")
+                self.texts.append(chunk.text)
+                self.metadatas.append({
+                    **(chunk.metadata or {}),
+                    "document_name": document_name,
+                    "chunk_id": i,
+                    "text_length": len(chunk.text)
+                })
+            self.matrix = np.vstack([self.matrix, embeddings])
+
+    def delete_chunks(self, ids: List[str]) -> None:
+        """Delete chunks by ID."""
+        removed = set(ids)
+        with self._lock:
+            keep = [i for i, chunk_id in enumerate(self.ids) if chunk_id not in removed]
+            self.ids = [self.ids[i] for i in keep]
+            self.texts = [self.texts[i] for i in keep]
+            self.metadatas = [self.metadatas[i] for i in keep]
+            self.matrix = self.matrix[keep]
+
+    def search(self, query: str, n_results: int = 5, document_name: str = None,
+               filters: FilterSpec = None) -> List[Dict[str, Any]]:
+        """Search for similar chunks using text query."""
+        query_embedding = self.embedder.encode([query])[0]
+        return self.search_by_embedding(query_embedding, n_results=n_results, document_name=document_name,
+                                        filters=filters)
+
+    def search_by_embedding(self, query_embedding: np.ndarray, n_results: int = 5, document_name: str = None,
+                            filters: FilterSpec = None) -> List[Dict[str, Any]]:
+        """Search for similar chunks using embedding vector."""
+        if self.query_latency:
+            time.sleep(self.query_latency)
+
+        with self._lock:
+            matrix = self.matrix
+            ids, texts, metadatas = self.ids, self.texts, self.metadatas
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        scores = matrix @ query
+
+        where = combine(F("document_name") == document_name if document_name else None, filters)
+        if where is not None:
+            mask = np.array([matches(where, m) for m in metadatas], dtype=bool)
+            scores = np.where(mask, scores, -np.inf)
+
+        top = np.argsort(-scores)[:n_results]
+        return [
+            {
+                'id': ids[i],
+                'text': texts[i],
+                'distance': 1 - float(scores[i]),
+                'metadata': metadatas[i]
+            }
+            for i in top if np.isfinite(scores[i])
+        ]
+
+    def get_index_info(self) -> Dict[str, Any]:
+        """Get information about the store."""
+        return {
+            "name": "in-memory",
+            "dimension": self.dimension,
+            "total_vector_count": len(self.ids)
+        }
+
+
+class StandInCollection:
+    """ChromaDB collection stand-in that serializes and counts added records.
+
+    With ``keep_records`` the records are also kept, so they can be
+    listed and fetched back with get().
+    """
+
+    def __init__(self, name: str, metadata: Dict[str, Any] = None, keep_records: bool = False):
+        self.name = name
+        self.metadata = metadata or {}
+        self.records = 0
+        self.bytes_sent = 0
+        self.serialization_seconds = 0.0
+        self.stored: Dict[str, Dict[str, Any]] = {} if keep_records else None
+
+    def add(self, ids, documents, embeddings, metadatas) -> None:
+        start = time.perf_counter()
+        payload = json.dumps({
+            "ids": ids,
+            "documents": documents,
+            "embeddings": embeddings,
+            "metadatas": metadatas
+        })
+        self.serialization_seconds += time.perf_counter() - start
+        self.bytes_sent += len(payload)
+        self.records += len(ids)
+        if self.stored is not None:
+            for record in zip(ids, documents, embeddings, metadatas):
+                self.stored[record[0]] = dict(zip(("id", "document", "embedding", "metadata"), record))
+
+    def delete(self, ids) -> None:
+        self.records -= len(ids)
+        if self.stored is not None:
+            for chunk_id in ids:
+                self.stored.pop(chunk_id, None)
+
+    def get(self, ids=None, include=None, limit=None, offset=0) -> Dict[str, Any]:
+        records = [self.stored[chunk_id] for chunk_id in ids if chunk_id in self.stored] if ids is not None \
+            else list(self.stored.values())[offset:None if limit is None else offset + limit]
+        return {
+            "ids": [record["id"] for record in records],
+            "documents": [record["document"] for record in records],
+            "embeddings": [record["embedding"] for record in records],
+            "metadatas": [record["metadata"] for record in records]
+        }
+
+    def count(self) -> int:
+        return self.records
+
+
+class StandInChromaClient:
+    """ChromaDB client stand-in holding StandInCollections."""
+
+    def __init__(self, keep_records: bool = False):
+        self.collections: Dict[str, StandInCollection] = {}
+        self.keep_records = keep_records
+
+    def get_or_create_collection(self, name: str, metadata: Dict[str, Any] = None) -> StandInCollection:
+        if name not in self.collections:
+            self.collections[name] = StandInCollection(name, metadata, self.keep_records)
+        return self.collections[name]
+
+    def create_collection(self, name: str, metadata: Dict[str, Any] = None) -> StandInCollection:
+        self.collections[name] = StandInCollection(name, metadata, self.keep_records)
+        return self.collections[name]
+
+    def delete_collection(self, name: str) -> None:
+        self.collections.pop(name, None)
+
+
+class StandInPineconeIndex:
+    """Pinecone index stand-in that serializes and counts upserted vectors.
+
+    With ``keep_records`` the vectors are also kept, so they can be
+    listed and fetched back.
+    """
+
+    def __init__(self, dimension: int = 1024, keep_records: bool = False):
+        self.dimension = dimension
+        self.records = 0
+        self.bytes_sent = 0
+        self.serialization_seconds = 0.0
+        self.stored: Dict[str, Dict[str, Any]] = {} if keep_records else None
+
+    def upsert(self, vectors) -> None:
+        start = time.perf_counter()
+        payload = json.dumps({"vectors": vectors})
+        self.serialization_seconds += time.perf_counter() - start
+        self.bytes_sent += len(payload)
+        if self.stored is not None:
+            self.stored.update((vector["id"], vector) for vector in vectors)
+            self.records = len(self.stored)
+        else:
+            self.records += len(vectors)
+
+    def delete(self, ids=None, delete_all: bool = False) -> None:
+        self.records = 0 if delete_all else self.records - len(ids)
+        if self.stored is not None:
+            for chunk_id in list(self.stored) if delete_all else ids:
+                self.stored.pop(chunk_id, None)
+            self.records = len(self.stored)
+
+    def list(self, prefix: str = "", limit: int = 100) -> Iterator[List[str]]:
+        ids = [chunk_id for chunk_id in self.stored if chunk_id.startswith(prefix)]
+        for start in range(0, len(ids), limit):
+            yield ids[start:start + limit]
+
+    def fetch(self, ids) -> SimpleNamespace:
+        return SimpleNamespace(vectors={
+            chunk_id: SimpleNamespace(id=chunk_id, values=self.stored[chunk_id]["values"],
+                                      metadata=self.stored[chunk_id]["metadata"])
+            for chunk_id in ids if chunk_id in self.stored
+        })
+
+    def describe_index_stats(self) -> Dict[str, Any]:
+        return {"total_vector_count": self.records, "dimension": self.dimension}
+
+
+def synthetic_corpus(n_chunks: int, embedder) -> List[ChunkWithEmbedding]:
+    """Build constitution-like embedded chunks for an InMemoryVectorStore."""
+    topics = ["equality before law", "protection of life and personal liberty",
+              "freedom of speech", "election of the President", "powers of Parliament",
+              "fundamental duties", "directive principles", "amendment procedure"]
+    texts, headings = [], []
+    for i in range(n_chunks):
+        topic = topics[i % len(topics)]
+        headings.append([f"PART {['III', 'IV', 'V', 'XI', 'XX'][i % 5]}", f"Article {i + 1}"])
+        texts.append(
+            "\n".join(headings[-1]) + "\n"
+            f"Article {i + 1} deals with {topic}. The State shall not deny to any person "
+            f"the {topic} within the territory of India. Provided that nothing in this "
+            f"article shall affect the operation of any existing law relating to {topic}."
+        )
+    embeddings = embedder.encode(texts)
+    return [
+        ChunkWithEmbedding(text=text, embedding=embeddings[i], metadata={
+            'chunk_id': i,
+            'chunk_type': 'DocChunk',
+            'heading_path': ' > '.join(headings[i]),
+            **structure_metadata(headings[i], text)
+        })
+        for i, text in enumerate(texts)
+    ]
+
+
+def stand_in_agent(n_chunks: int = 2000, dimension: int = 1024, query_latency: float = 0.02,
+                   first_token_latency: float = 0.3, tokens_per_second: float = 200.0, **agent_kwargs):
+    """Create a NyayaRAGAgent wired to the fake LLM and an in-memory store.
+
+    Context token counts use WordTokenizer, so nothing is downloaded.
+    """
+    from .chunker import set_tokenizer
+    from .rag_agent import NyayaRAGAgent
+
+    set_tokenizer(WordTokenizer())
+    embedder = HashingEmbedder(dimension=dimension)
+    store = InMemoryVectorStore(dimension=dimension, query_latency=query_latency, embedder=embedder)
+    store.save_chunks(synthetic_corpus(n_chunks, embedder), document_name="indian_constitution")
+    llm = FakeLLM(first_token_latency=first_token_latency, tokens_per_second=tokens_per_second)
+    return NyayaRAGAgent(storage=store, llm=llm, embedder=embedder, **agent_kwargs)
@@ -1,18 +1,27 @@
 import chromadb
 from chromadb.config import Settings
 from typing import List, Dict, Any, Optional
+import time
 import numpy as np
 from datetime import datetime
 from .embedder import ChunkWithEmbedding
-from .chunker import embedding_model
+from .query_encoder import get_query_encoder
+from .tracing import start_span, traced, current_span
+from .metrics import timed_backend_call, record_upload
+from .filters import F, FilterSpec, combine, to_where
+from .validators import check_upload
+from .logger import get_logger
+
+logger = get_logger(__name__)
 
 
 class ChromaStorage:
     """ChromaDB storage for document chunks and embeddings."""
     
-    def __init__(self, collection_name: str = "documents", persist_directory: str = "./chroma_db"):
+    def __init__(self, collection_name: str = "documents", persist_directory: str = "./chroma_db",
+                 client: Any = None):
         """Initialize ChromaDB client and collection."""
-        self.client = chromadb.PersistentClient(
+        self.client = client or chromadb.PersistentClient(
             path=persist_directory,
             settings=Settings(anonymized_telemetry=False)
         )
@@ -23,16 +32,17 @@ class ChromaStorage:
             metadata={"hnsw:space": "cosine"}  # Use cosine similarity
         )
     
+    @traced("storage.save_chunks")
+    @timed_backend_call("chroma", "save_chunks")
     def save_chunks(self, chunks: List[ChunkWithEmbedding], document_name: str = "document") -> None:
         """Save embedded chunks to ChromaDB."""
         if not chunks:
-            print("No chunks to save!")
+            logger.warning("No chunks to save!")
             return
         
         # Prepare data for ChromaDB
         ids = [f"{document_name}_{i}" for i in range(len(chunks))]
         texts = [chunk.text for chunk in chunks]
-        embeddings = [chunk.embedding.tolist() for chunk in chunks]  # Convert numpy arrays to lists
         metadatas = []
         
         for i, chunk in enumerate(chunks):
@@ -42,7 +52,7 @@ class ChromaStorage:
                 "text_length": len(chunk.text),
                 "created_at": datetime.now().isoformat(),
                 "embedding_model": "bge-large-en-v1.5",
-                "embedding_dim": 1024
+                "embedding_dim": len(chunk.embedding)
             }
             # Only add simple metadata values that ChromaDB can handle
             if chunk.metadata:
@@ -51,45 +61,63 @@ class ChromaStorage:
                         metadata[key] = value
             metadatas.append(metadata)
         
+        # Reject malformed batches before anything is sent
+        check_upload("chroma", ids, texts, [chunk.embedding for chunk in chunks], metadatas)
+        embeddings = [chunk.embedding.tolist() for chunk in chunks]  # Convert numpy arrays to lists
+        
+        span = current_span()
+        if span.recording:
+            span.set_attributes(
+                backend="chroma",
+                chunks=len(chunks),
+                bytes=sum(len(text.encode('utf-8')) for text in texts)
+            )
+        
         # Add to collection
+        start = time.perf_counter()
         self.collection.add(
             ids=ids,
             documents=texts,
             embeddings=embeddings,
             metadatas=metadatas
         )
+        record_upload("chroma", len(ids), time.perf_counter() - start)
         
-        print(f"Saved {len(chunks)} chunks to ChromaDB collection '{self.collection.name}'")
+        logger.info(f"Saved {len(chunks)} chunks to ChromaDB collection '{self.collection.name}'",
+                    extra={"chunks": len(chunks), "collection": self.collection.name})
+    
+    @traced("storage.delete_chunks")
+    @timed_backend_call("chroma", "delete_chunks")
+    def delete_chunks(self, ids: List[str]) -> None:
+        """Delete chunks from ChromaDB by ID."""
+        if not ids:
+            return
+        current_span().set_attributes(backend="chroma", chunks=len(ids))
+        self.collection.delete(ids=ids)
+        logger.info(f"Deleted {len(ids)} chunks from collection '{self.collection.name}'",
+                    extra={"chunks": len(ids), "collection": self.collection.name})
     
-    def search(self, query: str, n_results: int = 5, document_name: str = None) -> List[Dict[str, Any]]:
+    def search(self, query: str, n_results: int = 5, document_name: str = None,
+               filters: FilterSpec = None) -> List[Dict[str, Any]]:
         """Search for similar chunks using text query."""
-        # Create query filter if document_name is specified
-        where_filter = {"document_name": document_name} if document_name else None
-        
         # Generate embedding for the query using the same model
-        query_embedding = embedding_model.encode([query])[0]
-        
-        results = self.collection.query(
-            query_embeddings=[query_embedding.tolist()],
-            n_results=n_results,
-            where=where_filter
-        )
+        with start_span("embedding.encode", texts=1):
+            query_embedding = get_query_encoder().encode([query])[0]
         
-        # Format results
-        formatted_results = []
-        for i in range(len(results['ids'][0])):
-            formatted_results.append({
-                'id': results['ids'][0][i],
-                'text': results['documents'][0][i],
-                'distance': results['distances'][0][i],
-                'metadata': results['metadatas'][0][i]
-            })
-        
-        return formatted_results
+        return self.search_by_embedding(query_embedding, n_results=n_results, document_name=document_name,
+                                        filters=filters)
     
-    def search_by_embedding(self, query_embedding: np.ndarray, n_results: int = 5, document_name: str = None) -> List[Dict[str, Any]]:
-        """Search for similar chunks using embedding vector."""
-        where_filter = {"document_name": document_name} if document_name else None
+    @traced("storage.query")
+    @timed_backend_call("chroma", "query")
+    def search_by_embedding(self, query_embedding: np.ndarray, n_results: int = 5, document_name: str = None,
+                            filters: FilterSpec = None) -> List[Dict[str, Any]]:
+        """Search for similar chunks using embedding vector.
+        
+        ``filters`` (a utils.filters expression or filter dictionary) is
+        applied by the backend before similarity scoring.
+        """
+        current_span().set_attributes(backend="chroma", n_results=n_results)
+        where_filter = to_where(combine(F("document_name") == document_name if document_name else None, filters))
         
         results = self.collection.query(
             query_embeddings=[query_embedding.tolist()],
@@ -126,7 +154,7 @@ class ChromaStorage:
             name=self.collection.name,
             metadata={"hnsw:space": "cosine"}
         )
-        print(f"Cleared collection '{self.collection.name}'")
+        logger.info(f"Cleared collection '{self.collection.name}'")
     
     def explore_database(self, limit: int = 10) -> None:
         """Display database contents in a readable format."""
@@ -149,22 +177,31 @@ class ChromaStorage:
         """Get all data from the collection as a dictionary."""
         return self.collection.get()
     
+    @traced("storage.query")
+    @timed_backend_call("chroma", "query")
     def search_with_filters(self, query: str, n_results: int = 5, 
                           document_name: Optional[str] = None,
                           min_text_length: Optional[int] = None,
-                          max_text_length: Optional[int] = None) -> List[Dict[str, Any]]:
-        """Advanced search with multiple filters."""
-        where_filter = {}
-        
+                          max_text_length: Optional[int] = None,
+                          filters: FilterSpec = None,
+                          **fields: str) -> List[Dict[str, Any]]:
+        """Advanced search with multiple filters.
+        
+        Structural fields such as ``part="III"`` or ``article="21"`` can be
+        passed as keyword arguments; everything is combined with AND.
+        """
+        conditions = [F(field) == value for field, value in fields.items() if value is not None]
         if document_name:
-            where_filter["document_name"] = document_name
+            conditions.append(F("document_name") == document_name)
         if min_text_length is not None:
-            where_filter["text_length"] = {"$gte": min_text_length}
+            conditions.append(F("text_length") >= min_text_length)
         if max_text_length is not None:
-            where_filter["text_length"] = {"$lte": max_text_length}
+            conditions.append(F("text_length") <= max_text_length)
+        where_filter = to_where(combine(*conditions, filters))
         
         # Generate embedding for the query
-        query_embedding = embedding_model.encode([query])[0]
+        with start_span("embedding.encode", texts=1):
+            query_embedding = get_query_encoder().encode([query])[0]
         
         results = self.collection.query(
             query_embeddings=[query_embedding.tolist()],
@@ -0,0 +1,386 @@
+"""Section-by-section loading of large docling JSON documents.
+
+``DoclingDocument.load_from_json`` builds the whole document as a
+Pydantic model, which for a full gazette takes many times the file size
+in memory. Here the file is memory-mapped and indexed in one pass: each
+item of the ``texts``, ``tables``, ``groups``, ... arrays is parsed on
+its own to record its byte span (and, for texts, its label) and then
+dropped. Large values that are never needed, such as page images, are
+skipped without being parsed.
+
+The body is then cut into sections at top-level headings (or every
+``max_items`` top-level items). Each section is built as a small
+DoclingDocument from just its items, with the enclosing headings
+prepended so chunk heading paths are the same as for the whole
+document, and ``chunk_file`` feeds the sections to ``chunk_document``
+one at a time. Peak memory is bounded by the largest section rather
+than the document. Item references in the returned chunks are those of
+the original document. Where a run of peers is cut after ``max_items``,
+the items of the cut section's last chunk are chunked again with the
+next one, so the hybrid chunker's peer merging gives the same chunks as
+for the whole document.
+
+``chunk_json_file`` only streams files of at least STREAM_THRESHOLD_MB,
+as ingestion does; smaller documents are loaded and chunked whole.
+"""
+
+import json
+import mmap
+import os
+import re
+from dataclasses import dataclass, field, replace
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+import numpy as np
+from .tracing import start_span
+from .logger import get_logger
+from config.config import config
+
+logger = get_logger(__name__)
+
+ITEM_ARRAYS = ("groups", "texts", "pictures", "tables", "key_value_items", "form_items")
+HEADER_FIELDS = ("schema_name", "version", "name", "origin")
+HEADING_LABELS = ("title", "section_header")
+WHITESPACE = re.compile(r'[ \t\r\n]*')
+# Strings (with escapes) and brackets: enough to find where a skipped value ends
+SKIP_TOKEN = re.compile(rb'"(?:[^"\\]|\\.)*"|[\[\]{}]', re.DOTALL)
+REF = re.compile(r'^#/(\w+)/(\d+)$')
+
+
+class DoclingJSONIndex:
+    """Byte spans of the items of a memory-mapped docling JSON file."""
+
+    def __init__(self, path: str, window: int = 1 << 20):
+        """Index a file.
+
+        Args:
+            path: Path to a ``.docling.json`` file
+            window: Bytes decoded at a time while scanning
+        """
+        self.path = path
+        self.window = window
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._decoder = json.JSONDecoder()
+        self.header: Dict[str, Any] = {}
+        self.body: Dict[str, Any] = {"self_ref": "#/body", "children": []}
+        self.spans: Dict[str, np.ndarray] = {name: np.zeros((0, 2), dtype=np.int64) for name in ITEM_ARRAYS}
+        # Label of every text item, and the level of section headers
+        self.labels: List[str] = []
+        self.levels: Dict[int, int] = {}
+        try:
+            self._scan()
+        finally:
+            # The decoded window is only needed while scanning
+            self._buffer = ""
+
+    # The scan reads a decoded window of the file; ``_pos`` is the byte
+    # offset of the cursor and ``_cursor`` its index in the window.
+
+    def _refill(self, window: int = None) -> None:
+        window = window or self.window
+        self._buffer = self._map[self._pos:self._pos + window].decode('utf-8', errors='ignore')
+        self._cursor = 0
+        self._at_end = self._pos + window >= len(self._map)
+
+    def _advance(self, end: int) -> None:
+        self._pos += len(self._buffer[self._cursor:end].encode('utf-8'))
+        self._cursor = end
+
+    def _peek(self) -> str:
+        """Next non-whitespace character, moving the cursor to it."""
+        while True:
+            end = WHITESPACE.match(self._buffer, self._cursor).end()
+            self._advance(end)
+            if end < len(self._buffer) or self._at_end:
+                return self._buffer[end:end + 1]
+            self._refill()
+
+    def _expect(self, char: str) -> None:
+        if self._peek() != char:
+            raise ValueError(f"{self.path}: expected {char!r} at byte {self._pos}")
+        self._advance(self._cursor + 1)
+
+    def _parse(self) -> Tuple[Any, int, int]:
+        """Parse the next JSON value; returns it and its byte span."""
+        self._peek()
+        window = self.window
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._cursor)
+                start = self._pos
+                self._advance(end)
+                return value, start, self._pos
+            except json.JSONDecodeError:
+                # The value runs past the decoded window
+                if self._at_end:
+                    raise
+                window *= 4
+                self._refill(window)
+
+    def _skip(self) -> None:
+        """Move past the next JSON value without building it."""
+        if self._peek() not in ("{", "["):
+            self._parse()
+            return
+        depth = 0
+        for match in SKIP_TOKEN.finditer(self._map, self._pos):
+            token = match.group()
+            if token in (b"{", b"["):
+                depth += 1
+            elif token in (b"}", b"]"):
+                depth -= 1
+                if depth == 0:
+                    self._pos = match.end()
+                    self._refill()
+                    return
+        raise ValueError(f"{self.path}: unterminated value at byte {self._pos}")
+
+    def _scan_array(self, name: str) -> None:
+        self._expect("[")
+        spans = []
+        if self._peek() == "]":
+            self._advance(self._cursor + 1)
+            return
+        while True:
+            item, start, end = self._parse()
+            spans.append((start, end))
+            if name == "texts":
+                self.labels.append(item.get("label"))
+                if item.get("label") == "section_header":
+                    self.levels[len(self.labels) - 1] = item.get("level", 1)
+            separator = self._peek()
+            self._advance(self._cursor + 1)
+            if separator == "]":
+                break
+            if separator != ",":
+                raise ValueError(f"{self.path}: expected ',' or ']' at byte {self._pos - 1}")
+        self.spans[name] = np.array(spans, dtype=np.int64)
+
+    def _scan(self) -> None:
+        self._pos = 0
+        self._refill()
+        self._expect("{")
+        while self._peek() != "}":
+            key = self._parse()[0]
+            self._expect(":")
+            if key in ITEM_ARRAYS:
+                self._scan_array(key)
+            elif key in HEADER_FIELDS or key == "body":
+                value = self._parse()[0]
+                if key == "body":
+                    self.body = value
+                else:
+                    self.header[key] = value
+            else:
+                # furniture, pages (which may hold images) and anything newer
+                self._skip()
+            if self._peek() == ",":
+                self._advance(self._cursor + 1)
+
+    def item(self, ref: str) -> Dict[str, Any]:
+        """Parse one item by its reference, e.g. ``#/texts/12``."""
+        kind, index = REF.match(ref).groups()
+        start, end = self.spans[kind][int(index)]
+        return json.loads(self._map[start:end])
+
+    def heading_level(self, ref: str) -> Optional[int]:
+        """Level of a title (0) or section header, None for other items."""
+        match = REF.match(ref)
+        if not match or match.group(1) != "texts":
+            return None
+        index = int(match.group(2))
+        label = self.labels[index]
+        if label not in HEADING_LABELS:
+            return None
+        return self.levels.get(index, 1) if label == "section_header" else 0
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+@dataclass
+class Section:
+    """A part of a document, as a DoclingDocument of its own."""
+    document: Any
+    # Section item reference -> reference in the original document
+    refs: Dict[str, str]
+    # Original item reference -> the top-level item it belongs to
+    owners: Dict[str, str] = field(default_factory=dict)
+    # Whether the section continues the previous one under the same headings
+    continued: bool = False
+
+
+def _plan_sections(index: DoclingJSONIndex, max_items: int) -> Iterator[Tuple[List[str], bool]]:
+    """Top-level references of each section, enclosing headings first.
+
+    The flag is set for sections cut from the previous one after
+    ``max_items`` items, which continue under the same headings.
+    """
+    headings: Dict[int, str] = {}
+    section: List[str] = []
+    has_content = False
+    continued = False
+
+    for child in index.body.get("children", []):
+        ref = child["$ref"]
+        level = index.heading_level(ref)
+        if level is not None:
+            if has_content:
+                yield section, continued
+                section, has_content, continued = [], False, False
+            for deeper in [key for key in headings if key >= level]:
+                del headings[deeper]
+            if not section:
+                section = [headings[key] for key in sorted(headings)]
+            headings[level] = ref
+            section.append(ref)
+            continue
+        if has_content and len(section) >= max_items:
+            yield section, continued
+            section, continued = [headings[key] for key in sorted(headings)], True
+        section.append(ref)
+        has_content = True
+
+    if has_content:
+        yield section, continued
+
+
+_OUTSIDE = object()
+
+
+def _remap(value: Any, refs: Dict[str, str]) -> Any:
+    """Rewrite ``$ref``s to section references.
+
+    References to items outside the section are dropped from lists and
+    become None elsewhere.
+    """
+    if isinstance(value, dict):
+        if "$ref" in value and len(value) == 1:
+            ref = refs.get(value["$ref"])
+            return {"$ref": ref} if ref else _OUTSIDE
+        return {key: (None if item is _OUTSIDE else item)
+                for key, item in ((key, _remap(item, refs)) for key, item in value.items())}
+    if isinstance(value, list):
+        items = [_remap(item, refs) for item in value]
+        return [item for item in items if item is not _OUTSIDE]
+    return value
+
+
+def _build_section(index: DoclingJSONIndex, top_level: List[str], continued: bool = False) -> Section:
+    from docling_core.types.doc import DoclingDocument
+
+    # Collect the section's items depth-first and number them per array
+    items: Dict[str, Dict[str, Any]] = {}
+    local: Dict[str, str] = {"#/body": "#/body"}
+    counts = {name: 0 for name in ITEM_ARRAYS}
+    owners: Dict[str, str] = {}
+    stack = [(ref, ref) for ref in reversed(top_level)]
+    while stack:
+        ref, owner = stack.pop()
+        if ref in items:
+            continue
+        item = index.item(ref)
+        items[ref] = item
+        owners[ref] = owner
+        kind = REF.match(ref).group(1)
+        local[ref] = f"#/{kind}/{counts[kind]}"
+        counts[kind] += 1
+        stack.extend(reversed([(child["$ref"], owner) for child in item.get("children", [])]))
+
+    arrays = {name: [] for name in ITEM_ARRAYS}
+    for ref, item in items.items():
+        item = _remap(item, local)
+        item["self_ref"] = local[ref]
+        # Items whose parent is outside the section hang off the body
+        if not item.get("parent"):
+            item["parent"] = {"$ref": "#/body"}
+        arrays[REF.match(ref).group(1)].append(item)
+
+    body = dict(index.body, children=[{"$ref": local[ref]} for ref in top_level])
+    document = DoclingDocument.model_validate({**index.header, "body": body, **arrays, "pages": {}})
+    return Section(document=document, refs={section_ref: ref for ref, section_ref in local.items()},
+                   owners=owners, continued=continued)
+
+
+def iter_sections(path: str, max_items: int = None) -> Iterator[Section]:
+    """Yield a docling JSON file's sections in document order."""
+    max_items = max_items or config.ingestion.stream_section_items
+    with DoclingJSONIndex(path) as index:
+        for top_level, continued in _plan_sections(index, max_items):
+            yield _build_section(index, top_level, continued)
+
+
+def _open_window(chunks: list, owners: Dict[str, str], top_level: List[str]) -> Tuple[list, List[str]]:
+    """Trailing chunks that later peers could still be merged into.
+
+    The hybrid chunker merges consecutive peers greedily, so the last
+    chunk of a section cut after ``max_items`` items may have been closed
+    only by the cut. Returns those chunks, together with any earlier
+    chunks sharing an item with them, and the top-level items they come
+    from, in document order.
+    """
+    carry = set()
+    start = len(chunks)
+    while start > 0:
+        chunk_owners = {owners[ref] for ref in chunks[start - 1].doc_item_refs if ref in owners}
+        if carry and not chunk_owners & carry:
+            break
+        carry |= chunk_owners
+        start -= 1
+    return chunks[start:], [ref for ref in top_level if ref in carry]
+
+
+def chunk_file(path: str, max_items: int = None) -> list:
+    """Chunk a docling JSON file section by section.
+
+    Returns ChunkRecords like ``chunk_document``, with item references
+    into the original document. Where a section was cut after
+    ``max_items`` items, the items of its last chunk are chunked again
+    with the next section, so peers are merged across the cut as they
+    are for the whole document.
+    """
+    from .chunker import chunk_document
+
+    max_items = max_items or config.ingestion.stream_section_items
+    with start_span("ingest.chunk", streaming=True) as span, DoclingJSONIndex(path) as index:
+        chunks, held, carry, sections = [], [], [], 0
+        for top_level, continued in _plan_sections(index, max_items):
+            if continued and carry:
+                # After the enclosing headings, before the section's own items
+                prefix = next(i for i, ref in enumerate(top_level) if index.heading_level(ref) is None)
+                top_level = top_level[:prefix] + carry + top_level[prefix:]
+            else:
+                chunks.extend(held)
+            section = _build_section(index, top_level, continued)
+            records = [replace(chunk, doc_item_refs=[section.refs.get(ref, ref) for ref in chunk.doc_item_refs])
+                       for chunk in chunk_document(section.document)]
+            held, carry = _open_window(records, section.owners, top_level)
+            chunks.extend(records[:len(records) - len(held)])
+            sections += 1
+        chunks.extend(held)
+        span.set_attributes(sections=sections, chunks=len(chunks))
+    logger.info(f"Chunked {path} in {sections} sections ({len(chunks)} chunks)")
+    return chunks
+
+
+def should_stream(path: str) -> bool:
+    """Whether a docling JSON file is at least STREAM_THRESHOLD_MB."""
+    threshold = config.ingestion.stream_threshold_mb * 1024 * 1024
+    return os.path.exists(path) and os.path.getsize(path) >= threshold
+
+
+def chunk_json_file(path: str) -> list:
+    """Chunk a docling JSON file, section by section only if it is large."""
+    if should_stream(path):
+        return chunk_file(path)
+
+    from docling_core.types.doc import DoclingDocument
+    from .chunker import chunk_document
+    return chunk_document(DoclingDocument.load_from_json(path))
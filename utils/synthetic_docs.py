@@ -0,0 +1,57 @@
+"""Synthetic DoclingDocument generator for offline ingestion benchmarks."""
+
+import random
+from docling_core.types.doc import DoclingDocument, DocItemLabel
+
+
+WORDS = (
+    "the state shall not deny to any person equality before the law or the equal "
+    "protection of the laws within the territory of india parliament may by law "
+    "provide for the constitution of courts citizen right freedom clause article "
+    "provided that nothing in this article shall affect the operation of any existing "
+    "law or prevent the state from making any law union president governor legislature"
+).split()
+
+HEADING_KINDS = ["PART", "CHAPTER", "Article", "Clause"]
+
+
+def _sentence(rng: random.Random, min_words: int = 8, max_words: int = 30) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words))]
+    return " ".join(words).capitalize() + "."
+
+
+def generate_document(n_paragraphs: int = 1000, heading_depth: int = 3,
+                      paragraphs_per_section: int = 5, sentences_per_paragraph: int = 4,
+                      seed: int = 0, name: str = "synthetic") -> DoclingDocument:
+    """Generate a constitution-like document.
+
+    Args:
+        n_paragraphs: Total number of body paragraphs
+        heading_depth: Number of nested heading levels
+        paragraphs_per_section: Paragraphs under each innermost heading
+        sentences_per_paragraph: Sentences in each paragraph
+        seed: Random seed, so the same arguments give the same document
+        name: Document name
+    """
+    rng = random.Random(seed)
+    doc = DoclingDocument(name=name)
+    doc.add_title(text=f"The Synthetic Constitution ({name})")
+
+    counters = [0] * heading_depth
+    for paragraph in range(n_paragraphs):
+        if paragraph % paragraphs_per_section == 0:
+            # Advance the innermost heading, rolling over to outer levels
+            section = paragraph // paragraphs_per_section
+            for level in range(heading_depth):
+                span = 3 ** (heading_depth - level - 1)
+                if section % span == 0:
+                    counters[level] += 1
+                    for deeper in range(level + 1, heading_depth):
+                        counters[deeper] = 0
+                    kind = HEADING_KINDS[min(level, len(HEADING_KINDS) - 1)]
+                    doc.add_heading(text=f"{kind} {counters[level]}", level=level + 1)
+
+        text = " ".join(_sentence(rng) for _ in range(sentences_per_paragraph))
+        doc.add_text(label=DocItemLabel.TEXT, text=text)
+
+    return doc
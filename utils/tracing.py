@@ -0,0 +1,234 @@
+"""Lightweight request tracing with nested timed spans.
+
+Spans are opened with ``start_span`` as context managers. The current
+span is tracked in a context variable, so spans opened inside it (also
+from LangGraph's worker threads, which copy the context) become its
+children and share its trace ID. When tracing is disabled,
+``start_span`` returns a shared no-op span, so instrumented code pays
+for little more than a function call.
+"""
+
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Dict, Any, List, Optional
+from config.config import config
+
+
+_current_span = contextvars.ContextVar("nyayagpt_current_span", default=None)
+
+
+class Span:
+    """A timed operation within a trace."""
+
+    recording = True
+
+    def __init__(self, tracer: "Tracer", name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.status = "OK"
+        self.start_ns = 0
+        self.end_ns = 0
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    def __enter__(self) -> "Span":
+        self.start_ns = time.time_ns()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.end_ns = time.time_ns()
+        _current_span.reset(self._token)
+        if exc is not None:
+            self.status = "ERROR"
+            self.attributes["error"] = f"{exc_type.__name__}: {exc}"
+        self.tracer.export(self)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "attributes": self.attributes
+        }
+
+
+class NoopSpan:
+    """Span returned while tracing is disabled."""
+
+    recording = False
+    trace_id = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, **attributes) -> None:
+        pass
+
+    def __enter__(self) -> "NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+NOOP_SPAN = NoopSpan()
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    """Convert an attribute value to an OTLP/JSON AnyValue."""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(span: Span, service_name: str) -> Dict[str, Any]:
+    """Convert a span to an OTLP/JSON ExportTraceServiceRequest."""
+    otlp_span = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": 1,
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()],
+        "status": {"code": 1 if span.status == "OK" else 2}
+    }
+    if span.parent_id:
+        otlp_span["parentSpanId"] = span.parent_id
+
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+            "scopeSpans": [{"scope": {"name": "nyayagpt"}, "spans": [otlp_span]}]
+        }]
+    }
+
+
+class FileExporter:
+    """Append finished spans to a file as JSON lines.
+
+    ``format`` is either "jsonl" for flat span records or "otlp" for one
+    OTLP/JSON ExportTraceServiceRequest per line, as written by the
+    OpenTelemetry collector's file exporter.
+    """
+
+    def __init__(self, path: str, format: str = "jsonl", service_name: str = "nyayagpt"):
+        if format not in ("jsonl", "otlp"):
+            raise ValueError(f"Unknown trace export format: {format}")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.format = format
+        self.service_name = service_name
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', buffering=1)
+
+    def export(self, span: Span) -> None:
+        record = span.to_dict() if self.format == "jsonl" else to_otlp(span, self.service_name)
+        line = json.dumps(record, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+
+
+class InMemoryExporter:
+    """Keep finished spans in memory, for benchmarks and debugging."""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+
+class Tracer:
+    """Creates spans and hands finished ones to an exporter."""
+
+    def __init__(self, enabled: bool = False, exporter: Any = None):
+        self.enabled = enabled and exporter is not None
+        self.exporter = exporter
+
+    def start_span(self, name: str, **attributes):
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, _current_span.get(), attributes)
+
+    def export(self, span: Span) -> None:
+        try:
+            self.exporter.export(span)
+        except Exception:
+            # Tracing must never break the traced request
+            pass
+
+
+def _tracer_from_config() -> Tracer:
+    if not config.tracing.enabled:
+        return Tracer(enabled=False)
+    return Tracer(enabled=True, exporter=FileExporter(config.tracing.path, config.tracing.format, config.name))
+
+
+tracer = _tracer_from_config()
+
+
+def configure_tracing(enabled: bool = True, exporter: Any = None) -> Tracer:
+    """Replace the global tracer, e.g. to export spans in memory."""
+    global tracer
+    tracer = Tracer(enabled=enabled, exporter=exporter)
+    return tracer
+
+
+def start_span(name: str, **attributes):
+    """Start a span as a child of the current span, if any."""
+    return tracer.start_span(name, **attributes)
+
+
+def traced(name: str):
+    """Decorator running the wrapped function inside a span."""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with tracer.start_span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_span():
+    """The current span, or the no-op span outside a trace."""
+    return _current_span.get() or NOOP_SPAN
+
+
+def current_trace_id() -> Optional[str]:
+    """Trace ID of the current span, or None outside a trace."""
+    span = _current_span.get()
+    return span.trace_id if span else None
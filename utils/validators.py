@@ -1,34 +1,275 @@
-"""Data validation utilities for NyayaGPT."""
+"""Data validation utilities for NyayaGPT.
 
-from typing import List, Dict, Any
+``validate_batch`` checks a whole upload batch in vectorized passes
+over the embedding matrix and the id, text and metadata columns:
+
+- ``missing_embedding``, ``dimension``: embeddings that are absent, not
+  1-D, or of the wrong dimension (the backend's, or else the batch's
+  most common one)
+- ``non_finite``, ``zero_norm``, ``norm``: NaN/inf values, all-zero
+  vectors (cosine is undefined), and, when a tolerance is given, norms
+  away from 1
+- ``empty_text``, ``duplicate_id``: texts with no content and IDs that
+  repeat an earlier row
+- ``metadata_type``, ``record_size``: metadata values the backend cannot
+  store (including NaN) and records whose text plus metadata exceed the
+  backend's limit
+
+``duplicate_text`` is only a warning: the Constitution repeats entries
+such as "[Omitted.]". The storages call ``check_upload`` before any
+network I/O, so a bad batch fails with the offending rows instead of
+halfway through an upload.
+"""
+
+import json
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Sequence
 import numpy as np
 from .embedder import ChunkWithEmbedding
+from .metrics import VALIDATION_FAILURES
+from .logger import get_logger
+from config.config import config
 
+logger = get_logger(__name__)
 
-def validate_chunks(chunks: List[ChunkWithEmbedding]) -> List[str]:
-    """Validate chunks and return list of issues."""
-    issues = []
-    
+SCALAR_TYPES = (str, int, float, bool)
+# Pinecone's limit on the metadata of one vector, which includes the chunk text
+PINECONE_METADATA_LIMIT = 40960
+
+# validate_chunks messages for the checks that apply to chunks
+CHUNK_ISSUES = {
+    "missing_embedding": "Missing embedding",
+    "dimension": "Embedding should be a 1D array of the expected dimension",
+    "non_finite": "Embedding has NaN or infinite values",
+    "zero_norm": "Embedding is all zeros",
+    "norm": "Embedding is not unit length",
+    "empty_text": "Empty text",
+}
+
+
+@dataclass
+class ValidationReport:
+    """Rows failing each check of a batch."""
+    records: int
+    errors: Dict[str, np.ndarray] = field(default_factory=dict)
+    warnings: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def add(self, check: str, failed: np.ndarray, rows: Optional[np.ndarray] = None, warning: bool = False) -> None:
+        """Record the rows where a boolean mask is set.
+
+        ``rows`` maps mask positions to batch rows when the mask covers
+        only part of the batch.
+        """
+        failed = np.flatnonzero(failed)
+        if rows is not None:
+            failed = rows[failed]
+        if failed.size:
+            target = self.warnings if warning else self.errors
+            target[check] = np.union1d(target.get(check, failed), failed)
+
+    def issues(self, max_rows: int = 10) -> List[str]:
+        """One line per failed check, listing (the first) offending rows."""
+        lines = []
+        for level, checks in (("error", self.errors), ("warning", self.warnings)):
+            for check, rows in checks.items():
+                shown = ", ".join(str(row) for row in rows[:max_rows])
+                more = f" and {len(rows) - max_rows} more" if len(rows) > max_rows else ""
+                lines.append(f"{level} {check}: {len(rows)} rows ({shown}{more})")
+        return lines
+
+    def summary(self) -> str:
+        if self.ok and not self.warnings:
+            return f"{self.records} records valid"
+        return f"{self.records} records: " + "; ".join(self.issues())
+
+
+class ValidationError(ValueError):
+    """A batch failed pre-flight validation."""
+
+    def __init__(self, report: ValidationReport):
+        super().__init__(report.summary())
+        self.report = report
+
+
+def _repeats(keys: np.ndarray) -> np.ndarray:
+    """Mask of rows whose key equals that of an earlier row."""
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    repeated = np.zeros(len(keys), dtype=bool)
+    repeated[order[1:]] = sorted_keys[1:] == sorted_keys[:-1]
+    return repeated
+
+
+def _string_keys(values: Sequence[Any]) -> np.ndarray:
+    """Hashes standing in for long strings, so duplicates sort as integers."""
+    return np.fromiter((hash(value) for value in values), dtype=np.int64, count=len(values))
+
+
+def _embedding_matrix(embeddings: Any, dimension: Optional[int], report: ValidationReport):
+    """Stack the embeddings of the right shape; returns (matrix, rows)."""
+    if isinstance(embeddings, np.ndarray) and embeddings.ndim == 2:
+        if dimension is not None and embeddings.shape[1] != dimension:
+            report.add("dimension", np.ones(len(embeddings), dtype=bool))
+            return np.zeros((0, dimension)), np.zeros(0, dtype=np.int64)
+        return embeddings, np.arange(len(embeddings))
+
+    n = len(embeddings)
+    missing = np.fromiter((embedding is None for embedding in embeddings), dtype=bool, count=n)
+    shapes = [np.shape(embedding) for embedding in embeddings]
+    sizes = np.fromiter((shape[0] if len(shape) == 1 else -1 for shape in shapes), dtype=np.int64, count=n)
+    report.add("missing_embedding", missing)
+
+    if dimension is None:
+        valid_sizes = sizes[sizes > 0]
+        dimension = int(np.bincount(valid_sizes).argmax()) if valid_sizes.size else 0
+    report.add("dimension", (sizes != dimension) & ~missing)
+
+    rows = np.flatnonzero(sizes == dimension)
+    if rows.size == 0:
+        return np.zeros((0, dimension)), rows
+    return np.stack([np.asarray(embeddings[row]) for row in rows]), rows
+
+
+def _check_metadata(metadatas: List[Dict[str, Any]], allow_none: bool, report: ValidationReport) -> None:
+    """Column by column, flag values the backend cannot store."""
+    n = len(metadatas)
+    keys = set()
+    for metadata in metadatas:
+        keys.update(metadata or ())
+
+    bad = np.zeros(n, dtype=bool)
+    for key in keys:
+        column = [(metadata or {}).get(key) for metadata in metadatas]
+        present = np.fromiter(((metadata or {}).__contains__(key) for metadata in metadatas), dtype=bool, count=n)
+        allowed = np.fromiter((isinstance(value, SCALAR_TYPES) for value in column), dtype=bool, count=n)
+        if allow_none:
+            allowed |= np.fromiter((value is None for value in column), dtype=bool, count=n)
+        bad |= present & ~allowed
+
+        floats = np.flatnonzero(np.fromiter((type(value) is float for value in column), dtype=bool, count=n))
+        if floats.size:
+            values = np.array([column[row] for row in floats], dtype=np.float64)
+            bad[floats[~np.isfinite(values)]] = True
+    report.add("metadata_type", bad)
+
+
+def _oversized(texts: Sequence[str], metadatas: Optional[List[Dict[str, Any]]], limit: int) -> np.ndarray:
+    """Mask of records whose UTF-8 text plus JSON metadata exceed ``limit`` bytes."""
+    n = len(texts)
+    text_bytes = np.fromiter((len((text or "").encode('utf-8')) for text in texts), dtype=np.int64, count=n)
+    if metadatas is None:
+        return text_bytes > limit
+
+    # Pinecone keeps the text inside the metadata; don't count it twice
+    separate = np.fromiter(("text" not in (metadata or {}) for metadata in metadatas), dtype=bool, count=n)
+    # A character count is cheap and off by at most a few bytes per character
+    # (UTF-8, escapes), so only records near the limit are serialized
+    estimate = text_bytes * separate + np.fromiter(
+        (sum(len(key) + len(str(value)) + 6 for key, value in (metadata or {}).items()) for metadata in metadatas),
+        dtype=np.int64, count=n
+    )
+    oversized = np.zeros(n, dtype=bool)
+    for row in np.flatnonzero(estimate > limit // 4):
+        size = len(json.dumps(metadatas[row] or {}, ensure_ascii=False, default=str).encode('utf-8'))
+        oversized[row] = size + text_bytes[row] * separate[row] > limit
+    return oversized
+
+
+def validate_batch(ids: Sequence[str], texts: Sequence[str], embeddings: Any,
+                   metadatas: Optional[List[Dict[str, Any]]] = None, dimension: Optional[int] = None,
+                   norm_tolerance: Optional[float] = None, allow_none: bool = True,
+                   max_record_bytes: Optional[int] = None) -> ValidationReport:
+    """Validate an upload batch and report the offending rows.
+
+    Args:
+        ids: Record IDs
+        texts: Chunk texts
+        embeddings: (n, d) matrix or a sequence of 1-D vectors
+        metadatas: Metadata dicts as they will be sent to the backend
+        dimension: Backend dimension; None requires only a consistent batch
+        norm_tolerance: Maximum |norm - 1|; None skips the check
+        allow_none: Whether metadata values may be None (Chroma) or not (Pinecone)
+        max_record_bytes: Size limit of text plus metadata per record
+    """
+    n = len(ids)
+    report = ValidationReport(records=n)
+    if len(texts) != n or len(embeddings) != n or (metadatas is not None and len(metadatas) != n):
+        raise ValueError(f"Column lengths differ: {n} ids, {len(texts)} texts, {len(embeddings)} embeddings"
+                         + (f", {len(metadatas)} metadatas" if metadatas is not None else ""))
+    if n == 0:
+        return report
+
+    matrix, rows = _embedding_matrix(embeddings, dimension, report)
+    if rows.size:
+        finite = np.isfinite(matrix).all(axis=1)
+        report.add("non_finite", ~finite, rows)
+        norms = np.linalg.norm(np.where(finite[:, None], matrix, 0).astype(np.float32, copy=False), axis=1)
+        zero = finite & (norms < 1e-12)
+        report.add("zero_norm", zero, rows)
+        if norm_tolerance:
+            report.add("norm", finite & ~zero & (np.abs(norms - 1) > norm_tolerance), rows)
+
+    report.add("empty_text", np.fromiter((not (text and text.strip()) for text in texts), dtype=bool, count=n))
+    # IDs are compared as strings, so a hash collision cannot reject a valid
+    # batch; texts, which may be long, by hash, as a collision only warns
+    report.add("duplicate_id", _repeats(np.asarray([str(chunk_id) for chunk_id in ids])))
+    report.add("duplicate_text", _repeats(_string_keys(texts)), warning=True)
+
+    if metadatas is not None:
+        _check_metadata(metadatas, allow_none, report)
+    if max_record_bytes:
+        report.add("record_size", _oversized(texts, metadatas, max_record_bytes))
+    return report
+
+
+def check_upload(backend: str, ids: Sequence[str], texts: Sequence[str], embeddings: Any,
+                 metadatas: Optional[List[Dict[str, Any]]] = None, dimension: Optional[int] = None,
+                 max_record_bytes: Optional[int] = None) -> ValidationReport:
+    """Validate a batch for a backend and raise ValidationError on errors.
+
+    Does nothing when VALIDATE_UPLOADS is off. MAX_RECORD_BYTES, when
+    set, overrides the backend's own limit.
+    """
+    if not config.storage.validate_uploads:
+        return ValidationReport(records=len(ids))
+
+    report = validate_batch(
+        ids, texts, embeddings, metadatas,
+        dimension=dimension,
+        norm_tolerance=config.storage.norm_tolerance or None,
+        allow_none=backend != "pinecone",
+        max_record_bytes=config.storage.max_record_bytes or max_record_bytes
+    )
+    for check, rows in report.warnings.items():
+        logger.warning(f"Upload to {backend}: {len(rows)} records with {check}", extra={"backend": backend})
+    if not report.ok:
+        for check in report.errors:
+            VALIDATION_FAILURES.labels(backend, check).inc()
+        logger.error(f"Rejected upload to {backend}: {report.summary()}", extra={"backend": backend})
+        raise ValidationError(report)
+    return report
+
+
+def validate_chunks(chunks: List[ChunkWithEmbedding], dimension: Optional[int] = None) -> List[str]:
+    """Validate chunks and return list of issues; an empty list means they are valid.
+
+    Only errors are issues. Warnings such as repeated texts are not.
+    """
     if not chunks:
-        issues.append("No chunks provided")
-        return issues
-    
-    for i, chunk in enumerate(chunks):
-        # Check text
-        if not chunk.text or not chunk.text.strip():
-            issues.append(f"Chunk {i}: Empty text")
-        
-        # Check embedding
-        if not hasattr(chunk, 'embedding') or chunk.embedding is None:
-            issues.append(f"Chunk {i}: Missing embedding")
-        elif not isinstance(chunk.embedding, np.ndarray):
-            issues.append(f"Chunk {i}: Embedding is not numpy array")
-        elif chunk.embedding.size == 0:
-            issues.append(f"Chunk {i}: Empty embedding")
-        elif len(chunk.embedding.shape) != 1:
-            issues.append(f"Chunk {i}: Embedding should be 1D array")
-    
-    return issues
+        return ["No chunks provided"]
+    report = validate_batch(
+        [str(i) for i in range(len(chunks))],
+        [chunk.text for chunk in chunks],
+        [getattr(chunk, 'embedding', None) for chunk in chunks],
+        dimension=dimension
+    )
+    failures = sorted((int(row), CHUNK_ISSUES.get(check, check))
+                      for check, rows in report.errors.items() for row in rows)
+    return [f"Chunk {row}: {message}" for row, message in failures]
 
 
 def validate_search_results(results: List[Dict[str, Any]]) -> List[str]:
@@ -41,9 +282,9 @@ def validate_search_results(results: List[Dict[str, Any]]) -> List[str]:
     
     for i, result in enumerate(results):
         required_fields = ['id', 'text', 'distance', 'metadata']
-        for field in required_fields:
-            if field not in result:
-                issues.append(f"Result {i}: Missing field '{field}'")
+        for name in required_fields:
+            if name not in result:
+                issues.append(f"Result {i}: Missing field '{name}'")
         
         if 'distance' in result and not isinstance(result['distance'], (int, float)):
             issues.append(f"Result {i}: Distance should be numeric")